@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Account Rollup
+==============
+
+Rolls the per-registrant Clay import up to one row per account (company
+domain) for the ABM motion, in a single streaming hash aggregation instead
+of per-row lookups in Clay.
+
+Usage:
+    python3 account_rollup.py processed_TIMESTAMP/
+    python3 account_rollup.py batch_TIMESTAMP/          # combined multi-webinar import
+
+    from account_rollup import rollup_accounts
+    stats = rollup_accounts('processed_TIMESTAMP')
+
+Accounts are keyed by the normalized Website Domain, else the normalized
+crm_company_domain (lowercase, no scheme/www/path; free mailbox domains
+don't count). Leads with neither are left unassigned.
+
+Outputs in the same directory:
+    accounts.csv          one row per account, highest total engagement first
+    contact_accounts.csv  BMID (and webinar_id when present) -> account_domain
+
+Per account:
+    registrants / attendees   leads and leads with attendance_status = attended
+    webinars                  distinct webinar_ids (combined batch imports)
+    total_engagement          sum of engagement_score
+    top_attendee_*            the most senior attendee by Title (C-level > VP >
+                              Head > Director > Manager), then the most engaged
+    crm_contacts / crm_mrr_eur  distinct matched CRM contacts and their summed MRR
+    crm_account_tier          highest tier among them (Enterprise > Mid-Market > SMB)
+"""
+
+import csv
+import os
+import re
+import sys
+
+from columnar import to_float
+from identity_resolution import normalize_domain
+
+DOMAIN_COLUMNS = ('Website Domain', 'crm_company_domain')
+# (rank, label, title keywords), most senior first
+SENIORITY_LEVELS = [
+    (5, 'C-level', ['CEO', 'CMO', 'CTO', 'COO', 'CFO', 'CRO', 'Chief', 'Founder', 'Co-Founder', 'Owner', 'President', 'Partner']),
+    (4, 'VP', ['VP', 'Vice President', 'SVP', 'EVP']),
+    (3, 'Head', ['Head']),
+    (2, 'Director', ['Director']),
+    (1, 'Manager', ['Manager', 'Lead']),
+]
+# CRM fields that together identify the matched CRM contact
+CRM_CONTACT_COLUMNS = ('crm_first_name', 'crm_last_name', 'crm_company_domain', 'crm_created_at', 'crm_mrr_eur')
+TIER_RANKS = {'smb': 1, 'mid-market': 2, 'enterprise': 3}
+ACCOUNT_FIELDS = [
+    'account_domain', 'company_name', 'registrants', 'attendees', 'webinars', 'total_engagement',
+    'top_attendee_bmid', 'top_attendee_name', 'top_attendee_title', 'top_attendee_seniority',
+    'crm_contacts', 'crm_mrr_eur', 'crm_account_tier',
+]
+
+SENIORITY_PATTERNS = [(rank, label, re.compile(r'\b(?:' + '|'.join(re.escape(k) for k in keywords) + r')\b', re.IGNORECASE))
+                      for rank, label, keywords in SENIORITY_LEVELS]
+
+def seniority(title):
+    """(rank, label) of a job title; (0, '') when no level matches"""
+    if title:
+        for rank, label, pattern in SENIORITY_PATTERNS:
+            if pattern.search(title):
+                return rank, label
+    return 0, ''
+
+class Account:
+    """Running aggregates of one account"""
+
+    __slots__ = ('company_name', 'registrants', 'attendees', 'webinars', 'engagement', 'top', 'crm_mrr', 'tier')
+
+    def __init__(self):
+        self.company_name = ''
+        self.registrants = 0
+        self.attendees = 0
+        self.webinars = set()
+        self.engagement = 0.0
+        self.top = None       # (rank key, bmid, name, title, seniority label)
+        self.crm_mrr = {}     # CRM contact -> MRR, so a contact registered twice counts once
+        self.tier = ''
+
+    def row(self, domain):
+        top = self.top or (None, '', '', '', '')
+        return [domain, self.company_name, self.registrants, self.attendees, len(self.webinars) or '',
+                round(self.engagement, 1), *top[1:], len(self.crm_mrr), round(sum(self.crm_mrr.values()), 2),
+                self.tier]
+
+def rollup_accounts(output_dir):
+    """Write accounts.csv and contact_accounts.csv for <output_dir>/webinar_clay_import.csv; return counts"""
+    clay_file = os.path.join(output_dir, 'webinar_clay_import.csv')
+    if not os.path.exists(clay_file):
+        print(f"❌ Missing {clay_file}")
+        return None
+
+    print("\n🏢 Rolling leads up to accounts...")
+    accounts = {}
+    unassigned = 0
+    with open(clay_file, 'r', encoding='utf-8', newline='') as f_in, \
+            open(os.path.join(output_dir, 'contact_accounts.csv'), 'w', encoding='utf-8', newline='') as f_map:
+        reader = csv.reader(f_in)
+        header = next(reader, [])
+        positions = {name: i for i, name in enumerate(header)}
+        width = len(header)
+        cell = lambda row, name: row[positions[name]] if name in positions and positions[name] < len(row) else ''
+        has_webinars = 'webinar_id' in positions
+
+        mapping = csv.writer(f_map)
+        mapping.writerow(['BMID', 'webinar_id', 'account_domain'] if has_webinars else ['BMID', 'account_domain'])
+
+        for row in reader:
+            if len(row) < width:
+                row += [''] * (width - len(row))
+            domain = next(filter(None, (normalize_domain(cell(row, name)) for name in DOMAIN_COLUMNS)), '')
+            bmid = cell(row, 'BMID')
+            mapping.writerow([bmid, cell(row, 'webinar_id'), domain] if has_webinars else [bmid, domain])
+            if not domain:
+                unassigned += 1
+                continue
+
+            account = accounts.get(domain)
+            if account is None:
+                account = accounts[domain] = Account()
+            account.registrants += 1
+            if has_webinars:
+                account.webinars.add(cell(row, 'webinar_id'))
+            if not account.company_name:
+                account.company_name = cell(row, 'crm_company_name')
+            engagement = to_float(cell(row, 'engagement_score')) or 0.0
+            account.engagement += engagement
+
+            if cell(row, 'attendance_status') == 'attended':
+                account.attendees += 1
+                title = cell(row, 'Title')
+                rank, label = seniority(title)
+                key = (rank, engagement)
+                if account.top is None or key > account.top[0]:
+                    name = f"{cell(row, 'Firstname')} {cell(row, 'Lastname')}".strip()
+                    account.top = (key, bmid, name, title, label)
+
+            contact = tuple(cell(row, name) for name in CRM_CONTACT_COLUMNS)
+            if cell(row, 'crm_match') and any(contact):
+                account.crm_mrr[contact] = to_float(cell(row, 'crm_mrr_eur')) or 0.0
+                tier = cell(row, 'crm_account_tier')
+                if TIER_RANKS.get(tier.lower(), 0) > TIER_RANKS.get(account.tier.lower(), 0):
+                    account.tier = tier
+
+    ranked = sorted(accounts.items(), key=lambda item: (-item[1].engagement, -item[1].registrants, item[0]))
+    with open(os.path.join(output_dir, 'accounts.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(ACCOUNT_FIELDS)
+        writer.writerows(account.row(domain) for domain, account in ranked)
+
+    multi = sum(account.registrants > 1 for account in accounts.values())
+    attended = sum(account.attendees > 0 for account in accounts.values())
+    print(f"  ✅ {len(accounts)} accounts ({multi} with several registrants, {attended} with attendees), "
+          f"{unassigned} leads without a domain")
+    for domain, account in ranked[:3]:
+        print(f"     {domain}: {account.registrants} registrants, {account.attendees} attended, "
+              f"engagement {round(account.engagement, 1)}")
+    print(f"     Accounts: {os.path.join(output_dir, 'accounts.csv')}")
+    return {'accounts': len(accounts), 'unassigned': unassigned}
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print('Usage: python3 account_rollup.py "processed_TIMESTAMP/"')
+        sys.exit(1)
+    sys.exit(0 if rollup_accounts(sys.argv[1]) is not None else 1)
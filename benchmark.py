@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Synthetic Data Benchmark
+========================
+
+Scales the raw_data/ export into structurally faithful synthetic datasets and
+times create_clay_import on them, so scaling regressions show up before a big
+webinar does.
+
+Usage:
+    # 10x dataset in the raw_data/ CSV layout
+    python3 benchmark.py generate --scale 10 --out synthetic_x10
+
+    # Time create_clay_import at several sizes and compare with the baseline
+    python3 benchmark.py run --scales 10 100 --save-baseline
+    python3 benchmark.py run --scales 10 100            # exit 1 on regression
+
+Generated files copy each tab's metadata rows and header, resample row
+values from the real export, and keep its quirks at the observed rates:
+unterminated quotes that swallow the next line (overflow fields), embedded
+newlines, repeat registrations of the same person, duplicate BMID rows,
+malformed LinkedIn URLs, multiple poll answers per person and www/non-www
+LinkedIn URL variants in the CRM.
+
+Each scale is measured in a fresh subprocess (clean peak RSS) with the stage
+cache off and the CRM index rebuilt. A run fails when throughput drops or
+peak RSS grows by more than --tolerance against benchmark_baseline.json.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+
+from process_webinar_data import HEADER_MARKERS, create_clay_import, table_rows
+from profiling import RunProfiler
+from schema import CHECKS
+from stage_cache import StageCache
+
+# The real export the synthetic data is modelled on
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'raw_data')
+BENCHMARK_DIR = '.benchmark'
+BASELINE_FILE = 'benchmark_baseline.json'
+DEFAULT_TOLERANCE = 0.25
+# LinkedIn URLs without a profile slug, as they appear in the real export
+MALFORMED_LINKEDIN_URLS = ['https://linkedin.com/', 'https://linkedin.com/in/', 'https://www.linkedin.com/', 'https://www.linkedin.com/in/']
+
+REGISTRANT_TABS = ['registered list', 'attend list', 'did not attend list']
+ACTIVITY_TABS = ['poll responses', 'emoji eeaction', 'Q&A transcript']
+ENGAGEMENT_COLUMNS = ['Recording Duration', 'Duration', 'Engaged', 'Chats', 'Q&A', 'Polls']
+SURVEY_COLUMN = 'Are you tracking your AI search performance?'
+DUPLICATE_BMID_RATE = 0.005
+CRM_WWW_RATE = 0.1
+
+class Template:
+    """Metadata rows, header and well-formed rows of one exported tab"""
+
+    def __init__(self, source, tab):
+        self.metadata, self.header, self.rows = [], [], []
+        self.broken = 0
+        rows = iter(table_rows(source, tab))
+        for row in rows:
+            if any(cell.strip() in HEADER_MARKERS for cell in row):
+                self.header = list(row)
+                break
+            self.metadata.append(list(row))
+        for row in rows:
+            if not any(row):
+                continue
+            if len(row) > len(self.header):
+                self.broken += 1
+                continue
+            self.rows.append([*row, *[''] * (len(self.header) - len(row))])
+        self.positions = {name.strip(): i for i, name in enumerate(self.header)}
+
+    def pick(self, rng):
+        return list(rng.choice(self.rows))
+
+    def values(self, column):
+        return [row[self.positions[column]] for row in self.rows if row[self.positions[column]]]
+
+    def set(self, row, **values):
+        for column, value in values.items():
+            column = column.replace('_', ' ') if column not in self.positions else column
+            if column in self.positions:
+                row[self.positions[column]] = value
+        return row
+
+    def open(self, out_dir, tab):
+        f = open(os.path.join(out_dir, f'{tab}.csv'), 'w', encoding='utf-8', newline='')
+        writer = ExportWriter(f)
+        writer.writerows(self.metadata)
+        writer.writerow(self.header)
+        return f, writer
+
+def slug(value):
+    return re.sub(r'[^a-z0-9]+', '-', value.lower()).strip('-') or 'x'
+
+def export_field(value):
+    """Quote like the webinar platform does: any field with a space or CSV special character"""
+    if any(c in value for c in ' ,"\n\r'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+def export_line(fields):
+    return ','.join(export_field(value) for value in fields)
+
+class ExportWriter:
+    """csv.writer look-alike that reproduces the export's quoting and LF line endings"""
+
+    def __init__(self, f):
+        self.f = f
+
+    def writerow(self, row):
+        self.f.write(export_line(row) + '\n')
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+def generate_dataset(out_dir, scale, seed=0, source=TEMPLATE_DIR):
+    """Write a synthetic export `scale` times the size of `source` into out_dir; return row counts"""
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    t = {tab: Template(source, tab) for tab in REGISTRANT_TABS + ACTIVITY_TABS + ['CRM']}
+    reg, attend, dna, crm = t['registered list'], t['attend list'], t['did not attend list'], t['CRM']
+
+    # Observed rates of the real export
+    base = len(reg.rows)
+    urls = reg.values('LinkedIn Profile URL')
+    attend_rate = len(attend.rows) / base
+    dna_rate = len(dna.rows) / base / (1 - attend_rate)
+    broken_rate = reg.broken / (base + reg.broken)
+    malformed_rate = sum(bool(url) and not CHECKS['linkedin_url'](url) for url in urls) / base
+    repeat_rate = 1 - len(set(urls)) / max(len(urls), 1)
+    activity_rates = {}
+    for tab in ACTIVITY_TABS:
+        bmids = t[tab].values('BMID')
+        activity_rates[tab] = (len(set(bmids)) / len(attend.rows), len(bmids) / max(len(set(bmids)), 1))
+    newline_rate = sum('\n' in ''.join(row) for row in t['Q&A transcript'].rows) / max(len(t['Q&A transcript'].rows), 1) or 0.05
+    first_names, last_names = reg.values('Firstname'), reg.values('Lastname')
+    # Broken rows are excluded from the template, so fall back to the poll answers to the same questions
+    survey_answers = (reg.values(SURVEY_COLUMN) or t['poll responses'].values('Choice')) if SURVEY_COLUMN in reg.positions else []
+
+    files, writers = {}, {}
+    for tab, template in t.items():
+        files[tab], writers[tab] = template.open(out_dir, tab)
+    counts = dict.fromkeys(t, 0)
+    recent_identities = []
+    activity_numbers = dict.fromkeys(ACTIVITY_TABS, 0)
+
+    try:
+        for i in range(base * scale):
+            if recent_identities and rng.random() < repeat_rate:
+                first, last, url = rng.choice(recent_identities)
+                new_identity = False
+            else:
+                first, last = rng.choice(first_names), rng.choice(last_names)
+                url = f'https://linkedin.com/in/{slug(first)}-{slug(last)}-{i:x}'
+                if rng.random() < malformed_rate:
+                    url = rng.choice(MALFORMED_LINKEDIN_URLS)
+                new_identity = True
+                recent_identities.append((first, last, url))
+                if len(recent_identities) > 1000:
+                    recent_identities.pop(0)
+
+            bmid = f'{rng.getrandbits(48):012x}'
+            row = reg.set(reg.pick(rng), Firstname=first, Lastname=last, BMID=bmid, **{'#': str(i + 1), 'LinkedIn Profile URL': url})
+            attended = rng.random() < attend_rate
+            engagement_tab = attend if attended else dna
+            engagement = engagement_tab.pick(rng)
+            for column in ENGAGEMENT_COLUMNS:
+                if column in reg.positions and column in engagement_tab.positions:
+                    row[reg.positions[column]] = engagement[engagement_tab.positions[column]]
+
+            # Registrant tabs share the layout of the registered list
+            if survey_answers and rng.random() < broken_rate:
+                # Unterminated quote: the answer swallows the next line, like the real export
+                cut = reg.positions[SURVEY_COLUMN]
+                files['registered list'].write(export_line(row[:cut]) + f',"{rng.choice(survey_answers)} \n')
+            else:
+                writers['registered list'].writerow(row)
+            counts['registered list'] += 1
+            if rng.random() < DUPLICATE_BMID_RATE:
+                writers['registered list'].writerow(row)
+                counts['registered list'] += 1
+            if attended:
+                writers['attend list'].writerow(row)
+                counts['attend list'] += 1
+            elif rng.random() < dna_rate:
+                writers['did not attend list'].writerow(row)
+                counts['did not attend list'] += 1
+
+            if new_identity and url not in MALFORMED_LINKEDIN_URLS:
+                crm_url = url.replace('https://linkedin.com/', 'https://www.linkedin.com/') if rng.random() < CRM_WWW_RATE else url
+                writers['CRM'].writerow(crm.set(crm.pick(rng), linkedin_url=crm_url, first_name=first, last_name=last))
+                counts['CRM'] += 1
+
+            if not attended:
+                continue
+            for tab in ACTIVITY_TABS:
+                participation, per_person = activity_rates[tab]
+                if rng.random() >= participation:
+                    continue
+                template = t[tab]
+                for _ in range(1 + int(rng.random() < per_person - 1)):
+                    activity_numbers[tab] += 1
+                    activity = template.set(template.pick(rng), BMID=bmid, First_Name=first, Last_Name=last,
+                                            **{'#': str(activity_numbers[tab])})
+                    if tab == 'Q&A transcript' and rng.random() < newline_rate and 'Question' in template.positions:
+                        position = template.positions['Question']
+                        activity[position] = activity[position].replace(' ', '\n', 1)
+                    writers[tab].writerow(activity)
+                    counts[tab] += 1
+
+        # Fill the CRM up to its scaled size with accounts that never registered
+        for j in range(len(crm.rows) * scale - counts['CRM']):
+            first, last = rng.choice(first_names), rng.choice(last_names)
+            writers['CRM'].writerow(crm.set(crm.pick(rng), first_name=first, last_name=last,
+                                            linkedin_url=f'https://linkedin.com/in/crm-{slug(last)}-{j:x}'))
+            counts['CRM'] += 1
+    finally:
+        for f in files.values():
+            f.close()
+
+    return counts
+
+def measure(data_dir):
+    """Time one cold create_clay_import run on data_dir and return its metrics"""
+    crm_index = os.path.join(data_dir, 'CRM.csv.idx')
+    if os.path.exists(crm_index):
+        os.remove(crm_index)
+    output_dir = os.path.join(data_dir, 'output')
+    os.makedirs(output_dir, exist_ok=True)
+
+    profiler = RunProfiler()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        success = create_clay_import(output_dir, source=data_dir, cache=StageCache(enabled=False), profiler=profiler)
+    wall = time.perf_counter() - started
+
+    report = profiler.report()
+    join = next((s for s in report['stages'] if s['name'] == 'join'), {})
+    rows = join.get('rows_out') or 0
+    return {
+        'success': success,
+        'rows': rows,
+        'wall_seconds': round(wall, 4),
+        'rows_per_second': round(rows / wall, 1) if wall else None,
+        'peak_rss_bytes': report['peak_rss_bytes'],
+        'stages': {s['name']: s['wall_seconds'] for s in report['stages']},
+    }
+
+def run_benchmark(scales, workdir=BENCHMARK_DIR, baseline_file=BASELINE_FILE, tolerance=DEFAULT_TOLERANCE,
+                  save_baseline=False, seed=0):
+    """Generate (once) and measure every scale; return True when nothing regressed"""
+    results = {}
+    for scale in scales:
+        data_dir = os.path.join(workdir, f'x{scale}')
+        if not os.path.exists(os.path.join(data_dir, 'CRM.csv')):
+            print(f"🧪 Generating {scale}x dataset in {data_dir}...")
+            counts = generate_dataset(data_dir, scale, seed=seed)
+            print(f"   {counts['registered list']} registrants, {counts['CRM']} CRM rows")
+
+        print(f"⏱️  Measuring {scale}x...")
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), 'measure', data_dir],
+                                   capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"❌ {scale}x failed:\n{completed.stderr}")
+            return False
+        result = json.loads(completed.stdout)
+        if not result['success']:
+            print(f"❌ {scale}x: create_clay_import failed")
+            return False
+        results[str(scale)] = result
+        stages = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in result['stages'].items())
+        print(f"   {result['rows']} rows in {result['wall_seconds']:.2f}s "
+              f"({result['rows_per_second']:.0f} rows/s, peak RSS {result['peak_rss_bytes'] / 2**20:.0f} MiB)")
+        print(f"   {stages}")
+
+    results_file = os.path.join(workdir, f"results_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(results_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"📈 Results: {results_file}")
+
+    if save_baseline:
+        with open(baseline_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Saved baseline: {baseline_file}")
+        return True
+
+    if not os.path.exists(baseline_file):
+        print(f"⚠️  No baseline at {baseline_file}; run with --save-baseline to create one")
+        return True
+
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = []
+    for scale, result in results.items():
+        if scale not in baseline:
+            continue
+        before = baseline[scale]
+        if result['rows_per_second'] < before['rows_per_second'] * (1 - tolerance):
+            regressions.append(f"{scale}x throughput {result['rows_per_second']:.0f} rows/s "
+                               f"(baseline {before['rows_per_second']:.0f})")
+        if before['peak_rss_bytes'] and result['peak_rss_bytes'] > before['peak_rss_bytes'] * (1 + tolerance):
+            regressions.append(f"{scale}x peak RSS {result['peak_rss_bytes'] / 2**20:.0f} MiB "
+                               f"(baseline {before['peak_rss_bytes'] / 2**20:.0f} MiB)")
+
+    if regressions:
+        print("❌ Performance regressions:")
+        for regression in regressions:
+            print(f"   {regression}")
+        return False
+    print(f"✅ No regressions beyond {tolerance:.0%} of baseline")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic webinar data generator and pipeline benchmark")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help="Write a scaled synthetic export")
+    generate.add_argument('--scale', type=int, default=10)
+    generate.add_argument('--out', required=True)
+    generate.add_argument('--seed', type=int, default=0)
+
+    run = commands.add_parser('run', help="Benchmark create_clay_import across scales")
+    run.add_argument('--scales', type=int, nargs='+', default=[10, 100])
+    run.add_argument('--workdir', default=BENCHMARK_DIR)
+    run.add_argument('--baseline', default=BASELINE_FILE)
+    run.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    run.add_argument('--save-baseline', action='store_true')
+    run.add_argument('--seed', type=int, default=0)
+
+    measure_cmd = commands.add_parser('measure', help=argparse.SUPPRESS)
+    measure_cmd.add_argument('data_dir')
+
+    args = parser.parse_args()
+    if args.command == 'generate':
+        counts = generate_dataset(args.out, args.scale, seed=args.seed)
+        for tab, count in counts.items():
+            print(f"  {tab}: {count} rows")
+    elif args.command == 'run':
+        ok = run_benchmark(args.scales, workdir=args.workdir, baseline_file=args.baseline,
+                           tolerance=args.tolerance, save_baseline=args.save_baseline, seed=args.seed)
+        sys.exit(0 if ok else 1)
+    else:
+        print(json.dumps(measure(args.data_dir)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Change Data Capture Between Runs
+================================
+
+Diffs a webinar's Clay import against the previous run by per-row content
+fingerprints keyed by BMID, so only inserted and updated leads are
+re-imported into Clay (and re-enriched) instead of the whole file.
+
+Usage:
+    python3 process_webinar_data.py export.xlsx      # diffs against the webinar's last run
+    python3 change_capture.py processed_NEW/ --previous processed_OLD/
+    python3 change_capture.py processed_NEW/ --previous raw_data/webinar_clay_import_backup.csv
+
+    from change_capture import capture_changes, read_manifest
+    stats = capture_changes('processed_NEW', read_manifest('processed_OLD/fingerprints.csv'))
+
+Every run writes fingerprints.csv (BMID, fingerprint) next to the import:
+a 128-bit BLAKE2b of the row's cells, keyed with a hash of the header, so a
+changed column set marks every row as updated. Columns computed across rows
+(CROSS_ROW_COLUMNS: score percentiles, the Q&A topic, lead history, and
+CROSS_ROW_PATTERN: poll latencies) are left out, so a
+lead whose own data is unchanged stays unchanged when other leads or other
+webinars move them. Comparing two manifests is a dict lookup per lead; only
+the changed rows are written:
+
+    changes/inserted.csv   new leads (full rows)
+    changes/updated.csv    leads whose row changed (full rows)
+    changes/deleted.csv    BMIDs no longer in the import
+
+The pipeline keeps the latest manifest per webinar id in .run_manifests/
+and advances it once the run succeeds; with --webhook only inserted and
+updated rows are uploaded and the manifest only advances when every one of
+them was acknowledged, so a failed upload is retried on the next run. The
+first run of a webinar reports every lead as inserted.
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import re
+import shutil
+import sys
+
+MANIFEST_FILE = 'fingerprints.csv'
+MANIFEST_DIR = '.run_manifests'
+CHANGES_DIR = 'changes'
+MANIFEST_FIELDS = ['BMID', 'fingerprint']
+# Derived from the other rows of the webinar (percentiles, topics clustered over every lead's questions)
+# or from other webinars (lead history)
+CROSS_ROW_COLUMNS = frozenset({
+    'engagement_percentile', 'intent_percentile', 'qa_top_topic',
+    'webinars_registered', 'webinars_attended', 'total_qa', 'last_seen',
+})
+# Poll latency is measured from the question's first answer by anyone, so an earlier answerer moves it
+CROSS_ROW_PATTERN = re.compile(r'poll_\w+_latency_s')
+
+def row_keys(header, rows):
+    """Yield (key, row): the BMID, with #2, #3... for repeats and row-N when blank"""
+    bmid_pos = header.index('BMID') if 'BMID' in header else None
+    seen = {}
+    for n, row in enumerate(rows, 1):
+        key = row[bmid_pos].strip() if bmid_pos is not None and bmid_pos < len(row) else ''
+        key = key or f'row-{n}'
+        count = seen[key] = seen.get(key, 0) + 1
+        yield (key if count == 1 else f'{key}#{count}'), row
+
+def fingerprinter(header, exclude=CROSS_ROW_COLUMNS, exclude_pattern=CROSS_ROW_PATTERN):
+    """fingerprint(row) -> hex digest over the columns not in `exclude` nor matching `exclude_pattern`
+
+    The kept header is folded into the key so a schema change changes every row.
+    """
+    keep = [i for i, name in enumerate(header)
+            if name not in exclude and not (exclude_pattern and exclude_pattern.fullmatch(name))]
+    header_key = hashlib.blake2b('\x1f'.join(header[i] for i in keep).encode('utf-8'), digest_size=32).digest()
+    blake2b = hashlib.blake2b
+    if len(keep) == len(header):
+        return lambda row: blake2b('\x1f'.join(row).encode('utf-8'), digest_size=16, key=header_key).hexdigest()
+    return lambda row: blake2b('\x1f'.join(row[i] if i < len(row) else '' for i in keep).encode('utf-8'),
+                               digest_size=16, key=header_key).hexdigest()
+
+def fingerprint_file(clay_file, exclude=CROSS_ROW_COLUMNS):
+    """{key: fingerprint} of every row of a Clay import CSV"""
+    with open(clay_file, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        fingerprint = fingerprinter(header, exclude)
+        return {key: fingerprint(row) for key, row in row_keys(header, reader)}
+
+def read_manifest(path, exclude=CROSS_ROW_COLUMNS):
+    """{key: fingerprint} from a fingerprints.csv, an output directory, or a Clay import CSV; None when missing"""
+    if os.path.isdir(path):
+        manifest = os.path.join(path, MANIFEST_FILE)
+        path = manifest if os.path.exists(manifest) else os.path.join(path, 'webinar_clay_import.csv')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        header = next(csv.reader(f), [])
+    if header != MANIFEST_FIELDS:
+        return fingerprint_file(path, exclude)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        next(reader)
+        return {key: fingerprint for key, fingerprint in reader}
+
+def write_manifest(path, fingerprints):
+    temp_path = path + f'.{os.getpid()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(MANIFEST_FIELDS)
+        writer.writerows(fingerprints.items())
+    os.replace(temp_path, path)
+
+def capture_changes(output_dir, previous=None, exclude=CROSS_ROW_COLUMNS):
+    """Fingerprint <output_dir>/webinar_clay_import.csv and write changes/ against `previous` ({key: fingerprint})
+
+    Returns counts plus 'changed', the set of inserted and updated BMIDs.
+    With no previous manifest every row is inserted. Columns in `exclude`
+    are not fingerprinted but are still written to the changed rows.
+    """
+    clay_file = os.path.join(output_dir, 'webinar_clay_import.csv')
+    previous = previous or {}
+    changes_dir = os.path.join(output_dir, CHANGES_DIR)
+    os.makedirs(changes_dir, exist_ok=True)
+
+    fingerprints = {}
+    stats = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+    changed = set()
+    with open(clay_file, 'r', encoding='utf-8', newline='') as f_in, \
+            open(os.path.join(changes_dir, 'inserted.csv'), 'w', encoding='utf-8', newline='') as f_inserted, \
+            open(os.path.join(changes_dir, 'updated.csv'), 'w', encoding='utf-8', newline='') as f_updated:
+        reader = csv.reader(f_in)
+        header = next(reader, [])
+        writers = {'inserted': csv.writer(f_inserted, quoting=csv.QUOTE_MINIMAL),
+                   'updated': csv.writer(f_updated, quoting=csv.QUOTE_MINIMAL)}
+        for writer in writers.values():
+            writer.writerow(header)
+        fingerprint = fingerprinter(header, exclude)
+        bmid_pos = header.index('BMID') if 'BMID' in header else None
+
+        for key, row in row_keys(header, reader):
+            fingerprints[key] = digest = fingerprint(row)
+            old = previous.get(key)
+            if old == digest:
+                stats['unchanged'] += 1
+                continue
+            kind = 'inserted' if old is None else 'updated'
+            writers[kind].writerow(row)
+            stats[kind] += 1
+            if bmid_pos is not None:
+                changed.add(row[bmid_pos])
+
+    deleted = [key for key in previous if key not in fingerprints]
+    with open(os.path.join(changes_dir, 'deleted.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['BMID'])
+        writer.writerows([key] for key in deleted)
+    stats['deleted'] = len(deleted)
+
+    write_manifest(os.path.join(output_dir, MANIFEST_FILE), fingerprints)
+    stats['changed'] = changed
+    return stats
+
+def changed_bmids(output_dir):
+    """BMIDs in an output's changes/inserted.csv and changes/updated.csv"""
+    bmids = set()
+    for name in ('inserted.csv', 'updated.csv'):
+        with open(os.path.join(output_dir, CHANGES_DIR, name), 'r', encoding='utf-8', newline='') as f:
+            bmids.update(row.get('BMID', '') for row in csv.DictReader(f))
+    return bmids
+
+def manifest_path(webinar_id, manifest_dir=MANIFEST_DIR):
+    """State file holding a webinar's last published manifest"""
+    return os.path.join(manifest_dir, re.sub(r'[^\w.-]', '_', webinar_id) + '.csv')
+
+def capture_run_changes(output_dir, webinar_id, manifest_dir=MANIFEST_DIR):
+    """Diff a run against the webinar's last manifest in manifest_dir; return the stats (see capture_changes)"""
+    previous = read_manifest(manifest_path(webinar_id, manifest_dir))
+    print(f"\n🔁 Diffing against the previous run of {webinar_id}...")
+    stats = capture_changes(output_dir, previous)
+    if previous is None:
+        print(f"     First run: {stats['inserted']} leads inserted")
+    else:
+        print(f"     {stats['inserted']} inserted, {stats['updated']} updated, {stats['deleted']} deleted, "
+              f"{stats['unchanged']} unchanged")
+    print(f"     Changes: {os.path.join(output_dir, CHANGES_DIR)}/")
+    return stats
+
+def advance_manifest(output_dir, webinar_id, manifest_dir=MANIFEST_DIR):
+    """Make this run's fingerprints the baseline for the webinar's next run"""
+    os.makedirs(manifest_dir, exist_ok=True)
+    target = manifest_path(webinar_id, manifest_dir)
+    temp_path = target + f'.{os.getpid()}.tmp'
+    shutil.copyfile(os.path.join(output_dir, MANIFEST_FILE), temp_path)
+    os.replace(temp_path, target)
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff a processed Clay import against a previous run")
+    parser.add_argument('output_dir', help="processed_TIMESTAMP/ directory to diff")
+    parser.add_argument('--previous', required=True,
+                        help="Earlier output directory, its fingerprints.csv, or a Clay import CSV")
+    args = parser.parse_args()
+
+    previous = read_manifest(args.previous)
+    if previous is None:
+        print(f"❌ Nothing to diff against at {args.previous}")
+        sys.exit(1)
+    stats = capture_changes(args.output_dir, previous)
+    print(f"🔁 {stats['inserted']} inserted, {stats['updated']} updated, {stats['deleted']} deleted, "
+          f"{stats['unchanged']} unchanged")
+    print(f"   Changes: {os.path.join(args.output_dir, CHANGES_DIR)}/")
+
+if __name__ == "__main__":
+    main()
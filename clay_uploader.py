@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Clay Webhook Uploader
+=====================
+
+Streams the final Clay import into an HTTP webhook in JSON batches instead of
+one request per row, with a concurrency limit, keep-alive connections,
+rate-limit-aware retries and a resumable checkpoint.
+
+Usage:
+    python3 clay_uploader.py processed_TIMESTAMP/ --url https://api.clay.com/v3/sources/webhook/...
+    python3 clay_uploader.py processed_TIMESTAMP/ --url URL --batch-size 200 --concurrency 8
+    python3 clay_uploader.py processed_TIMESTAMP/ --url URL --changes-only   # rows in changes/ only
+    CLAY_WEBHOOK_AUTH=secret python3 clay_uploader.py processed_TIMESTAMP/ --url URL
+
+    # Local stub webhook that answers 429 to 20% of requests, for trying it out
+    python3 clay_uploader.py stub --port 8765 --fail-rate 0.2
+    python3 clay_uploader.py processed_TIMESTAMP/ --url http://127.0.0.1:8765/
+
+    from clay_uploader import upload_clay_import
+    upload_clay_import('processed_TIMESTAMP', 'https://...', batch_size=100, concurrency=4)
+
+Each request body is a JSON array of row objects (column -> value). Rows are
+read lazily from webinar_clay_import.csv (in a thread, off the event loop)
+into a bounded queue, so a slow webhook applies backpressure to the reader
+instead of buffering the file. A worker that fails outright (bad URL,
+checkpoint write error) cancels the upload and its exception is re-raised.
+
+Retries: 429 and 5xx responses and connection errors are retried with
+exponential backoff and full jitter; a Retry-After header pauses every worker,
+not just the one that was throttled. Other 4xx responses fail the batch.
+
+BMIDs of acknowledged batches are appended to .upload_checkpoint in the output
+directory, so a re-run after a crash or failure only sends the remaining rows.
+Rows in the do_not_contact segment are never sent.
+"""
+
+import argparse
+import asyncio
+import csv
+import http.client
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+CHECKPOINT_FILE = '.upload_checkpoint'
+SKIP_SEGMENTS = ('do_not_contact',)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+
+def load_checkpoint(path):
+    """BMIDs already acknowledged by the webhook"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip()}
+
+def read_clay_rows(clay_file, sent=(), skip_segments=SKIP_SEGMENTS, only=None):
+    """Yield the Clay import rows as dicts, minus already-sent BMIDs and skipped segments (only `only` BMIDs if given)"""
+    with open(clay_file, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            if row.get('BMID') in sent or row.get('segment') in skip_segments:
+                continue
+            if only is not None and row.get('BMID') not in only:
+                continue
+            yield row
+
+def backoff_delay(attempt, retry_after=None):
+    """Seconds to wait before retry `attempt` (1-based): Retry-After if given, else capped full jitter"""
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+def parse_retry_after(value):
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None  # HTTP-date form; fall back to jittered backoff
+
+class WebhookConnection:
+    """One keep-alive HTTP(S) connection to the webhook (blocking, used from a worker thread)"""
+
+    def __init__(self, url, headers=None, timeout=30):
+        parts = urlsplit(url)
+        self.path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+        self.headers = {'Content-Type': 'application/json', **(headers or {})}
+
+    def post(self, body):
+        """POST body; return (status, Retry-After seconds or None)"""
+        try:
+            self.connection.request('POST', self.path, body=body, headers=self.headers)
+            response = self.connection.getresponse()
+            response.read()  # drain so the connection can be reused
+        except (OSError, http.client.HTTPException):
+            self.connection.close()  # reconnects on the next request
+            raise
+        if response.getheader('Connection', '').lower() == 'close':
+            self.connection.close()
+        return response.status, parse_retry_after(response.getheader('Retry-After'))
+
+    def close(self):
+        self.connection.close()
+
+class WebhookUploader:
+    """Async batched uploader: `concurrency` workers, each with its own keep-alive connection"""
+
+    def __init__(self, url, batch_size=100, concurrency=4, max_retries=6, headers=None, checkpoint_path=None):
+        self.url = url
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.headers = headers or {}
+        self.checkpoint_path = checkpoint_path
+        self.resume_at = 0.0  # monotonic time before which no worker sends (shared Retry-After)
+        self.stats = {'sent': 0, 'failed': 0, 'batches': 0, 'requests': 0, 'retries': 0}
+
+    async def run(self, rows):
+        """Upload every row; a worker that dies (bad URL, checkpoint write error) cancels the rest and re-raises"""
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        checkpoint = open(self.checkpoint_path, 'a', encoding='utf-8') if self.checkpoint_path else None
+        rows = iter(rows)
+        next_batch = lambda: list(itertools.islice(rows, self.batch_size))
+        workers = []
+        try:
+            workers = [asyncio.create_task(self.worker(queue, checkpoint)) for _ in range(self.concurrency)]
+            # The CSV is read off the event loop so workers keep sending while the next batch is parsed
+            while batch := await asyncio.to_thread(next_batch):
+                await self.put(queue, batch, workers)  # blocks while all workers are busy
+            for _ in workers:
+                await self.put(queue, None, workers)
+            await asyncio.gather(*workers)
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        finally:
+            if checkpoint:
+                checkpoint.close()
+        return self.stats
+
+    @staticmethod
+    async def put(queue, item, workers):
+        """queue.put() that raises a worker's exception instead of waiting forever on a dead consumer"""
+        putter = asyncio.create_task(queue.put(item))
+        while True:
+            for task in workers:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    putter.cancel()
+                    raise task.exception()
+            alive = [task for task in workers if not task.done()]
+            if not alive and queue.full():
+                putter.cancel()
+                raise RuntimeError("upload workers exited before the queue was drained")
+            done, _ = await asyncio.wait([putter, *alive], return_when=asyncio.FIRST_COMPLETED)
+            if putter in done:
+                return
+
+    async def worker(self, queue, checkpoint):
+        connection = None
+        try:
+            connection = WebhookConnection(self.url, self.headers)
+            while (batch := await queue.get()) is not None:
+                self.stats['batches'] += 1
+                if await self.send(connection, batch):
+                    self.stats['sent'] += len(batch)
+                    if checkpoint:
+                        checkpoint.write(''.join(f"{row.get('BMID', '')}\n" for row in batch))
+                        checkpoint.flush()
+                else:
+                    self.stats['failed'] += len(batch)
+        finally:
+            if connection is not None:
+                connection.close()
+
+    async def send(self, connection, batch):
+        """POST one batch, retrying throttling and transient errors; return True once acknowledged"""
+        body = json.dumps(batch, ensure_ascii=False).encode('utf-8')
+        for attempt in range(self.max_retries + 1):
+            wait = self.resume_at - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            self.stats['requests'] += 1
+            try:
+                status, retry_after = await asyncio.to_thread(connection.post, body)
+            except (OSError, http.client.HTTPException) as e:
+                retry_after = None
+                error = repr(e)
+            else:
+                if 200 <= status < 300:
+                    return True
+                error = f"HTTP {status}"
+                if status not in RETRY_STATUSES:
+                    break
+
+            if attempt == self.max_retries:
+                break
+            self.stats['retries'] += 1
+            delay = backoff_delay(attempt + 1, retry_after)
+            if retry_after is not None:
+                self.resume_at = max(self.resume_at, time.monotonic() + delay)
+            await asyncio.sleep(delay)
+
+        print(f"     ⚠️  Batch of {len(batch)} rows failed: {error}")
+        return False
+
+def upload_clay_import(output_dir, url, batch_size=100, concurrency=4, max_retries=6, headers=None,
+                       skip_segments=SKIP_SEGMENTS, only=None):
+    """Push <output_dir>/webinar_clay_import.csv to the webhook; return the upload stats
+
+    Resumes from <output_dir>/.upload_checkpoint. An x-clay-webhook-auth
+    header is added from $CLAY_WEBHOOK_AUTH when set. With `only` (a set of
+    BMIDs, e.g. the changed rows from change_capture.py) nothing else is sent.
+    """
+    clay_file = os.path.join(output_dir, 'webinar_clay_import.csv')
+    checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILE)
+    headers = dict(headers or {})
+    if os.environ.get('CLAY_WEBHOOK_AUTH'):
+        headers.setdefault('x-clay-webhook-auth', os.environ['CLAY_WEBHOOK_AUTH'])
+
+    sent = load_checkpoint(checkpoint_path)
+    print(f"\n📤 Uploading Clay import to webhook ({batch_size} rows/request, {concurrency} connections)...")
+    if sent:
+        print(f"     Resuming: {len(sent)} rows already sent")
+    if only is not None:
+        print(f"     Only changed rows: {len(only)}")
+
+    uploader = WebhookUploader(url, batch_size=batch_size, concurrency=concurrency, max_retries=max_retries,
+                               headers=headers, checkpoint_path=checkpoint_path)
+    started = time.perf_counter()
+    stats = asyncio.run(uploader.run(read_clay_rows(clay_file, sent, skip_segments, only)))
+    stats['skipped'] = len(sent)
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+
+    print(f"  {'✅' if not stats['failed'] else '⚠️ '} Sent {stats['sent']} rows in {stats['requests']} requests "
+          f"({stats['retries']} retries, {stats['failed']} rows failed) in {stats['seconds']}s")
+    return stats
+
+def serve_stub(port=8765, fail_rate=0.0, retry_after=1):
+    """Local webhook stub: counts received rows, answers 429 to `fail_rate` of requests"""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    received = {'rows': 0, 'requests': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            throttled = random.random() < fail_rate
+            with lock:
+                received['requests'] += 1
+                received['rows'] += 0 if throttled else len(json.loads(body))
+                print(f"     stub: {received['requests']} requests, {received['rows']} rows received", flush=True)
+            self.send_response(429 if throttled else 200)
+            if throttled:
+                self.send_header('Retry-After', str(retry_after))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    print(f"🧪 Stub webhook on http://127.0.0.1:{port}/ (429 rate {fail_rate})")
+    with ThreadingHTTPServer(('127.0.0.1', port), Handler) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'stub':
+        parser = argparse.ArgumentParser(description="Local stub webhook for testing uploads")
+        parser.add_argument('command')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--fail-rate', type=float, default=0.0)
+        parser.add_argument('--retry-after', type=float, default=1)
+        args = parser.parse_args()
+        serve_stub(args.port, args.fail_rate, args.retry_after)
+        return
+
+    parser = argparse.ArgumentParser(description="Upload a processed Clay import to a webhook in batches")
+    parser.add_argument('output_dir', help="processed_TIMESTAMP/ directory")
+    parser.add_argument('--url', required=True, help="Webhook URL")
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--max-retries', type=int, default=6)
+    parser.add_argument('--changes-only', action='store_true',
+                        help="Only send the inserted/updated rows in changes/ (see change_capture.py)")
+    args = parser.parse_args()
+
+    only = None
+    if args.changes_only:
+        from change_capture import changed_bmids
+        only = changed_bmids(args.output_dir)
+    stats = upload_clay_import(args.output_dir, args.url, batch_size=args.batch_size, concurrency=args.concurrency,
+                               max_retries=args.max_retries, only=only)
+    sys.exit(1 if stats['failed'] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Columnar Output
+===============
+
+Typed, compressed column store for the Clay import so analytics and
+segmentation jobs can read only the columns they need without re-parsing the
+40-column CSV.
+
+Usage:
+    from columnar import ColumnarWriter, read_columns
+
+    schema = [('BMID', 'string'), ('poll_responses', 'int64'), ('crm_mrr_eur', 'float64')]
+    with ColumnarWriter('out/webinar_clay_import', schema) as writer:
+        writer.write_row(['94a2cd176bfe', 2, 4586.7])
+    print(writer.path)  # out/webinar_clay_import.parquet (pyarrow) or .colz (fallback)
+
+    columns = read_columns(writer.path, ['poll_responses'])  # {'poll_responses': [2]}
+
+With pyarrow installed the file is Parquet (zstd). Without it, a pure-Python
+.colz file is written instead:
+
+    b'COLZ1\\n'
+    row groups   one zlib block per column: validity bytes + packed values
+                 (int64/float64 as little-endian arrays, strings dictionary-encoded)
+    footer       JSON schema + (offset, length) of every block
+    trailer      footer length (8 bytes LE) + b'COLZ'
+
+Nulls (empty CSV cells) are tracked per value, so typed columns stay typed.
+
+In memory, buffered row groups and read_columns() results are compact
+columns rather than lists of Python objects: numeric columns are typed
+arrays plus a validity bytearray, string columns are dictionary-encoded
+(categoricals such as customer_status or segment store each value once)
+and switch to one UTF-8 buffer with end offsets when mostly unique.
+"""
+
+import itertools
+import json
+import operator
+import struct
+import sys
+import zlib
+from array import array
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pure-Python fallback below
+    pa = None
+
+COLZ_MAGIC = b'COLZ1\n'
+COLZ_TRAILER = b'COLZ'
+ROW_GROUP_SIZE = 65536
+PENDING_ROWS = 512  # rows buffered as lists before being transposed into the columns
+ARRAY_CODES = {'int64': 'q', 'float64': 'd'}
+DICTIONARY_MIN_VALUES = 1024  # below this many distinct values a string column always stays dictionary-encoded
+
+def to_int(value):
+    """Parse a CSV cell into an int, or None when empty/unparseable"""
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return None
+
+def to_float(value):
+    """Parse a CSV cell into a float, or None when empty/unparseable"""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+CONVERTERS = {'int64': to_int, 'float64': to_float, 'string': lambda v: '' if v is None else str(v)}
+# Whole-column versions of CONVERTERS, used when pending rows are transposed
+COLUMN_CONVERTERS = {
+    'int64': lambda values: map(to_int, values),
+    'float64': lambda values: map(to_float, values),
+    'string': lambda values: ['' if v is None else v if v.__class__ is str else str(v) for v in values],
+}
+
+def _le_bytes(values):
+    """Serialize an array in little-endian order regardless of platform"""
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _from_le_bytes(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+class NumericColumn:
+    """int64/float64 column as a typed array plus one validity byte per row (None = null)"""
+
+    __slots__ = ('values', 'validity')
+
+    def __init__(self, kind, values=()):
+        self.values = array(ARRAY_CODES[kind])
+        self.validity = bytearray()
+        self.extend(values)
+
+    def append(self, value):
+        self.values.append(0 if value is None else value)
+        self.validity.append(value is not None)
+
+    def extend(self, values):
+        values = list(values)
+        self.validity.extend(map(operator.is_not, values, itertools.repeat(None)))
+        self.values.extend([0 if v is None else v for v in values])
+
+    def __len__(self):
+        return len(self.validity)
+
+    def __getitem__(self, i):
+        return self.values[i] if self.validity[i] else None
+
+    def __iter__(self):
+        return (v if ok else None for v, ok in zip(self.values, self.validity))
+
+class StringColumn:
+    """String column without a Python object per cell
+
+    Dictionary-encoded while values repeat (a 4-byte code per row); once more
+    than half the rows are distinct it becomes one UTF-8 buffer plus end
+    offsets, which is smaller for names, emails and URLs.
+    """
+
+    __slots__ = ('codes', 'index', 'values', 'data', 'ends')
+
+    def __init__(self, values=()):
+        self.codes = array('I')
+        self.index = {}
+        self.values = []
+        self.data = None
+        self.ends = None
+        self.extend(values)
+
+    @property
+    def dictionary_encoded(self):
+        return self.data is None
+
+    def append(self, value):
+        if self.data is not None:
+            self.data += value.encode('utf-8')
+            self.ends.append(len(self.data))
+            return
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+            if code >= DICTIONARY_MIN_VALUES and code * 2 > len(self.codes):
+                self.codes.append(code)
+                self._unpack_dictionary()
+                return
+        self.codes.append(code)
+
+    def extend(self, values):
+        values = list(values)
+        if self.data is None:
+            index = self.index
+            new = [value for value in dict.fromkeys(values) if value not in index]
+            index.update(zip(new, itertools.count(len(self.values))))
+            self.values.extend(new)
+            self.codes.extend(map(index.__getitem__, values))
+            if len(self.values) > DICTIONARY_MIN_VALUES and len(self.values) * 2 > len(self.codes):
+                self._unpack_dictionary()
+            return
+        encoded = [v.encode('utf-8') for v in values]
+        # Running end offsets, seeded with the current length (which is not itself an entry)
+        self.ends.extend(itertools.islice(itertools.accumulate(map(len, encoded), initial=len(self.data)), 1, None))
+        self.data += b''.join(encoded)
+
+    def extend_encoded(self, dictionary, codes):
+        """Append rows given as a dictionary and codes into it (a decoded .colz block)"""
+        if self.data is not None:
+            self.extend(dictionary[c] for c in codes)
+            return
+        remap = array('I', (self.index.setdefault(v, len(self.index)) for v in dictionary))
+        self.values.extend(dictionary[i] for i, code in enumerate(remap) if code >= len(self.values))
+        self.codes.extend(remap[c] for c in codes)
+
+    def _unpack_dictionary(self):
+        encoded = [v.encode('utf-8') for v in self.values]
+        self.data = bytearray()
+        self.ends = array('Q')
+        for code in self.codes:
+            self.data += encoded[code]
+            self.ends.append(len(self.data))
+        self.codes = self.index = self.values = None
+
+    def __len__(self):
+        return len(self.codes) if self.data is None else len(self.ends)
+
+    def __getitem__(self, i):
+        if self.data is None:
+            return self.values[self.codes[i]]
+        start = self.ends[i - 1] if i else 0
+        return self.data[start:self.ends[i]].decode('utf-8')
+
+    def __iter__(self):
+        if self.data is None:
+            return map(self.values.__getitem__, self.codes)
+        return (self.data[start:end].decode('utf-8') for start, end in zip(itertools.chain((0,), self.ends), self.ends))
+
+def new_column(kind):
+    return StringColumn() if kind == 'string' else NumericColumn(kind)
+
+def encode_column(kind, values):
+    """Encode one row-group column (a compact column or any sequence) into a compressed block"""
+    if kind == 'string':
+        if isinstance(values, StringColumn) and values.dictionary_encoded:
+            dictionary, codes = values.values, values.codes
+        else:
+            index = {}
+            codes = array('I', (index.setdefault(v, len(index)) for v in values))
+            dictionary = list(index)
+        header = json.dumps(dictionary, ensure_ascii=False).encode('utf-8')
+        payload = struct.pack('<I', len(header)) + header + _le_bytes(codes)
+    else:
+        if isinstance(values, NumericColumn):
+            validity, packed = bytes(values.validity), values.values
+        else:
+            validity = bytes(v is not None for v in values)
+            packed = array(ARRAY_CODES[kind], (0 if v is None else v for v in values))
+        payload = validity + _le_bytes(packed)
+    return zlib.compress(payload, 6)
+
+def decode_block(kind, block, rows):
+    """Decode a compressed block into (dictionary, codes) for strings or (validity, values) for numbers"""
+    payload = zlib.decompress(block)
+    if kind == 'string':
+        (header_len,) = struct.unpack_from('<I', payload, 0)
+        dictionary = json.loads(payload[4:4 + header_len].decode('utf-8'))
+        return dictionary, _from_le_bytes('I', payload[4 + header_len:])
+    return payload[:rows], _from_le_bytes(ARRAY_CODES[kind], payload[rows:])
+
+class ColumnarWriter:
+    """Buffer rows into row groups and write them column by column"""
+
+    def __init__(self, base_path, schema, row_group_size=ROW_GROUP_SIZE):
+        self.schema = list(schema)
+        self.converters = [COLUMN_CONVERTERS[kind] for _, kind in self.schema]
+        self.row_group_size = row_group_size
+        self.buffers = [new_column(kind) for _, kind in self.schema]
+        self.pending = []
+        self.rows = 0
+
+        if pa is not None:
+            self.path = base_path + '.parquet'
+            arrow_types = {'int64': pa.int64(), 'float64': pa.float64(), 'string': pa.string()}
+            self.arrow_schema = pa.schema([(name, arrow_types[kind]) for name, kind in self.schema])
+            self.parquet = pq.ParquetWriter(self.path, self.arrow_schema, compression='zstd')
+        else:
+            self.path = base_path + '.colz'
+            self.parquet = None
+            self.file = open(self.path, 'wb')
+            self.file.write(COLZ_MAGIC)
+            self.row_groups = []
+
+    def write_row(self, row):
+        self.pending.append(row)
+        self.rows += 1
+        if len(self.pending) >= PENDING_ROWS:
+            self._transpose()
+            if len(self.buffers[0]) >= self.row_group_size:
+                self.flush()
+
+    def _transpose(self):
+        """Move pending rows into the columns, one bulk extend per column (missing cells are null)"""
+        if not self.pending:
+            return
+        columns = itertools.zip_longest(*self.pending, fillvalue=None)
+        for buffer, convert, values in zip(self.buffers, self.converters, columns):
+            buffer.extend(convert(values))
+        self.pending = []
+
+    def flush(self):
+        self._transpose()
+        rows = len(self.buffers[0]) if self.buffers else 0
+        if not rows:
+            return
+
+        if self.parquet is not None:
+            self.parquet.write_table(pa.Table.from_arrays(
+                [pa.array(list(buffer), type=field.type) for buffer, field in zip(self.buffers, self.arrow_schema)],
+                schema=self.arrow_schema))
+        else:
+            blocks = []
+            for (_, kind), buffer in zip(self.schema, self.buffers):
+                block = encode_column(kind, buffer)
+                blocks.append((self.file.tell(), len(block)))
+                self.file.write(block)
+            self.row_groups.append({'rows': rows, 'columns': blocks})
+
+        self.buffers = [new_column(kind) for _, kind in self.schema]
+
+    def close(self):
+        self.flush()
+        if self.parquet is not None:
+            self.parquet.close()
+            return
+
+        footer = json.dumps({'schema': self.schema, 'row_groups': self.row_groups}).encode('utf-8')
+        self.file.write(footer)
+        self.file.write(struct.pack('<Q', len(footer)) + COLZ_TRAILER)
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_footer(f):
+    """Read the schema and block directory of a .colz file"""
+    f.seek(-12, 2)
+    footer_len, trailer = struct.unpack('<Q4s', f.read(12))
+    if trailer != COLZ_TRAILER:
+        raise ValueError("Not a .colz file")
+    f.seek(-12 - footer_len, 2)
+    return json.loads(f.read(footer_len).decode('utf-8'))
+
+def read_schema(path):
+    """Return [(name, type)] of a columnar file"""
+    if path.endswith('.parquet'):
+        names = pq.read_schema(path)
+        kinds = {pa.int64(): 'int64', pa.float64(): 'float64'}
+        return [(field.name, kinds.get(field.type, 'string')) for field in names]
+    with open(path, 'rb') as f:
+        return [tuple(col) for col in read_footer(f)['schema']]
+
+def read_columns(path, columns=None):
+    """Read selected columns into {name: column}, touching only their blocks
+
+    .colz columns come back as compact NumericColumn/StringColumn sequences.
+    """
+    if path.endswith('.parquet'):
+        table = pq.read_table(path, columns=columns)
+        return {name: table.column(name).to_pylist() for name in table.column_names}
+
+    with open(path, 'rb') as f:
+        footer = read_footer(f)
+        schema = [tuple(col) for col in footer['schema']]
+        names = [name for name, _ in schema]
+        wanted = columns or names
+        kinds = dict(schema)
+        result = {name: new_column(kinds[name]) for name in wanted}
+        for group in footer['row_groups']:
+            for name in wanted:
+                position = names.index(name)
+                offset, length = group['columns'][position]
+                f.seek(offset)
+                first, second = decode_block(kinds[name], f.read(length), group['rows'])
+                column = result[name]
+                if isinstance(column, StringColumn):
+                    column.extend_encoded(first, second)
+                else:
+                    column.validity += first
+                    column.values.extend(second)
+        return result
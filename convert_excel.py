@@ -1,26 +1,29 @@
 #!/usr/bin/env python3
+import csv
 import sys
 import os
-sys.path.insert(0, '/Users/franciscoterpolilli/Library/Python/3.9/lib/python/site-packages')
 
-import pandas as pd
+from xlsx_reader import Workbook
 
 def convert_excel_to_csv(excel_file, output_dir):
     """Convert each sheet in an Excel file to a separate CSV file."""
     try:
-        # Read all sheets from the Excel file
-        xls = pd.ExcelFile(excel_file)
-
-        print(f"Found {len(xls.sheet_names)} sheets: {', '.join(xls.sheet_names)}")
-
-        # Convert each sheet to CSV
-        for sheet_name in xls.sheet_names:
-            df = pd.read_excel(excel_file, sheet_name=sheet_name)
-            csv_filename = os.path.join(output_dir, f"{sheet_name}.csv")
-            df.to_csv(csv_filename, index=False)
-            print(f"Converted '{sheet_name}' to '{csv_filename}' ({len(df)} rows)")
-
-        print(f"\nSuccessfully converted {len(xls.sheet_names)} sheets to CSV files in {output_dir}")
+        # Open the workbook once and stream every sheet from it
+        with Workbook(excel_file) as wb:
+            print(f"Found {len(wb.sheet_names)} sheets: {', '.join(wb.sheet_names)}")
+
+            # Convert each sheet to CSV
+            for sheet_name in wb.sheet_names:
+                csv_filename = os.path.join(output_dir, f"{sheet_name}.csv")
+                rows = 0
+                with open(csv_filename, 'w', encoding='utf-8', newline='') as f:
+                    writer = csv.writer(f)
+                    for row in wb.rows(sheet_name):
+                        writer.writerow(row)
+                        rows += 1
+                print(f"Converted '{sheet_name}' to '{csv_filename}' ({rows} rows)")
+
+        print(f"\nSuccessfully converted {len(wb.sheet_names)} sheets to CSV files in {output_dir}")
 
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Persistent CRM Index
+====================
+
+Build-once, memory-mapped lookup index over CRM.csv keyed by normalized
+LinkedIn URL, so the join never has to load the whole CRM into Python objects.
+
+Usage:
+    from crm_index import CrmIndex
+
+    with CrmIndex("raw_data/CRM.csv", columns=['company_name', 'mrr_eur']) as crm:
+        crm.get('https://linkedin.com/in/joeldavidge')  # ('Off To Work', '0') or None
+
+Index file layout (raw_data/CRM.csv.idx, rebuilt whenever CRM.csv's size or
+mtime changes):
+    header   magic, source size, source mtime_ns, slot count, entry count
+    slots    open-addressing hash table of (key hash, record offset, record length)
+
+Each slot points at the raw CSV record bytes, which are parsed on demand.
+Later duplicates of a LinkedIn URL overwrite earlier ones, matching the
+behaviour of the in-memory dict join. A record whose _deleted column is set
+(tombstones written by crm_store.py) removes its URL from the index.
+
+IndexUpdater applies upserts and deletes to an existing index in place after
+records are appended to the CSV, so an append-only CSV never needs a full
+rescan to stay indexed.
+"""
+
+import csv
+import hashlib
+import io
+import mmap
+import os
+import struct
+from functools import partial
+
+from parallel_csv import PARALLEL_MIN_BYTES, map_chunks
+
+INDEX_MAGIC = b'CRMIDX01'
+INDEX_HEADER = struct.Struct('<8sQQQQ')  # magic, source size, source mtime_ns, slot count, entry count
+INDEX_SLOT = struct.Struct('<QQI')       # key hash (0 = empty), record offset, record length
+KEY_COLUMN = 'linkedin_url'
+TOMBSTONE_COLUMN = '_deleted'
+
+def normalize_linkedin_url(url):
+    """Normalize a LinkedIn profile URL into the CRM join key"""
+    return (url or '').strip().replace('https://www.linkedin.com/in/', 'https://linkedin.com/in/')
+
+def key_hash(key):
+    """Stable 64-bit hash of a join key (never 0, which marks an empty slot)"""
+    value = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+    return value or 1
+
+def index_path(crm_file):
+    return crm_file + '.idx'
+
+def iter_records(f):
+    """Yield (offset, raw bytes) of each CSV record in a binary file
+
+    Quoted fields may contain newlines, so a record only ends at a line break
+    once the number of quote characters seen so far is even. Quotes are
+    counted per line, so long multi-line cells stay linear.
+    """
+    offset = f.tell()
+    lines = []
+    quotes = 0
+    for line in iter(f.readline, b''):
+        lines.append(line)
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            record = line if len(lines) == 1 else b''.join(lines)
+            yield offset, record
+            offset += len(record)
+            lines = []
+            quotes = 0
+    if lines:
+        yield offset, b''.join(lines)
+
+def parse_record(raw):
+    """Parse one raw CSV record into a list of fields"""
+    return next(csv.reader(io.StringIO(raw.decode('utf-8-sig'), newline='')), [])
+
+def source_signature(crm_file):
+    stat = os.stat(crm_file)
+    return stat.st_size, stat.st_mtime_ns
+
+def index_chunk(crm_file, start, end, key_pos, tombstone_pos=None):
+    """(key, record offset, record length, deleted) of every keyed record in [start, end)"""
+    entries = []
+    with open(crm_file, 'rb') as f:
+        f.seek(start)
+        for offset, raw in iter_records(f):
+            if offset >= end:
+                break
+            fields = parse_record(raw)
+            if len(fields) <= key_pos:
+                continue
+            key = normalize_linkedin_url(fields[key_pos])
+            if key:
+                deleted = tombstone_pos is not None and tombstone_pos < len(fields) and fields[tombstone_pos] == '1'
+                entries.append((key, offset, len(raw), deleted))
+    return entries
+
+def build_index(crm_file):
+    """Scan CRM.csv once and write its hash-table index atomically
+
+    Large files are scanned in parallel chunks split at record boundaries.
+    """
+    with open(crm_file, 'rb') as f:
+        _, raw_header = next(iter_records(f), (0, b''))
+    header = parse_record(raw_header)
+    if KEY_COLUMN not in header:
+        raise ValueError(f"{crm_file} has no {KEY_COLUMN} column")
+    key_pos = header.index(KEY_COLUMN)
+    tombstone_pos = header.index(TOMBSTONE_COLUMN) if TOMBSTONE_COLUMN in header else None
+
+    scan = partial(index_chunk, key_pos=key_pos, tombstone_pos=tombstone_pos)
+    if os.path.getsize(crm_file) >= PARALLEL_MIN_BYTES:
+        chunks = map_chunks(crm_file, scan, start=len(raw_header))
+    else:
+        chunks = [scan(crm_file, len(raw_header), os.path.getsize(crm_file))]
+
+    entries = {}
+    for chunk in chunks:
+        for key, offset, length, deleted in chunk:
+            if deleted:
+                entries.pop(key, None)
+            else:
+                entries[key] = (offset, length)
+
+    write_table(crm_file, ((key_hash(key), offset, length) for key, (offset, length) in entries.items()), len(entries))
+    return len(entries)
+
+def table_slots(entries):
+    """Keep the table at most half full so probes stay short"""
+    slots = 1
+    while slots < entries * 2:
+        slots *= 2
+    return slots
+
+def write_table(crm_file, slot_entries, count):
+    """Write an index of (key hash, offset, length) entries for the current CRM.csv atomically"""
+    slots = table_slots(count)
+    table = bytearray(INDEX_SLOT.size * slots)
+    mask = slots - 1
+    for hashed, offset, length in slot_entries:
+        slot = hashed & mask
+        while INDEX_SLOT.unpack_from(table, slot * INDEX_SLOT.size)[0]:
+            slot = (slot + 1) & mask
+        INDEX_SLOT.pack_into(table, slot * INDEX_SLOT.size, hashed, offset, length)
+
+    size, mtime_ns = source_signature(crm_file)
+    path = index_path(crm_file)
+    temp_path = path + f'.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, size, mtime_ns, slots, count))
+        f.write(table)
+    os.replace(temp_path, path)
+
+def index_is_fresh(crm_file):
+    """Check the index exists and was built from the current CRM.csv"""
+    path = index_path(crm_file)
+    if not os.path.exists(path):
+        return False
+    with open(path, 'rb') as f:
+        header = f.read(INDEX_HEADER.size)
+    if len(header) != INDEX_HEADER.size:
+        return False
+    magic, size, mtime_ns, _, _ = INDEX_HEADER.unpack(header)
+    return magic == INDEX_MAGIC and (size, mtime_ns) == source_signature(crm_file)
+
+class CrmIndex:
+    """Memory-mapped O(1) lookups of CRM rows by normalized LinkedIn URL"""
+
+    def __init__(self, crm_file, columns=None):
+        self.crm_file = crm_file
+        self.rebuilt = False
+        if not index_is_fresh(crm_file):
+            build_index(crm_file)
+            self.rebuilt = True
+
+        self._csv = open(crm_file, 'rb')
+        self._index = open(index_path(crm_file), 'rb')
+        self.csv_map = mmap.mmap(self._csv.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index_map = mmap.mmap(self._index.fileno(), 0, access=mmap.ACCESS_READ)
+
+        _, _, _, self.slots, self.entries = INDEX_HEADER.unpack_from(self.index_map, 0)
+        self.mask = self.slots - 1
+
+        self._csv.seek(0)
+        self.header = parse_record(next(iter_records(self._csv))[1])
+        self.key_pos = self.header.index(KEY_COLUMN)
+        columns = columns or self.header
+        self.positions = [self.header.index(c) if c in self.header else None for c in columns]
+
+    def __len__(self):
+        return self.entries
+
+    def locate(self, key):
+        """(record offset, parsed fields) of the current record for a LinkedIn URL, or None"""
+        key = normalize_linkedin_url(key)
+        if not key:
+            return None
+
+        hashed = key_hash(key)
+        slot = hashed & self.mask
+        while True:
+            stored, offset, length = INDEX_SLOT.unpack_from(self.index_map, INDEX_HEADER.size + slot * INDEX_SLOT.size)
+            if not stored:
+                return None
+            if stored == hashed:
+                fields = parse_record(self.csv_map[offset:offset + length])
+                # Guard against 64-bit hash collisions
+                if len(fields) > self.key_pos and normalize_linkedin_url(fields[self.key_pos]) == key:
+                    return offset, fields
+            slot = (slot + 1) & self.mask
+
+    def get(self, key, default=None):
+        """Return the requested columns for a LinkedIn URL, or default when absent"""
+        found = self.locate(key)
+        if found is None:
+            return default
+        fields = found[1]
+        return tuple(fields[p] if p is not None and p < len(fields) else '' for p in self.positions)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def close(self):
+        self.csv_map.close()
+        self.index_map.close()
+        self._csv.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class IndexUpdater:
+    """In-place upserts and deletes on the index of an append-only CRM.csv
+
+    Append the new records to the CSV first, then put()/delete() their keys
+    and commit(), which stamps the index with the CSV's new size and mtime.
+    If the process dies before commit() the stamp no longer matches and the
+    next CrmIndex rebuilds from the CSV, so a crash never serves stale rows.
+    """
+
+    def __init__(self, crm_file):
+        self.crm_file = crm_file
+        if not index_is_fresh(crm_file):
+            build_index(crm_file)
+        with open(index_path(crm_file), 'rb') as f:
+            _, _, _, self.slots, self.entries = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+        self._index = open(index_path(crm_file), 'r+b')
+        self.table = mmap.mmap(self._index.fileno(), 0)
+        self._csv = open(crm_file, 'rb')
+        with open(crm_file, 'rb') as f:
+            header = parse_record(next(iter_records(f))[1])
+        self.key_pos = header.index(KEY_COLUMN)
+
+    def _slot(self, slot):
+        return INDEX_SLOT.unpack_from(self.table, INDEX_HEADER.size + slot * INDEX_SLOT.size)
+
+    def _set_slot(self, slot, hashed, offset, length):
+        INDEX_SLOT.pack_into(self.table, INDEX_HEADER.size + slot * INDEX_SLOT.size, hashed, offset, length)
+
+    def read_record(self, offset, length):
+        return parse_record(os.pread(self._csv.fileno(), length, offset))
+
+    def _probe(self, key):
+        """(slot, found) where slot holds the key when found, else is the empty slot it would go in"""
+        hashed = key_hash(key)
+        mask = self.slots - 1
+        slot = hashed & mask
+        while True:
+            stored, offset, length = self._slot(slot)
+            if not stored:
+                return slot, False
+            if stored == hashed:
+                fields = self.read_record(offset, length)
+                if len(fields) > self.key_pos and normalize_linkedin_url(fields[self.key_pos]) == key:
+                    return slot, True
+            slot = (slot + 1) & mask
+
+    def get(self, key):
+        """Parsed fields of the current record for a key, or None"""
+        slot, found = self._probe(key)
+        if not found:
+            return None
+        _, offset, length = self._slot(slot)
+        return self.read_record(offset, length)
+
+    def put(self, key, offset, length):
+        slot, found = self._probe(key)
+        self._set_slot(slot, key_hash(key), offset, length)
+        if not found:
+            self.entries += 1
+            if self.entries * 2 > self.slots:
+                self._grow()
+
+    def delete(self, key):
+        """Remove a key with backward-shift deletion (no tombstone slots, probes stay short)"""
+        slot, found = self._probe(key)
+        if not found:
+            return False
+        mask = self.slots - 1
+        hole = slot
+        slot = (slot + 1) & mask
+        while True:
+            hashed, offset, length = self._slot(slot)
+            if not hashed:
+                break
+            home = hashed & mask
+            # Move the entry back into the hole unless its home lies cyclically in (hole, slot]
+            if (slot - home) & mask >= (slot - hole) & mask:
+                self._set_slot(hole, hashed, offset, length)
+                hole = slot
+            slot = (slot + 1) & mask
+        self._set_slot(hole, 0, 0, 0)
+        self.entries -= 1
+        return True
+
+    def _grow(self):
+        occupied = [entry for entry in INDEX_SLOT.iter_unpack(self.table[INDEX_HEADER.size:]) if entry[0]]
+        self.table.close()
+        self._index.close()
+        write_table(self.crm_file, occupied, self.entries)
+        self._index = open(index_path(self.crm_file), 'r+b')
+        self.table = mmap.mmap(self._index.fileno(), 0)
+        self.slots = table_slots(self.entries)
+
+    def iter_entries(self):
+        """(offset, length) of every indexed record"""
+        for slot in range(self.slots):
+            hashed, offset, length = self._slot(slot)
+            if hashed:
+                yield offset, length
+
+    def commit(self):
+        """Stamp the index with the CSV's current signature; call after the appended records are flushed"""
+        size, mtime_ns = source_signature(self.crm_file)
+        INDEX_HEADER.pack_into(self.table, 0, INDEX_MAGIC, size, mtime_ns, self.slots, self.entries)
+        self.table.flush()
+
+    def close(self):
+        self.table.close()
+        self._index.close()
+        self._csv.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
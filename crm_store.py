@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Incremental CRM Store
+=====================
+
+Keeps a persisted CRM table up to date from delta exports (rows changed
+since the last sync) instead of reloading and re-indexing the full CRM
+export every run.
+
+Usage:
+    python3 crm_store.py apply crm_store/ crm_delta_2026-10-18.csv
+    python3 crm_store.py apply crm_store/ raw_data/CRM.csv --snapshot   # full export; drops missing rows
+    python3 crm_store.py compact crm_store/
+    python3 crm_store.py status crm_store/
+
+    python3 process_webinar_data.py export.xlsx --crm crm_store/
+
+    from crm_store import CrmStore
+    CrmStore('crm_store').apply('crm_delta.csv')
+
+crm_store/crm.csv is an append-only CSV with the CRM export's columns plus
+_version (the store version that wrote the row) and _deleted (1 for a
+tombstone). Its CrmIndex (crm.csv.idx) is updated in place as rows are
+appended, so joins keep using the memory-mapped index without a rebuild.
+
+Delta rows are upserted by normalized linkedin_url. A row only replaces the
+stored one when its last_activity_at is not older, so replaying an old
+delta cannot roll a contact back; unchanged rows are not re-appended. A row
+whose deleted/is_deleted column is true writes a tombstone. With --snapshot
+every stored contact missing from the export is tombstoned too.
+
+store.json records the store id, the store version, the version of the last
+snapshot, the column list and the sha256 of every applied export, so
+re-applying the same file is a no-op. state_key() (store id, snapshot,
+version) identifies the store's contents without reading crm.csv, and keys
+the pipeline's cached CRM join.
+
+identities.pkl holds the IdentityMatcher blocks of the live contacts. Every
+apply() removes the upserted and deleted contacts from it and re-adds the
+upserted ones, so a daily delta touches only the contacts it changes; the
+file is rebuilt from crm.csv only when missing or out of step with
+store.json. compact()
+rewrites crm.csv with only the live rows once superseded versions and
+tombstones make up more than COMPACT_RATIO of it.
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import pickle
+import sys
+import time
+import uuid
+
+from crm_index import (KEY_COLUMN, TOMBSTONE_COLUMN, CrmIndex, IndexUpdater, build_index, iter_records,
+                       normalize_linkedin_url, parse_record)
+from identity_resolution import IdentityMatcher
+from parallel_csv import iter_rows
+
+STORE_FILE = 'crm.csv'
+META_FILE = 'store.json'
+IDENTITY_FILE = 'identities.pkl'
+VERSION_COLUMN = '_version'
+ACTIVITY_COLUMN = 'last_activity_at'
+DELETE_COLUMNS = ('deleted', 'is_deleted', TOMBSTONE_COLUMN)
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+COMPACT_RATIO = 0.5
+
+def store_path(crm):
+    """CRM.csv path for --crm values that may name a store directory"""
+    return os.path.join(crm, STORE_FILE) if crm and os.path.isdir(crm) else crm
+
+def is_store_file(crm_file):
+    """Whether a CRM CSV carries store tombstones (and so may hold superseded rows)"""
+    with open(crm_file, 'rb') as f:
+        header = parse_record(next(iter_records(f), (0, b''))[1])
+    return TOMBSTONE_COLUMN in header
+
+def live_records(crm_file):
+    """Yield the current, non-deleted version of every contact in a store file as a dict"""
+    with CrmIndex(crm_file) as index, open(crm_file, 'rb') as f:
+        records = iter_records(f)
+        header = parse_record(next(records)[1])
+        for offset, raw in records:
+            fields = parse_record(raw)
+            found = index.locate(fields[index.key_pos]) if len(fields) > index.key_pos else None
+            # Superseded versions and tombstones are not what the index points at
+            if found and found[0] == offset:
+                yield dict(zip(header, fields))
+
+def encode_row(values):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue().encode('utf-8')
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(2**20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+class CrmStore:
+    """Append-only CRM table with versions, tombstones and an in-place maintained index"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.data_path = os.path.join(directory, STORE_FILE)
+        self.meta_path = os.path.join(directory, META_FILE)
+        self.identity_path = os.path.join(directory, IDENTITY_FILE)
+        os.makedirs(directory, exist_ok=True)
+        self.meta = {'store_id': uuid.uuid4().hex, 'version': 0, 'snapshot': 0, 'columns': [], 'rows_written': 0,
+                     'applied': []}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+            if 'store_id' not in self.meta:
+                # Stores written before state keys existed
+                self.meta['store_id'] = uuid.uuid4().hex
+                self.meta['snapshot'] = max((e['version'] for e in self.meta['applied'] if e['snapshot']), default=0)
+                self.save_meta()
+
+    @property
+    def columns(self):
+        return self.meta['columns']
+
+    def save_meta(self):
+        temp_path = self.meta_path + f'.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(temp_path, self.meta_path)
+
+    def state_key(self):
+        """Identifies the live contents: a store id, its last snapshot and the deltas applied since"""
+        return f"{self.meta['store_id']}:{self.meta['snapshot']}:{self.meta['version']}"
+
+    def identities(self):
+        """IdentityMatcher over the live contacts, rebuilt from crm.csv only when identities.pkl is stale"""
+        try:
+            with open(self.identity_path, 'rb') as f:
+                state, matcher = pickle.load(f)
+            if state == self.state_key():
+                return matcher
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            pass
+        if os.path.exists(self.data_path):
+            matcher = IdentityMatcher.build(live_records(self.data_path))
+        else:
+            matcher = IdentityMatcher()
+        self.save_identities(matcher)
+        return matcher
+
+    def save_identities(self, matcher):
+        temp_path = self.identity_path + f'.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump((self.state_key(), matcher), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.identity_path)
+
+    def live_count(self):
+        if not os.path.exists(self.data_path):
+            return 0
+        with CrmIndex(self.data_path) as index:
+            return len(index)
+
+    def _create(self, columns):
+        self.meta['columns'] = list(columns)
+        with open(self.data_path, 'wb') as f:
+            f.write(encode_row([*columns, VERSION_COLUMN, TOMBSTONE_COLUMN]))
+        build_index(self.data_path)
+
+    def apply(self, export_path, snapshot=False):
+        """Merge a delta (or, with snapshot=True, a full) CRM export; return the merge stats"""
+        sha = file_sha256(export_path)
+        if any(entry['sha256'] == sha for entry in self.meta['applied']):
+            print(f"  ⏭️  {os.path.basename(export_path)} already applied")
+            return None
+
+        rows = iter_rows(export_path, encoding='utf-8-sig')
+        header = [name.strip() for name in next(rows, ())]
+        if KEY_COLUMN not in header:
+            raise ValueError(f"{export_path} has no {KEY_COLUMN} column")
+        if not self.columns:
+            self._create([name for name in header if name not in DELETE_COLUMNS])
+        dropped = [name for name in header if name not in self.columns and name not in DELETE_COLUMNS]
+        if dropped:
+            print(f"  ⚠️  Ignoring columns not in the store: {', '.join(dropped)}")
+
+        version = self.meta['version'] + 1
+        positions = [header.index(name) if name in header else None for name in self.columns]
+        delete_pos = next((header.index(name) for name in DELETE_COLUMNS if name in header), None)
+        key_pos = self.columns.index(KEY_COLUMN)
+        activity_pos = self.columns.index(ACTIVITY_COLUMN) if ACTIVITY_COLUMN in self.columns else None
+        stats = {'upserted': 0, 'deleted': 0, 'unchanged': 0, 'stale': 0}
+        seen = set()
+        matcher = self.identities()
+        # Claim the version before crm.csv changes: after a crash from here on, identities.pkl (and any
+        # join cached on state_key) no longer match store.json, so they are rebuilt instead of trusted
+        self.meta['version'] = version
+        self.save_meta()
+
+        # Unbuffered: a key repeated within one export is looked up in rows this run just appended
+        with IndexUpdater(self.data_path) as index, open(self.data_path, 'ab', buffering=0) as data:
+            offset = data.tell()
+
+            def append(key, values, deleted):
+                nonlocal offset
+                raw = encode_row([*values, version, '1' if deleted else ''])
+                data.write(raw)
+                matcher.remove(key)
+                if deleted:
+                    index.delete(key)
+                else:
+                    index.put(key, offset, len(raw))
+                    matcher.add_record(dict(zip(self.columns, values)))
+                offset += len(raw)
+                self.meta['rows_written'] += 1
+
+            for row in rows:
+                values = [row[p] if p is not None and p < len(row) else '' for p in positions]
+                key = normalize_linkedin_url(values[key_pos])
+                if not key:
+                    continue
+                seen.add(key)
+                deleted = delete_pos is not None and delete_pos < len(row) and row[delete_pos].strip().lower() in TRUE_VALUES
+                current = index.get(key)
+                if current is not None:
+                    current_values = current[:len(self.columns)]
+                    # Timestamps are YYYY/MM/DD HH:MM:SS, so string order is time order
+                    if activity_pos is not None and values[activity_pos] and values[activity_pos] < current_values[activity_pos]:
+                        stats['stale'] += 1  # an older export than what is stored
+                        continue
+                    if not deleted and values == current_values:
+                        stats['unchanged'] += 1
+                        continue
+                elif deleted:
+                    continue
+                append(key, values, deleted)
+                stats['deleted' if deleted else 'upserted'] += 1
+
+            if snapshot:
+                # Keys are not stored in the index, so read each live record to find the missing ones
+                for record_offset, length in list(index.iter_entries()):
+                    values = index.read_record(record_offset, length)[:len(self.columns)]
+                    key = normalize_linkedin_url(values[key_pos])
+                    if key not in seen:
+                        append(key, values, True)
+                        stats['deleted'] += 1
+
+            os.fsync(data.fileno())
+            index.commit()
+
+        if snapshot:
+            self.meta['snapshot'] = version
+        # A crash between these two leaves the export unrecorded; re-applying it finds every row unchanged
+        self.save_identities(matcher)
+        self.meta['applied'].append({
+            'file': os.path.basename(export_path), 'sha256': sha, 'version': version, 'snapshot': snapshot,
+            'applied_at': time.strftime('%Y-%m-%d %H:%M:%S'), **stats,
+        })
+        self.save_meta()
+        print(f"  ✅ v{version} {os.path.basename(export_path)}: {stats['upserted']} upserted, "
+              f"{stats['deleted']} deleted, {stats['unchanged']} unchanged, {stats['stale']} stale")
+
+        if self.dead_ratio() > COMPACT_RATIO:
+            self.compact()
+        return stats
+
+    def dead_ratio(self):
+        """Share of stored rows that are superseded versions or tombstones"""
+        written = self.meta['rows_written']
+        return 1 - self.live_count() / written if written else 0.0
+
+    def compact(self):
+        """Rewrite crm.csv with only the live rows and rebuild its index"""
+        temp_path = self.data_path + f'.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([*self.columns, VERSION_COLUMN, TOMBSTONE_COLUMN])
+            live = 0
+            for record in live_records(self.data_path):
+                writer.writerow([record.get(name, '') for name in (*self.columns, VERSION_COLUMN, TOMBSTONE_COLUMN)])
+                live += 1
+        os.replace(temp_path, self.data_path)
+        build_index(self.data_path)
+        self.meta['rows_written'] = live
+        self.save_meta()
+        print(f"  🧹 Compacted {STORE_FILE} to {live} live rows")
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental CRM store fed by delta exports")
+    commands = parser.add_subparsers(dest='command', required=True)
+    apply = commands.add_parser('apply', help="Merge CRM exports into the store, in order")
+    apply.add_argument('directory')
+    apply.add_argument('exports', nargs='+')
+    apply.add_argument('--snapshot', action='store_true', help="Exports are full CRM dumps; tombstone missing rows")
+    compact = commands.add_parser('compact', help="Drop superseded versions and tombstones")
+    compact.add_argument('directory')
+    status = commands.add_parser('status', help="Show the store version and applied exports")
+    status.add_argument('directory')
+    args = parser.parse_args()
+
+    store = CrmStore(args.directory)
+    if args.command == 'apply':
+        print(f"🗂️  Applying {len(args.exports)} CRM export(s) to {store.data_path}")
+        for export in args.exports:
+            try:
+                store.apply(export, snapshot=args.snapshot)
+            except (OSError, ValueError) as e:
+                print(f"  ❌ {export}: {e}")
+                sys.exit(1)
+    elif args.command == 'compact':
+        store.compact()
+    print(f"🗂️  {store.data_path}: v{store.meta['version']}, {store.live_count()} live contacts, "
+          f"{store.meta['rows_written']} rows stored")
+    if args.command == 'status':
+        for entry in store.meta['applied']:
+            print(f"     v{entry['version']} {entry['applied_at']} {entry['file']}: {entry['upserted']} upserted, "
+                  f"{entry['deleted']} deleted, {entry['unchanged']} unchanged, {entry['stale']} stale")
+
+if __name__ == "__main__":
+    main()
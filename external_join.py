@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+External Hash Join
+==================
+
+Grace-style hash join for CRM files larger than RAM: both sides are
+partitioned by hashed key into spill files, then each partition is joined
+in memory on its own, so peak memory is bounded by one partition instead of
+the whole CRM.
+
+Usage:
+    from external_join import external_hash_join
+
+    values = external_hash_join(
+        left_keys=(url for url in registrant_urls),        # join key per left row, in order
+        right_rows=((url, crm_tuple) for ... in crm),     # (key, value) pairs
+        memory_budget=256 * 2**20, right_bytes=os.path.getsize('CRM.csv'),
+        spill_dir='/tmp')
+    for value in values:   # one per left key, in left order; None when unmatched
+        ...
+
+Later right rows with the same key overwrite earlier ones, exactly like
+building a dict, so results are identical to the in-memory join. A
+partition that still exceeds the budget (skewed keys) is re-partitioned
+with a different hash seed.
+"""
+
+import csv
+import heapq
+import math
+import os
+import shutil
+import tempfile
+
+from crm_index import key_hash
+
+# Rough in-memory size of a loaded row relative to its CSV bytes (dict + tuple + str objects)
+MEMORY_OVERHEAD = 6
+MAX_PARTITIONS = 256  # keeps the number of open spill files well below OS limits
+MAX_DEPTH = 4
+
+def partition_count(source_bytes, memory_budget):
+    """Number of partitions so that each fits the memory budget"""
+    if not memory_budget or not source_bytes:
+        return 1
+    return max(1, min(MAX_PARTITIONS, math.ceil(source_bytes * MEMORY_OVERHEAD / memory_budget)))
+
+def partition_of(key, partitions, seed):
+    return key_hash(f'{seed}:{key}') % partitions
+
+def spill(rows, directory, prefix, partitions, seed, key_of):
+    """Write rows into `partitions` CSV files by hashed key; return the file paths"""
+    paths = [os.path.join(directory, f'{prefix}-{seed}-{i}.csv') for i in range(partitions)]
+    files = [open(path, 'w', encoding='utf-8', newline='') for path in paths]
+    try:
+        writers = [csv.writer(f) for f in files]
+        for row in rows:
+            writers[partition_of(key_of(row), partitions, seed)].writerow(row)
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+def read_rows(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        yield from csv.reader(f)
+
+def join_partition(left_path, right_path, out_path, memory_budget, directory, seed, depth=0):
+    """Join one partition into out_path as (row number, matched flag, *value) in row order"""
+    right_bytes = os.path.getsize(right_path)
+    if memory_budget and right_bytes * MEMORY_OVERHEAD > memory_budget and depth < MAX_DEPTH:
+        # Still too big: split this partition again with a different seed and merge the pieces
+        partitions = partition_count(right_bytes, memory_budget)
+        if partitions > 1:
+            seed += 1
+            lefts = spill(read_rows(left_path), directory, f'l{depth}', partitions, seed, lambda row: row[1])
+            rights = spill(read_rows(right_path), directory, f'r{depth}', partitions, seed, lambda row: row[0])
+            outs = []
+            for i, (left, right) in enumerate(zip(lefts, rights)):
+                outs.append(os.path.join(directory, f'o{depth}-{seed}-{i}.csv'))
+                join_partition(left, right, outs[-1], memory_budget, directory, seed, depth + 1)
+                os.remove(left)
+                os.remove(right)
+            merge_results(outs, out_path)
+            for path in outs:
+                os.remove(path)
+            return
+
+    table = {}
+    for key, *value in read_rows(right_path):
+        table[key] = value
+
+    with open(out_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        for row_number, key in read_rows(left_path):
+            value = table.get(key)
+            writer.writerow([row_number, '1', *value] if value is not None else [row_number, ''])
+
+def merge_results(paths, out_path):
+    """k-way merge of per-partition results (each in row order) into one file in row order"""
+    with open(out_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        for row in heapq.merge(*(read_rows(path) for path in paths), key=lambda row: int(row[0])):
+            writer.writerow(row)
+
+def external_hash_join(left_keys, right_rows, memory_budget, right_bytes=None, spill_dir=None):
+    """Yield the joined value (a list) or None for every left key, in left order"""
+    directory = tempfile.mkdtemp(prefix='crm_join_', dir=spill_dir)
+    try:
+        partitions = partition_count(right_bytes, memory_budget)
+        lefts = spill(((i, key) for i, key in enumerate(left_keys)), directory, 'left', partitions, 0,
+                      lambda row: row[1])
+        rights = spill(right_rows, directory, 'right', partitions, 0, lambda row: row[0])
+
+        outs = []
+        for i, (left, right) in enumerate(zip(lefts, rights)):
+            outs.append(os.path.join(directory, f'out-{i}.csv'))
+            join_partition(left, right, outs[-1], memory_budget, directory, 0)
+            os.remove(left)
+            os.remove(right)
+
+        for row in heapq.merge(*(read_rows(path) for path in outs), key=lambda row: int(row[0])):
+            yield row[2:] if row[1] == '1' else None
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
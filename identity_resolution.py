@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Fuzzy Identity Resolution
+=========================
+
+Blocking-based matcher that links registrants to CRM rows when the exact
+LinkedIn URL join misses (blank or malformed URL, vanity-URL change, URL
+variants like trailing slashes or ?dup= suffixes).
+
+Usage:
+    from identity_resolution import IdentityMatcher
+
+    matcher = IdentityMatcher.build(crm_records)
+    matcher.match('Lily', 'Grozeva', domains=['vertodigital.com'])
+    # ('https://linkedin.com/in/lilygrozeva?dup=3', 0.85) or None
+
+    # Bounded memory: only index the blocks the unmatched registrants will probe
+    blocks = set(IdentityMatcher.query_blocks('Lily', 'Grozeva', domains=['vertodigital.com']))
+    matcher = IdentityMatcher.build(crm_records, blocks=blocks)
+
+    # Kept current from CRM deltas (see crm_store.py)
+    matcher.remove('https://linkedin.com/in/lilygrozeva')
+    matcher.add_record(updated_record)
+
+Candidates are only compared within blocks that share a key, so matching
+scales with block size instead of CRM size:
+    d:<domain>              company domain (registrant website/email domain)
+    n:<last name>|<initial> normalized last name + first initial
+    s:<profile slug>        LinkedIn slug without query string or trailing slash
+
+Confidence = 0.6 * name similarity + 0.25 * domain agreement + 0.15 * slug
+similarity, where similarities are Dice coefficients over character
+trigrams. A match is returned only above MIN_CONFIDENCE, and only when no
+different identity scores within AMBIGUITY_MARGIN of the best candidate.
+"""
+
+import re
+import unicodedata
+
+from crm_index import normalize_linkedin_url
+
+MIN_CONFIDENCE = 0.7
+AMBIGUITY_MARGIN = 0.05
+MAX_BLOCK_SIZE = 1000  # oversized blocks carry no signal and would go quadratic
+
+NAME_WEIGHT = 0.6
+DOMAIN_WEIGHT = 0.25
+SLUG_WEIGHT = 0.15
+
+# Personal mailbox domains say nothing about the company
+FREE_EMAIL_DOMAINS = {
+    'gmail.com', 'googlemail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'live.com',
+    'icloud.com', 'me.com', 'aol.com', 'gmx.de', 'gmx.net', 'web.de', 'proton.me', 'protonmail.com',
+}
+
+def normalize_name(value):
+    """Lowercase, strip accents and drop everything but letters, digits and spaces"""
+    value = value or ''
+    if not value.isascii():
+        value = unicodedata.normalize('NFKD', value)
+        value = ''.join(c for c in value if not unicodedata.combining(c))
+    value = value.lower()
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', value).split())
+
+def normalize_domain(value):
+    """Reduce a URL, email address or domain to a bare lowercase domain"""
+    value = (value or '').strip().lower()
+    if '@' in value:
+        value = value.rsplit('@', 1)[1]
+    value = re.sub(r'^[a-z]+://', '', value).split('/', 1)[0].split('?', 1)[0]
+    if value.startswith('www.'):
+        value = value[4:]
+    return '' if value in FREE_EMAIL_DOMAINS or '.' not in value else value
+
+def profile_slug(url):
+    """LinkedIn profile slug without query string, trailing slash or host variant"""
+    url = normalize_linkedin_url(url).split('?', 1)[0].rstrip('/')
+    if '/in/' not in url:
+        return ''
+    return url.rsplit('/in/', 1)[1].lower()
+
+def trigrams(value):
+    value = f'  {value} '
+    return frozenset(value[i:i + 3] for i in range(len(value) - 2))
+
+def dice(a, b):
+    """Dice coefficient of two trigram sets (0.0 - 1.0)"""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+def name_block(first, last):
+    return f'n:{last}|{first[:1]}' if last and first else None
+
+class IdentityMatcher:
+    """Blocked index of CRM identities with trigram similarity scoring"""
+
+    def __init__(self):
+        # (key, name, domain, slug); trigrams are computed per match, only for block members
+        self.candidates = []
+        self.blocks = {}
+        self.keys = {}  # CRM key -> [(candidate id, its blocks)], so a contact can be removed again
+        self.live = 0
+
+    def add(self, key, first, last, domain='', url='', only_blocks=None):
+        """Index one CRM identity; with only_blocks, skip it unless it falls in one of them"""
+        first, last = normalize_name(first), normalize_name(last)
+        name = f'{first} {last}'.strip()
+        domain = normalize_domain(domain)
+        slug = profile_slug(url)
+        if not name:
+            return
+
+        blocks = [block for block in (domain and f'd:{domain}', name_block(first, last), slug and f's:{slug}') if block]
+        if only_blocks is not None and not any(block in only_blocks for block in blocks):
+            return
+        candidate_id = len(self.candidates)
+        self.candidates.append((key, name, domain, slug))
+        for block in blocks:
+            self.blocks.setdefault(block, []).append(candidate_id)
+        self.keys.setdefault(key, []).append((candidate_id, blocks))
+        self.live += 1
+
+    def add_record(self, row, key_column='linkedin_url', only_blocks=None):
+        """Index one CRM record (dict with linkedin_url, first_name, last_name, company_domain)"""
+        key = normalize_linkedin_url(row.get(key_column, ''))
+        if key:
+            self.add(key, row.get('first_name', ''), row.get('last_name', ''),
+                     row.get('company_domain', ''), row.get(key_column, ''), only_blocks=only_blocks)
+
+    def remove(self, key):
+        """Drop every candidate indexed under a CRM key (a deleted or updated contact)"""
+        for candidate_id, blocks in self.keys.pop(key, ()):
+            for block in blocks:
+                members = self.blocks[block]
+                members.remove(candidate_id)
+                if not members:
+                    del self.blocks[block]
+            self.candidates[candidate_id] = None
+            self.live -= 1
+
+    @classmethod
+    def build(cls, records, key_column='linkedin_url', blocks=None):
+        """Index CRM records (dicts with linkedin_url, first_name, last_name, company_domain)
+
+        With `blocks` (from query_blocks), only candidates in those blocks are
+        kept; matches for the queries that produced them are unchanged.
+        """
+        matcher = cls()
+        for row in records:
+            matcher.add_record(row, key_column, only_blocks=blocks)
+        return matcher
+
+    @staticmethod
+    def query_blocks(first, last, domains=(), url=''):
+        """Block keys match() probes for a registrant"""
+        first, last = normalize_name(first), normalize_name(last)
+        domains = {d for d in (normalize_domain(d) for d in domains) if d}
+        slug = profile_slug(url)
+        blocks = [f'd:{d}' for d in sorted(domains)] + [name_block(first, last), slug and f's:{slug}']
+        return [block for block in blocks if block]
+
+    def __len__(self):
+        return self.live
+
+    def match(self, first, last, domains=(), url='', exclude=()):
+        """Return (CRM key, confidence) of the best candidate not in `exclude` (CRM keys), or None"""
+        first, last = normalize_name(first), normalize_name(last)
+        name = f'{first} {last}'.strip()
+        if not name:
+            return None
+        domains = {d for d in (normalize_domain(d) for d in domains) if d}
+        slug = profile_slug(url)
+
+        candidate_ids = set()
+        for block in self.query_blocks(first, last, domains, url):
+            members = self.blocks.get(block, ())
+            if len(members) <= MAX_BLOCK_SIZE:
+                candidate_ids.update(members)
+        if exclude:
+            candidate_ids = {i for i in candidate_ids if self.candidates[i][0] not in exclude}
+        if not candidate_ids:
+            return None
+
+        name_grams = trigrams(name)
+        slug_grams = trigrams(slug) if slug else frozenset()
+        scored = []
+        for candidate_id in candidate_ids:
+            _, cand_name, cand_domain, cand_slug = self.candidates[candidate_id]
+            confidence = (NAME_WEIGHT * dice(name_grams, trigrams(cand_name))
+                          + DOMAIN_WEIGHT * (cand_domain in domains)
+                          + SLUG_WEIGHT * (dice(slug_grams, trigrams(cand_slug)) if slug and cand_slug else 0.0))
+            # Later CRM duplicates win ties, like the exact join
+            scored.append((confidence, candidate_id))
+
+        confidence, best_id = max(scored)
+        if confidence < MIN_CONFIDENCE:
+            return None
+
+        # Duplicate CRM rows of the same person are not ambiguous; different people are
+        best_key, best_name, best_domain, _ = self.candidates[best_id]
+        for other_confidence, other_id in scored:
+            _, other_name, other_domain, _ = self.candidates[other_id]
+            if confidence - other_confidence < AMBIGUITY_MARGIN and (other_name, other_domain) != (best_name, best_domain):
+                return None
+
+        return best_key, round(min(confidence, 1.0), 3)
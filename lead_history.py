@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Cross-Webinar Lead History
+==========================
+
+SQLite store of every lead's appearance in every processed webinar, so each
+new Clay import carries the lead's history (webinars registered for and
+attended, questions asked, last registration) without re-reading old CSVs.
+
+Usage:
+    python3 process_webinar_data.py export.xlsx --history lead_history.db
+    python3 process_webinar_data.py --batch "exports/*.xlsx" --history lead_history.db
+
+    # Backfill from earlier outputs (the webinar id is the directory name)
+    python3 lead_history.py load lead_history.db batch_*/*/ processed_*/
+
+    # One lead's appearances
+    python3 lead_history.py show lead_history.db --bmid 94a2cd176bfe
+    python3 lead_history.py show lead_history.db --linkedin-url https://linkedin.com/in/joeldavidge
+
+    from lead_history import history_clay_import, record_clay_imports
+    columns = history_clay_import('processed_TIMESTAMP', 'webinar-42', 'lead_history.db')
+    columns = record_clay_imports([('webinar-41', 'batch/webinar-41'), ('webinar-42', 'batch/webinar-42')],
+                                  'lead_history.db')['webinar-42']
+
+Columns added to the import (over every webinar in the store, this one included):
+    webinars_registered  webinars the lead registered for
+    webinars_attended    webinars the lead attended
+    total_qa             questions asked across those webinars
+    last_seen            latest Registration Date/Time
+
+Leads sharing a BMID or normalized LinkedIn URL (in any webinar) are one
+person; person ids are resolved once at load time, so re-registrations
+under a new BMID keep their history. Each webinar is loaded with one
+batched executemany in a single transaction (re-processing a webinar
+replaces its rows), and the features for the whole import come from one
+set-based GROUP BY over a covering index of the current people, so the cost
+grows with their history, not with the size of the store.
+
+History is opt-in. A batch records its webinars after every worker has
+finished, in one pass ordered by event date, and only then computes the
+features, so they don't depend on which worker finished first. The
+database runs in WAL mode, so other processes can read it while a run
+records.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+
+from crm_index import normalize_linkedin_url
+
+HISTORY_DB = 'lead_history.db'
+BUSY_TIMEOUT = 60  # seconds a writer waits for another process's transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS webinars (
+    webinar_id TEXT PRIMARY KEY,
+    source TEXT,
+    loaded_at TEXT,
+    leads INTEGER
+);
+CREATE TABLE IF NOT EXISTS appearances (
+    webinar_id TEXT NOT NULL,
+    bmid TEXT NOT NULL,
+    person_id INTEGER NOT NULL,
+    linkedin_url TEXT NOT NULL,
+    email TEXT NOT NULL,
+    attended INTEGER NOT NULL,
+    qa_questions INTEGER NOT NULL,
+    poll_responses INTEGER NOT NULL,
+    emoji_reactions INTEGER NOT NULL,
+    registered_at TEXT NOT NULL,
+    PRIMARY KEY (webinar_id, bmid)
+) WITHOUT ROWID;
+-- Covers the features query, so it never touches the table itself
+CREATE INDEX IF NOT EXISTS appearances_person
+    ON appearances (person_id, webinar_id, attended, qa_questions, registered_at);
+-- 'b:<bmid>' / 'u:<linkedin url>' -> the person they identify
+CREATE TABLE IF NOT EXISTS lead_keys (
+    key TEXT PRIMARY KEY,
+    person_id INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS lead_keys_person ON lead_keys (person_id);
+"""
+
+# Per person: one row per webinar first (in index order), then the totals
+FEATURES_QUERY = """
+SELECT person_id, COUNT(*), SUM(attended), SUM(questions), MAX(registered_at)
+FROM (
+    SELECT a.person_id, MAX(a.attended) AS attended, SUM(a.qa_questions) AS questions,
+           MAX(a.registered_at) AS registered_at
+    FROM current_people c JOIN appearances a ON a.person_id = c.person_id
+    GROUP BY a.person_id, a.webinar_id
+)
+GROUP BY person_id
+"""
+
+FEATURE_COLUMNS = [
+    ('webinars_registered', 'int64'),
+    ('webinars_attended', 'int64'),
+    ('total_qa', 'int64'),
+    ('last_seen', 'string'),
+]
+
+def lead_keys(bmid, linkedin_url):
+    return ['b:' + bmid, 'u:' + linkedin_url] if linkedin_url else ['b:' + bmid]
+
+def to_int(value):
+    try:
+        return int(float(value or 0))
+    except ValueError:
+        return 0
+
+def read_appearances(clay_file):
+    """(bmid, linkedin_url, email, attended, qa, polls, emoji, registered_at) per row of a Clay import, in file order"""
+    with open(clay_file, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            yield (
+                (row.get('BMID') or '').strip(),
+                normalize_linkedin_url(row.get('LinkedIn Profile URL')),
+                (row.get('Email') or '').strip().lower(),
+                int(row.get('attendance_status') == 'attended'),
+                to_int(row.get('qa_questions')),
+                to_int(row.get('poll_responses')),
+                to_int(row.get('emoji_reactions')),
+                (row.get('Registration Date/Time') or '').strip(),
+            )
+
+class LeadHistory:
+    """Connection to the history database (created on first use)"""
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+
+    def record_webinar(self, webinar_id, appearances, source=''):
+        """Replace a webinar's appearances in one transaction; return each appearance's person id (None without BMID)"""
+        appearances = list(appearances)
+        with self.transaction():
+            people = self.resolve([(bmid, url) for bmid, url, *_ in appearances if bmid])
+            rows = [(webinar_id, appearance[0], people[i], *appearance[1:])
+                    for i, appearance in enumerate(appearances) if appearance[0]]
+            self.db.execute('DELETE FROM appearances WHERE webinar_id = ?', (webinar_id,))
+            self.db.executemany('INSERT OR REPLACE INTO appearances VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            self.db.execute('INSERT OR REPLACE INTO webinars VALUES (?, ?, ?, ?)',
+                            (webinar_id, source, time.strftime('%Y-%m-%d %H:%M:%S'), len(rows)))
+        people = iter(people)
+        return [next(people) if appearance[0] else None for appearance in appearances]
+
+    def resolve(self, leads):
+        """Person id per (bmid, linkedin_url) lead; leads sharing a BMID or URL, now or earlier, are one person
+
+        Existing keys are fetched in one query, linked with a union-find in
+        memory, and only new or re-pointed keys are written back. When a lead
+        links two known people, the higher id is merged into the lower.
+        """
+        keys = {key for bmid, url in leads for key in lead_keys(bmid, url)}
+        self.db.execute('CREATE TEMP TABLE IF NOT EXISTS current_keys (key TEXT PRIMARY KEY)')
+        self.db.execute('DELETE FROM current_keys')
+        self.db.executemany('INSERT INTO current_keys VALUES (?)', ((key,) for key in keys))
+        known = dict(self.db.execute('SELECT k.key, k.person_id FROM current_keys c JOIN lead_keys k ON k.key = c.key'))
+        self.db.execute('DELETE FROM current_keys')
+        next_id = (self.db.execute('SELECT MAX(person_id) FROM lead_keys').fetchone()[0] or 0) + 1
+
+        parent = {}
+
+        def find(person):
+            while parent.get(person, person) != person:
+                parent[person] = parent.get(parent[person], parent[person])
+                person = parent[person]
+            return person
+
+        assigned = dict(known)
+        for bmid, url in leads:
+            people = {find(assigned[key]) for key in lead_keys(bmid, url) if key in assigned}
+            if not people:
+                people = {next_id}
+                next_id += 1
+            root = min(people)
+            for person in people:
+                parent[person] = root
+            for key in lead_keys(bmid, url):
+                assigned.setdefault(key, root)
+
+        merged = [(find(person), person) for person in parent if find(person) != person]
+        self.db.executemany('UPDATE lead_keys SET person_id = ? WHERE person_id = ?', merged)
+        self.db.executemany('UPDATE appearances SET person_id = ? WHERE person_id = ?', merged)
+        self.db.executemany('INSERT OR REPLACE INTO lead_keys VALUES (?, ?)',
+                            [(key, find(person)) for key, person in assigned.items()
+                             if known.get(key) != find(person)])
+        return [find(assigned['b:' + bmid]) for bmid, _ in leads]
+
+    def people(self, bmids):
+        """Current person id per BMID (None when blank), reflecting merges made by webinars recorded since"""
+        with self.transaction():
+            self.db.execute('CREATE TEMP TABLE IF NOT EXISTS current_keys (key TEXT PRIMARY KEY)')
+            self.db.execute('DELETE FROM current_keys')
+            self.db.executemany('INSERT OR IGNORE INTO current_keys VALUES (?)', (('b:' + bmid,) for bmid in bmids if bmid))
+            known = dict(self.db.execute('SELECT k.key, k.person_id FROM current_keys c JOIN lead_keys k ON k.key = c.key'))
+            self.db.execute('DELETE FROM current_keys')
+        return [known.get('b:' + bmid) if bmid else None for bmid in bmids]
+
+    def features(self, people):
+        """{person id: (webinars_registered, webinars_attended, total_qa, last_seen)} over every stored webinar"""
+        with self.transaction():
+            self.db.execute('CREATE TEMP TABLE IF NOT EXISTS current_people (person_id INTEGER PRIMARY KEY)')
+            self.db.execute('DELETE FROM current_people')
+            self.db.executemany('INSERT OR IGNORE INTO current_people VALUES (?)',
+                                ((person,) for person in people if person is not None))
+            found = {person: tuple(values) for person, *values in self.db.execute(FEATURES_QUERY)}
+            self.db.execute('DELETE FROM current_people')
+        return found
+
+    def lead(self, bmid=None, linkedin_url=None):
+        """Every appearance of the person a BMID or LinkedIn URL identifies, oldest registration first"""
+        keys = [f'b:{bmid}', f'u:{normalize_linkedin_url(linkedin_url)}']
+        cursor = self.db.execute(
+            'SELECT * FROM appearances WHERE person_id IN (SELECT person_id FROM lead_keys WHERE key IN (?, ?)) '
+            'ORDER BY registered_at', keys)
+        names = [d[0] for d in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def webinars(self):
+        return self.db.execute('SELECT webinar_id, leads, loaded_at FROM webinars ORDER BY loaded_at').fetchall()
+
+    def transaction(self):
+        return Transaction(self.db)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK (takes the write lock up front, so concurrent writers queue instead of deadlocking)"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, exc_type, *exc):
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+def history_clay_import(output_dir, webinar_id, db_path=HISTORY_DB):
+    """Record <output_dir>/webinar_clay_import.csv as `webinar_id`; return [(name, dtype, values)] history columns"""
+    return record_clay_imports([(webinar_id, output_dir)], db_path)[webinar_id]
+
+def record_clay_imports(webinars, db_path=HISTORY_DB):
+    """Record [(webinar_id, output_dir)] in the given order, then return {webinar_id: history columns}
+
+    Features are computed only once every webinar is recorded, so each one
+    sees the same store whatever order its siblings were processed in.
+    """
+    print(f"\n🗃️  Recording lead history ({db_path}, {len(webinars)} webinar(s))...")
+    with LeadHistory(db_path) as history:
+        bmids = {}
+        for webinar_id, output_dir in webinars:
+            appearances = list(read_appearances(os.path.join(output_dir, 'webinar_clay_import.csv')))
+            history.record_webinar(webinar_id, appearances, source=os.path.abspath(output_dir))
+            bmids[webinar_id] = [appearance[0] for appearance in appearances]
+        # A later webinar can merge people an earlier one resolved, so look every id up again
+        people = {webinar_id: history.people(ids) for webinar_id, ids in bmids.items()}
+        found = history.features(person for ids in people.values() for person in ids)
+        stored = len(history.webinars())
+
+    columns = {}
+    for webinar_id, ids in people.items():
+        features = [found.get(person, (0, 0, 0, '')) for person in ids]
+        recorded = sum(person is not None for person in ids)
+        returning = sum(registered > 1 for registered, *_ in features)
+        print(f"     {webinar_id}: {recorded} leads recorded; {returning} seen in other webinars")
+        columns[webinar_id] = [(name, dtype, [values[i] for values in features])
+                               for i, (name, dtype) in enumerate(FEATURE_COLUMNS)]
+    print(f"     {stored} webinars stored")
+    return columns
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-webinar lead history")
+    commands = parser.add_subparsers(dest='command', required=True)
+    load = commands.add_parser('load', help="Record processed outputs (webinar id = directory name)")
+    load.add_argument('db')
+    load.add_argument('directories', nargs='+')
+    show = commands.add_parser('show', help="Show one lead's appearances")
+    show.add_argument('db')
+    show.add_argument('--bmid')
+    show.add_argument('--linkedin-url')
+    args = parser.parse_args()
+
+    with LeadHistory(args.db) as history:
+        if args.command == 'load':
+            for directory in args.directories:
+                clay_file = os.path.join(directory, 'webinar_clay_import.csv')
+                if not os.path.exists(clay_file):
+                    print(f"  ⏭️  {directory}: no webinar_clay_import.csv")
+                    continue
+                webinar_id = os.path.basename(os.path.normpath(directory))
+                people = history.record_webinar(webinar_id, read_appearances(clay_file), source=os.path.abspath(directory))
+                print(f"  ✅ {webinar_id}: {sum(person is not None for person in people)} leads")
+            print(f"🗃️  {args.db}: {len(history.webinars())} webinars")
+        else:
+            if not args.bmid and not args.linkedin_url:
+                parser.error("give --bmid or --linkedin-url")
+            print(json.dumps(history.lead(args.bmid, args.linkedin_url), indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
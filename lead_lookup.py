@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Lead Lookup Service
+===================
+
+Point lookups of a single lead's joined record (attendance, polls, Q&A, CRM
+status, segment) from a processed output, without scanning the CSV.
+
+Usage:
+    python3 lead_lookup.py processed_TIMESTAMP/ --bmid 94a2cd176bfe
+    python3 lead_lookup.py processed_TIMESTAMP/ --email jane@acme.com
+    python3 lead_lookup.py processed_TIMESTAMP/ --domain acme.com --segment seg1_brand_hot_dm
+
+    # Local JSON service for n8n / inbound routing flows
+    python3 lead_lookup.py serve processed_TIMESTAMP/ --port 8770
+    GET /lead/<bmid>
+    GET /leads?email=...&linkedin_url=...&domain=...&segment=...&attendance_status=...&limit=50
+
+    from lead_lookup import LeadStore
+    with LeadStore('processed_TIMESTAMP') as leads:
+        leads.get('94a2cd176bfe')                  # dict or None
+        leads.find(domain='acme.com', segment='seg3_agency_hot')
+
+webinar_clay_import.csv is memory-mapped and records are parsed on demand.
+Secondary indexes map BMID, email, normalized LinkedIn URL, company domain
+(website, email and CRM domain), segment and attendance status to row
+numbers. They are pickled to webinar_clay_import.csv.lookup and rebuilt
+whenever the CSV's size or mtime changes, like the CRM index.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import pickle
+import sys
+from array import array
+
+from crm_index import iter_records, normalize_linkedin_url, parse_record, source_signature
+from identity_resolution import normalize_domain
+
+INDEX_VERSION = 1
+INDEXED_FIELDS = ('bmid', 'email', 'linkedin_url', 'domain', 'segment', 'attendance_status')
+
+def index_keys(record):
+    """(index name, key) pairs a record is filed under"""
+    yield 'bmid', record.get('BMID', '').strip()
+    yield 'email', record.get('Email', '').strip().lower()
+    yield 'linkedin_url', normalize_linkedin_url(record.get('LinkedIn Profile URL', ''))
+    for value in (record.get('Website Domain'), record.get('Email'), record.get('crm_company_domain')):
+        yield 'domain', normalize_domain(value)
+    yield 'segment', record.get('segment', '')
+    yield 'attendance_status', record.get('attendance_status', '')
+
+def normalize_query(field, value):
+    """Normalize a lookup value the same way index_keys() normalized the stored one"""
+    value = value or ''
+    if field == 'email':
+        return value.strip().lower()
+    if field == 'linkedin_url':
+        return normalize_linkedin_url(value)
+    if field == 'domain':
+        return normalize_domain(value)
+    return value.strip()
+
+def build_lookup_index(csv_path):
+    """Scan the CSV once; return (header, record offsets, {index: {key: [row numbers]}})"""
+    offsets = array('Q')
+    indexes = {field: {} for field in INDEXED_FIELDS}
+    with open(csv_path, 'rb') as f:
+        records = iter_records(f)
+        header = parse_record(next(records, (0, b''))[1])
+        for row_number, (offset, raw) in enumerate(records):
+            offsets.append(offset)
+            record = dict(zip(header, parse_record(raw)))
+            for field, key in index_keys(record):
+                if key:
+                    rows = indexes[field].setdefault(key, [])
+                    if not rows or rows[-1] != row_number:
+                        rows.append(row_number)
+        offsets.append(f.tell())
+    return header, offsets, indexes
+
+class LeadStore:
+    """Memory-mapped processed output with secondary indexes for point lookups"""
+
+    def __init__(self, output_dir):
+        self.csv_path = os.path.join(output_dir, 'webinar_clay_import.csv')
+        index_file = self.csv_path + '.lookup'
+        signature = source_signature(self.csv_path)
+
+        self.rebuilt = False
+        loaded = None
+        if os.path.exists(index_file):
+            with open(index_file, 'rb') as f:
+                loaded = pickle.load(f)
+        if not loaded or loaded[0] != (INDEX_VERSION, signature):
+            loaded = ((INDEX_VERSION, signature), *build_lookup_index(self.csv_path))
+            temp_path = index_file + f'.{os.getpid()}.tmp'
+            with open(temp_path, 'wb') as f:
+                pickle.dump(loaded, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, index_file)
+            self.rebuilt = True
+        _, self.header, self.offsets, self.indexes = loaded
+
+        self._csv = open(self.csv_path, 'rb')
+        self.csv_map = mmap.mmap(self._csv.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def record(self, row_number):
+        """Parse one row into a dict"""
+        raw = self.csv_map[self.offsets[row_number]:self.offsets[row_number + 1]]
+        return dict(zip(self.header, parse_record(raw)))
+
+    def rows_for(self, field, value):
+        return self.indexes[field].get(normalize_query(field, value), [])
+
+    def get(self, bmid):
+        """The lead with this BMID, or None"""
+        rows = self.rows_for('bmid', bmid)
+        return self.record(rows[0]) if rows else None
+
+    def find(self, limit=None, **filters):
+        """Leads matching every filter (indexed fields via their index, other columns by equality)
+
+        Candidates come from the most selective indexed filter; the remaining
+        filters are checked on those rows only.
+        """
+        indexed = {field: value for field, value in filters.items() if field in self.indexes}
+        other = {field: value for field, value in filters.items() if field not in self.indexes}
+        if not indexed:
+            raise ValueError(f"at least one of {', '.join(INDEXED_FIELDS)} is required")
+
+        row_sets = sorted((self.rows_for(field, value) for field, value in indexed.items()), key=len)
+        candidates = row_sets[0]
+        for rows in row_sets[1:]:
+            keep = set(rows)
+            candidates = [row for row in candidates if row in keep]
+
+        results = []
+        for row_number in candidates:
+            record = self.record(row_number)
+            if all(record.get(field) == value for field, value in other.items()):
+                results.append(record)
+                if limit and len(results) >= limit:
+                    break
+        return results
+
+    def close(self):
+        self.csv_map.close()
+        self._csv.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def serve(output_dir, port=8770):
+    """Serve GET /lead/<bmid> and GET /leads?<filters> as JSON on localhost"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qsl, unquote, urlsplit
+
+    store = LeadStore(output_dir)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def reply(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path.startswith('/lead/'):
+                lead = store.get(unquote(url.path[len('/lead/'):]))
+                self.reply(200 if lead else 404, lead or {'error': 'not found'})
+            elif url.path == '/leads':
+                filters = dict(parse_qsl(url.query))
+                try:
+                    limit = int(filters.pop('limit', 50))
+                    self.reply(200, store.find(limit=limit, **filters))
+                except ValueError as e:
+                    self.reply(400, {'error': str(e)})
+            else:
+                self.reply(404, {'error': 'use /lead/<bmid> or /leads?<filters>'})
+
+        def log_message(self, *args):
+            pass
+
+    print(f"🔎 Serving {len(store)} leads from {store.csv_path} on http://127.0.0.1:{port}/")
+    with ThreadingHTTPServer(('127.0.0.1', port), Handler) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    store.close()
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        parser = argparse.ArgumentParser(description="Serve lead lookups over HTTP")
+        parser.add_argument('command')
+        parser.add_argument('output_dir')
+        parser.add_argument('--port', type=int, default=8770)
+        args = parser.parse_args()
+        serve(args.output_dir, args.port)
+        return
+
+    parser = argparse.ArgumentParser(description="Look up leads in a processed webinar output")
+    parser.add_argument('output_dir', help="processed_TIMESTAMP/ directory")
+    for field in INDEXED_FIELDS:
+        parser.add_argument(f"--{field.replace('_', '-')}", dest=field)
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    filters = {field: getattr(args, field) for field in INDEXED_FIELDS if getattr(args, field)}
+    if not filters:
+        parser.error("give at least one of " + ', '.join(f"--{f.replace('_', '-')}" for f in INDEXED_FIELDS))
+    with LeadStore(args.output_dir) as store:
+        print(json.dumps(store.find(limit=args.limit, **filters), indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Parallel Chunked CSV Parsing
+============================
+
+Splits large CSV files into ~4 MB chunks at record boundaries and parses the
+chunks on a process pool, so tokenizing big side tables uses every core.
+
+Usage:
+    from parallel_csv import iter_rows, map_chunks
+
+    for row in iter_rows('raw_data/CRM.csv'):   # tuples, in file order
+        ...
+
+    # Run any (path, start, end) -> result function over the chunks, in order
+    for result in map_chunks('raw_data/CRM.csv', count_records):
+        ...
+
+Chunks only end at a newline where the number of quote characters since the
+start of the file is even, so quoted fields with embedded newlines are never
+split (the same rule crm_index.iter_records uses). Files smaller than
+PARALLEL_MIN_BYTES are read serially, where a pool would only add overhead.
+"""
+
+import csv
+import io
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+PARALLEL_MIN_BYTES = 16 * 2**20
+CHUNK_BYTES = 4 * 2**20
+
+def record_boundaries(path, chunk_bytes=CHUNK_BYTES, start=0):
+    """Offsets splitting the file into ~chunk_bytes pieces at record boundaries (first = start, last = size)"""
+    size = os.path.getsize(path)
+    boundaries = [start]
+    if size <= start:
+        return boundaries
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        quotes = 0
+        position = start
+        target = start + chunk_bytes
+        while target < size:
+            quotes += data[position:target].count(b'"')
+            position = target
+            # Advance to the first newline outside a quoted field
+            while True:
+                newline = data.find(b'\n', position)
+                if newline == -1:
+                    position = size
+                    break
+                quotes += data[position:newline + 1].count(b'"')
+                position = newline + 1
+                if quotes % 2 == 0:
+                    break
+            if position >= size:
+                break
+            boundaries.append(position)
+            target = position + chunk_bytes
+
+    boundaries.append(size)
+    return boundaries
+
+def parse_chunk(path, start, end, encoding='utf-8'):
+    """Parse the records in [start, end) into a list of tuples"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode(encoding if start == 0 else 'utf-8')
+    return [tuple(row) for row in csv.reader(io.StringIO(text, newline=''))]
+
+def map_chunks(path, func, start=0, workers=None, chunk_bytes=CHUNK_BYTES):
+    """Yield func(path, chunk_start, chunk_end) for every chunk, in file order
+
+    At most two chunks per worker are in flight, so results never pile up
+    faster than the caller consumes them.
+    """
+    boundaries = record_boundaries(path, chunk_bytes, start)
+    chunks = list(zip(boundaries, boundaries[1:]))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) == 1:
+        for chunk_start, chunk_end in chunks:
+            yield func(path, chunk_start, chunk_end)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        chunks = iter(chunks)
+        for chunk_start, chunk_end in chunks:
+            pending.append(pool.submit(func, path, chunk_start, chunk_end))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            result = pending.popleft().result()
+            for chunk_start, chunk_end in chunks:
+                pending.append(pool.submit(func, path, chunk_start, chunk_end))
+                break
+            yield result
+
+def iter_rows(path, encoding='utf-8', workers=None, min_bytes=PARALLEL_MIN_BYTES):
+    """Yield every CSV row of path as a tuple, parsing large files in parallel"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or os.path.getsize(path) < min_bytes:
+        with open(path, 'r', encoding=encoding, newline='') as f:
+            for row in csv.reader(f):
+                yield tuple(row)
+        return
+
+    for rows in map_chunks(path, partial(parse_chunk, encoding=encoding), workers=workers):
+        yield from rows
@@ -7,541 +7,773 @@ Simple, powerful, straightforward processing of webinar Excel exports into Clay-
 
 Usage:
     python3 process_webinar_data.py "path/to/webinar.xlsx"
+    python3 process_webinar_data.py --watch inbox/   # long-running, one run per new export
 
 Output:
-    - Individual CSV files for each Excel tab (cleaned)
     - webinar_clay_import.csv (comprehensive Clay import file)
     - data_relationships.md (documentation)
 
-Requirements: gnumeric (for Excel conversion)
-Install: brew install gnumeric
+Requirements: none beyond the Python standard library (tabs are streamed
+straight from the workbook XML by xlsx_reader.py)
 """
 
+import csv
+import hashlib
+import json
 import os
+import re
 import sys
-import subprocess
+from datetime import datetime
 from pathlib import Path
 
-def run_command(cmd, description=""):
-    """Run shell command and return success"""
-    try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"❌ {description} failed: {result.stderr}")
-            return False, result.stderr
-        return True, result.stdout
-    except Exception as e:
-        print(f"❌ {description} error: {e}")
-        return False, str(e)
-
-def clean_csv_file(csv_path, filename, dst_path=None):
-    """Clean a CSV file by removing duplicates and null BMIDs"""
-
-    if not os.path.exists(csv_path):
-        return False
-
-    # If no destination path provided, overwrite the source
-    if dst_path is None:
-        dst_path = csv_path
-
-    # Count original lines
-    with open(csv_path, 'r') as f:
-        original_lines = sum(1 for _ in f)
-
-    temp_file = dst_path + '.tmp'
-
-    if filename == 'CRM.csv':
-        # CRM uses linkedin_url, no cleaning needed for now
-        print(f"  {filename}: {original_lines-1} records (CRM data kept as-is)")
-        return True
-
-    # Clean using shell commands (much more reliable than pandas)
-    # Remove lines where BMID is empty (assuming BMID is column 8, 1-indexed)
-    cmd = f"awk -F',' 'NR==1 || $8 != \"\"' '{csv_path}' > '{temp_file}'"
-    success, _ = run_command(cmd, f"Remove null BMIDs from {filename}")
-
-    if not success:
-        return False
-
-    # For most files, remove duplicate BMIDs (keep first occurrence)
-    if filename in ['attend list.csv', 'registered list.csv', 'did not attend list.csv']:
-        # Remove duplicates based on BMID (column 8)
-        cmd = f"awk -F',' '!seen[$8]++' '{temp_file}' > '{dst_path}'"
-        success, _ = run_command(cmd, f"Remove duplicates from {filename}")
-        if not success:
-            return False
-    elif filename == 'emoji eeaction.csv':
-        # Special case: remove ALL records with duplicate BMIDs (data corruption)
-        cmd = f"awk -F',' 'NR==1 || !seen[$8]++' '{temp_file}' > '{dst_path}' && awk -F',' 'seen[$8]++' '{temp_file}' | wc -l"
-        success, output = run_command(cmd, f"Remove duplicate BMIDs from {filename}")
-        if success and 'duplicate' in output.lower():
-            print(f"  {filename}: removed duplicate BMID records")
-    else:
-        # For polls and Q&A, keep all records (multiple per person expected)
-        cmd = f"mv '{temp_file}' '{dst_path}'"
-        run_command(cmd, f"Keep all records in {filename}")
-
-    # Count final lines
-    with open(dst_path, 'r') as f:
-        final_lines = sum(1 for _ in f)
-
-    removed = original_lines - final_lines
-    if removed > 0:
-        print(f"  Cleaned {filename}: removed {removed} records, {final_lines-1} remaining")
-    else:
-        print(f"  {filename}: {final_lines-1} records (no cleaning needed)")
-
-    # Remove temp file
-    if os.path.exists(temp_file):
-        os.remove(temp_file)
-
-    return True
+from account_rollup import rollup_accounts
+from change_capture import advance_manifest, capture_run_changes
+from clay_uploader import upload_clay_import
+from columnar import ColumnarWriter
+from crm_index import CrmIndex, normalize_linkedin_url
+from crm_store import CrmStore, is_store_file, live_records, store_path
+from external_join import external_hash_join
+from identity_resolution import IdentityMatcher
+from lead_history import FEATURE_COLUMNS as HISTORY_COLUMNS, history_clay_import, record_clay_imports
+from parallel_csv import iter_rows
+from profiling import RunProfiler
+from qa_topics import analyze_questions, write_qa_outputs
+from schema import HEADER_MARKERS, RejectLog, clean_value, validate_table
+from scoring import DEFAULT_SCORES, load_score_config, score_clay_import
+from segmentation import segment_clay_import
+from stage_cache import StageCache, digest
+from xlsx_reader import Workbook
+
+# Columns appended to every registrant row by the join (CRM enrichment first, activity second)
+CRM_COLUMNS = [
+    ('crm_first_name', 'first_name'),
+    ('crm_last_name', 'last_name'),
+    ('crm_company_name', 'company_name'),
+    ('crm_company_domain', 'company_domain'),
+    ('crm_industry', 'industry'),
+    ('crm_customer_status', 'customer_status'),
+    ('crm_created_at', 'created_at'),
+    ('crm_last_activity_at', 'last_activity_at'),
+    ('crm_mrr_eur', 'mrr_eur'),
+    ('crm_employees', 'employees'),
+    ('crm_account_tier', 'account_tier'),
+]
+# Low-cardinality CRM columns, interned when the CRM is held in memory
+CATEGORICAL_CRM_COLUMNS = {'industry', 'customer_status', 'account_tier'}
+# How each CRM row was found: 'exact' LinkedIn URL, 'fuzzy' identity match, or '' (no match)
+MATCH_COLUMNS = ['crm_match', 'crm_match_confidence']
+ACTIVITY_COLUMNS = ['attendance_status', 'poll_responses', 'emoji_reactions', 'qa_questions']
+# Attendance metrics carried forward for scoring: from the attend list for attendees, else the registrant's own columns
+ATTENDANCE_COLUMNS = [
+    ('attendance_duration', 'Duration'),
+    ('attendance_engaged', 'Engaged'),
+    ('attendance_chats', 'Chats'),
+    ('attendance_rating', 'Rating'),
+]
+# Interest signal from the Q&A text: the lead's dominant question topic and the upvotes their questions got
+QA_TOPIC_COLUMNS = ['qa_top_topic', 'qa_upvotes']
+# Poll pivot: the lead's latest choice and the seconds they took to answer, per question keyed by a hash of its
+# text (so a combined batch never mixes questions) and listed in poll_questions.json; the registrant export's own
+# survey columns are left as registered
+POLL_ANSWER_COLUMN = 'poll_{}_answer'
+POLL_LATENCY_COLUMN = 'poll_{}_latency_s'
+POLL_LATENCY_PATTERN = re.compile(r'poll_[0-9a-f]{8}_latency_s')
+POLL_QUESTIONS_FILE = 'poll_questions.json'
+POLL_TIME_FORMATS = ('%Y/%m/%d %H:%M:%S.%f', '%Y/%m/%d %H:%M:%S')
+
+# Typed columns of the columnar output (everything else is a string)
+COLUMN_TYPES = {
+    'poll_responses': 'int64',
+    'emoji_reactions': 'int64',
+    'qa_questions': 'int64',
+    'qa_upvotes': 'int64',
+    'crm_mrr_eur': 'float64',
+    'crm_employees': 'int64',
+    'crm_match_confidence': 'float64',
+    'attendance_duration': 'float64',
+    'attendance_engaged': 'float64',
+    'attendance_chats': 'float64',
+    'attendance_rating': 'float64',
+    **dict(HISTORY_COLUMNS),
+}
 
-def create_clay_import(output_dir):
-    """Create the comprehensive Clay import file by joining ALL data sources"""
+EVENT_DATE_PATTERN = re.compile(r'(\d{4})[/-](\d{2})[/-](\d{2})')
+
+# Stage outputs are cached here, keyed by a hash of their inputs
+CACHE_DIR = '.pipeline_cache'
+
+def find_header(rows, markers=HEADER_MARKERS):
+    """Skip a tab's metadata rows; return (fieldnames, iterator over the rows after the header)"""
+    rows = iter(rows)
+    for row in rows:
+        if any(cell.strip() in markers for cell in row):
+            return [cell.strip() for cell in row], rows
+    return [], rows
+
+def read_table(rows, markers=HEADER_MARKERS):
+    """Locate a tab's real header row and return (fieldnames, record iterator)
+
+    Exports prepend a variable number of metadata rows (list title, webinar
+    name, event ID, ...) before the header, so instead of skipping a fixed
+    number of lines the header is the first row naming one of `markers`.
+    Records behave like csv.DictReader rows: blank rows are skipped, missing
+    cells read as '' and overflowing cells are kept under the None key.
+    """
+    fieldnames, rows = find_header(rows, markers)
+
+    def records():
+        width = len(fieldnames)
+        for row in rows:
+            if not any(row):
+                continue
+            record = dict(zip(fieldnames, row))
+            if len(row) < width:
+                for key in fieldnames[len(row):]:
+                    record[key] = ''
+            elif len(row) > width:
+                record[None] = row[width:]
+            yield record
+
+    return fieldnames, records()
+
+def table_rows(source, tab):
+    """Yield raw rows of a tab from an open Workbook or from <source>/<tab>.csv"""
+    if isinstance(source, Workbook):
+        if tab in source.sheet_paths:
+            yield from source.rows(tab)
+        return
+
+    path = os.path.join(source, f'{tab}.csv')
+    if not os.path.exists(path):
+        return
+    yield from iter_rows(path)
+
+def has_table(source, tab):
+    """Check whether a tab exists in the source"""
+    if isinstance(source, Workbook):
+        return tab in source.sheet_paths
+    return os.path.exists(os.path.join(source, f'{tab}.csv'))
+
+def load_crm_index(records):
+    """Load CRM rows keyed by normalized linkedin_url (only the columns the join needs)
+
+    Categorical values are interned so every row shares one string object per distinct value.
+    """
+    crm_data = {}
+    intern_flags = [src in CATEGORICAL_CRM_COLUMNS for _, src in CRM_COLUMNS]
+    for row in records:
+        linkedin_url = normalize_linkedin_url(row.get('linkedin_url', ''))
+        if linkedin_url:
+            values = (row.get(src, '') or '' for _, src in CRM_COLUMNS)
+            crm_data[linkedin_url] = tuple(sys.intern(v) if flag else v for v, flag in zip(values, intern_flags))
+    return crm_data
+
+def load_bmid_set(records):
+    """Collect the set of BMIDs in a list export"""
+    bmids = set()
+    for row in records:
+        bmid = (row.get('BMID') or '').strip()
+        if bmid:
+            bmids.add(bmid)
+    return bmids
+
+def load_attendance_metrics(records):
+    """Map each BMID in the attend list to its ATTENDANCE_COLUMNS values (later duplicates win)"""
+    metrics = {}
+    for row in records:
+        bmid = (row.get('BMID') or '').strip()
+        if bmid:
+            metrics[bmid] = tuple(clean_value(row.get(src)) for _, src in ATTENDANCE_COLUMNS)
+    return metrics
+
+def count_by_bmid(records, value=None):
+    """Aggregate rows per BMID: count them, or sum value(row) when given"""
+    totals = {}
+    for row in records:
+        bmid = (row.get('BMID') or '').strip()
+        if bmid:
+            totals[bmid] = totals.get(bmid, 0) + (value(row) if value else 1)
+    return totals
+
+def poll_timestamp(value):
+    """Seconds since the epoch of a poll Time cell, or None when unparseable"""
+    value = (value or '').strip()
+    for time_format in POLL_TIME_FORMATS:
+        try:
+            return datetime.strptime(value, time_format).timestamp()
+        except ValueError:
+            continue
+    return None
+
+def pivot_polls(records):
+    """Group poll responses by BMID and question in one hash-aggregation pass
+
+    Returns (questions, leads): the question texts in Question # order, and
+    {bmid: (responses, {question: (latest choice, latency seconds)})}.
+    Latency is the lead's first answer minus the question's first answer
+    from anyone (when the poll opened); blank when Time is unparseable.
+    """
+    order = {}     # question -> (Question #, first row)
+    opened = {}    # question -> earliest answer time
+    answers = {}   # (bmid, question) -> [first time, (time, row) of the latest answer, latest choice]
+    counts = {}
+    for n, row in enumerate(records):
+        bmid = (row.get('BMID') or '').strip()
+        if not bmid:
+            continue
+        counts[bmid] = counts.get(bmid, 0) + 1
+        question = clean_value(row.get('Question'))
+        if not question:
+            continue
+        if question not in order:
+            try:
+                order[question] = (float(row.get('Question #') or 'inf'), n)
+            except ValueError:
+                order[question] = (float('inf'), n)
+        timestamp = poll_timestamp(row.get('Time'))
+        if timestamp is not None and timestamp < opened.get(question, float('inf')):
+            opened[question] = timestamp
+        # Unparseable times sort first, so any timed answer counts as later
+        position = (timestamp if timestamp is not None else float('-inf'), n)
+        answer = answers.get((bmid, question))
+        if answer is None:
+            answers[(bmid, question)] = [timestamp, position, clean_value(row.get('Choice'))]
+            continue
+        if timestamp is not None and (answer[0] is None or timestamp < answer[0]):
+            answer[0] = timestamp
+        if position > answer[1]:
+            answer[1], answer[2] = position, clean_value(row.get('Choice'))
+
+    leads = {bmid: (count, {}) for bmid, count in counts.items()}
+    for (bmid, question), (first, _, choice) in answers.items():
+        latency = round(first - opened[question], 1) if first is not None else ''
+        leads[bmid][1][question] = (choice, latency)
+    return sorted(order, key=order.get), leads
+
+def poll_key(question):
+    """Stable 8-hex key of a poll question (case and spacing insensitive), the same in every webinar"""
+    text = ' '.join(question.lower().split())
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=4).hexdigest()
+
+def poll_question_map(questions):
+    """[{key, number, question, answer_column, latency_column}] in question order, as written to poll_questions.json"""
+    return [{'key': poll_key(question), 'number': number, 'question': question,
+             'answer_column': POLL_ANSWER_COLUMN.format(poll_key(question)),
+             'latency_column': POLL_LATENCY_COLUMN.format(poll_key(question))}
+            for number, question in enumerate(questions, 1)]
+
+def write_poll_questions(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, indent=2, ensure_ascii=False)
+
+def emoji_sum(row):
+    """Sum all emoji columns of an emoji reaction row"""
+    return sum(int(float(v or 0)) for k, v in row.items() if k not in ('#', 'First Name', 'Last Name', 'BMID', None))
+
+def clay_schema(fieldnames):
+    """Column types for the columnar copy of the Clay import"""
+    return [(name, COLUMN_TYPES.get(name) or ('float64' if POLL_LATENCY_PATTERN.fullmatch(name) else 'string'))
+            for name in fieldnames]
+
+def table_digest(source, tab, cache):
+    """Fingerprint a tab's content for stage caching"""
+    if not has_table(source, tab):
+        return digest('missing', tab)
+    if isinstance(source, Workbook):
+        return digest('sheet', tab, source.sheet_signature(tab))
+    return cache.file_digest(os.path.join(source, f'{tab}.csv'))
+
+def create_clay_import(output_dir, source='raw_data', crm_file=None, cache=None, columnar=True, profiler=None,
+                       memory_budget=None):
+    """Create the comprehensive Clay import file by joining ALL data sources
+
+    `source` is either a directory of per-tab CSVs (raw_data/ by default) or an
+    open xlsx_reader.Workbook, in which case tabs are streamed straight from
+    the workbook. Side tables (CRM, attendance, polls, emojis, Q&A) are loaded
+    once into indexes keyed by BMID or LinkedIn URL, then the registered list
+    is streamed through every enrichment in a single pass and written once.
+
+    When the CRM is a CSV file (`crm_file`, or <source>/CRM.csv) it is looked
+    up through the persistent memory-mapped CrmIndex instead of being loaded
+    into memory; a workbook CRM tab falls back to an in-memory dict.
+    Registrants whose LinkedIn URL misses are retried through the blocked
+    IdentityMatcher (name, company domain, profile slug) and flagged 'fuzzy'
+    with a confidence score; CRM rows already matched exactly are never
+    fuzzy candidates.
+
+    With `memory_budget` (bytes) the CRM join runs as an external hash join:
+    CRM rows and registrant keys are partitioned into spill files so only one
+    partition is in memory at a time, and the fuzzy matcher only indexes the
+    blocks the unmatched registrants probe (a crm_store.py store loads the
+    identity blocks it keeps up to date instead). The output is identical.
+
+    Each stage (registrant cleaning, CRM join, attendance, poll/emoji/Q&A
+    aggregation) is keyed by a hash of its inputs in `cache` (a StageCache),
+    so unchanged stages are reused instead of recomputed.
+
+    Alongside the CSV a typed columnar copy is written (webinar_clay_import
+    .parquet with pyarrow, else .colz) unless `columnar` is False.
+
+    Every stage is timed through `profiler` (a RunProfiler); the CRM load and
+    identity index build happen lazily inside the join and are recorded as
+    their own stages.
+    """
 
     print("\n🔗 Creating comprehensive Clay import file with ALL data joined...")
 
     clay_file = os.path.join(output_dir, 'webinar_clay_import.csv')
-
-    # Input files (all source files are in raw_data/ with cleaning applied in-memory)
-    registered_file = os.path.join('raw_data', 'registered list.csv')
-    crm_file = os.path.join('raw_data', 'CRM.csv')
-    attend_file = os.path.join('raw_data', 'attend list.csv')
-    dna_file = os.path.join('raw_data', 'did not attend list.csv')
-    polls_file = os.path.join('raw_data', 'poll responses.csv')
-    emoji_file = os.path.join('raw_data', 'emoji eeaction.csv')
-    qa_file = os.path.join('raw_data', 'Q&A transcript.csv')
-
-    # Check required files
-    if not os.path.exists(registered_file):
-        print("❌ Missing registered list.csv")
+    if cache is None:
+        cache = StageCache(enabled=False)
+    if profiler is None:
+        profiler = RunProfiler()
+
+    # Check required tabs
+    if not has_table(source, 'registered list'):
+        print("❌ Missing registered list")
         return False
 
-    if not os.path.exists(crm_file):
-        print("❌ Missing CRM.csv")
-        return False
-
-    # Step 1: Clean registered list (skip metadata row, remove empty BMIDs)
-    print("  📋 Step 1: Cleaning registered list...")
-    temp_registered = os.path.join(output_dir, 'temp_registered_clean.csv')
-
-    try:
-        import csv
-        with open(registered_file, 'r', encoding='utf-8') as f_in, open(temp_registered, 'w', encoding='utf-8', newline='') as f_out:
-            # Read all lines
-            all_lines = f_in.readlines()
-            if len(all_lines) < 3:
-                print("     ERROR: Not enough lines in registered file")
-                return False
-
-            # Use csv.DictReader starting from line 17 (skip 16 metadata lines)
-            # The actual header is at line 17 (0-indexed as 16)
-            reader = csv.DictReader(all_lines[16:])  # Skip first 16 metadata lines
-
-            writer = csv.DictWriter(f_out, fieldnames=reader.fieldnames, quoting=csv.QUOTE_MINIMAL)
-            writer.writeheader()
-
-            for row in reader:
-                # Check if BMID exists and is not empty
-                bmid = row.get('BMID', '').strip()
-                if not bmid:
-                    continue
-
-                # Clean embedded newlines from ALL fields in the row
-                cleaned_row = {}
-                for key, value in row.items():
-                    if value:
-                        # Replace embedded newlines and carriage returns with spaces
-                        cleaned_value = str(value).replace('\n', ' ').replace('\r', ' ').strip()
-                        cleaned_row[key] = cleaned_value
-                    else:
-                        cleaned_row[key] = value
-
-                # Additional cleaning: validate required fields and clean LinkedIn URLs
-                firstname = cleaned_row.get('Firstname', '').strip()
-                lastname = cleaned_row.get('Lastname', '').strip()
-                linkedin_url = cleaned_row.get('LinkedIn Profile URL', '').strip()
-
-                # Skip records with empty names (required for Clay import)
-                if not firstname or not lastname:
-                    continue
-
-                # Clean malformed LinkedIn URLs (set to empty string, keep row for other enrichment)
-                if linkedin_url in ['https://linkedin.com/in/', 'https://www.linkedin.com/in/', 'https://linkedin.com/', 'https://www.linkedin.com/']:
-                    cleaned_row['LinkedIn Profile URL'] = ''
-
-                writer.writerow(cleaned_row)
-
-        print(f"  ✅ Cleaned registered list")
-    except Exception as e:
-        print(f"❌ Cleaning error: {e}")
-        return False
-
-    # Step 2: Join with CRM data using LinkedIn URL
-    print("  📋 Step 2: Joining CRM data...")
-    temp_crm = os.path.join(output_dir, 'temp_crm_joined.csv')
-    awk_crm_join = r"""
-BEGIN {FS=","; OFS=","}
-NR==FNR {
-    if(NR>1) {
-        # CRM data: linkedin_url,first_name,last_name,company_name,domain,industry,customer_status,...
-        crm[$1] = $2","$3","$4","$5","$6","$7","$8","$9","$10","$11","$12","$13","$14","$15","$16","$17
-    }
-    next
-}
-{
-    if(NR==1) {
-        print $1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,"crm_first_name","crm_last_name","crm_company","crm_domain","crm_industry","crm_customer_status","crm_created_date","crm_last_activity","crm_mrr_eur","crm_employees","crm_account_tier","crm_linkedin_url","crm_website","crm_country","crm_city","attendance_status","poll_responses","emoji_reactions","qa_questions"
-    } else {
-        linkedin_key = $11
-        if(linkedin_key in crm) {
-            split(crm[linkedin_key], crm_fields, ",")
-            print $1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,crm_fields[1],crm_fields[2],crm_fields[3],crm_fields[4],crm_fields[5],crm_fields[6],crm_fields[7],crm_fields[8],crm_fields[9],crm_fields[10],crm_fields[11],crm_fields[12],crm_fields[13],crm_fields[14],crm_fields[15],"","","",""
-        } else {
-            print $1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,"","","","","","","","","","","","","","","","","","","",""
-        }
-    }
-}
-"""
-    # Use Python for CSV processing
-    try:
-        import csv
-
-        # Load CRM data
-        crm_data = {}
-        crm_count = 0
-        with open(crm_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                linkedin_url = row.get('linkedin_url', '').strip()
-                if linkedin_url:
-                    # Normalize URL
-                    linkedin_url = linkedin_url.replace('https://www.linkedin.com/in/', 'https://linkedin.com/in/')
-                    crm_data[linkedin_url] = row
-                    crm_count += 1
-        print(f"     Loaded {crm_count} CRM records")
-
-        # Process registered list
-        with open(temp_registered, 'r', encoding='utf-8') as f_in, open(temp_crm, 'w', encoding='utf-8', newline='') as f_out:
-            reader = csv.DictReader(f_in)
-
-            fieldnames = list(reader.fieldnames) + [
-                'crm_first_name', 'crm_last_name', 'crm_company_name', 'crm_company_domain',
-                'crm_industry', 'crm_customer_status', 'crm_created_at', 'crm_last_activity_at',
-                'crm_mrr_eur', 'crm_employees', 'crm_account_tier', 'attendance_status',
-                'poll_responses', 'emoji_reactions', 'qa_questions'
-            ]
-
-            writer = csv.DictWriter(f_out, fieldnames=fieldnames)
-            writer.writeheader()
-
-            match_count = 0
-            for row in reader:
-                linkedin_key = row.get('LinkedIn Profile URL', '').strip()
-                linkedin_key = linkedin_key.replace('https://www.linkedin.com/in/', 'https://linkedin.com/in/')
-
-                if linkedin_key and linkedin_key in crm_data:
-                    match_count += 1
-                    crm = crm_data[linkedin_key]
-                    row.update({
-                        'crm_first_name': crm.get('first_name', ''),
-                        'crm_last_name': crm.get('last_name', ''),
-                        'crm_company_name': crm.get('company_name', ''),
-                        'crm_company_domain': crm.get('company_domain', ''),
-                        'crm_industry': crm.get('industry', ''),
-                        'crm_customer_status': crm.get('customer_status', ''),
-                        'crm_created_at': crm.get('created_at', ''),
-                        'crm_last_activity_at': crm.get('last_activity_at', ''),
-                        'crm_mrr_eur': crm.get('mrr_eur', ''),
-                        'crm_employees': crm.get('employees', ''),
-                        'crm_account_tier': crm.get('account_tier', '')
-                    })
-                else:
-                    # Initialize activity columns
-                    row['attendance_status'] = ''
-                    row['poll_responses'] = 0
-                    row['emoji_reactions'] = 0
-                    row['qa_questions'] = 0
-
-                # Ensure only expected fields are written
-                clean_row = {k: str(row.get(k, '')).replace('\n', ' ').replace('\r', ' ').strip() for k in fieldnames}
-                writer.writerow(clean_row)
-
-        print(f"     CRM matches found: {match_count}")
-        success = True
-    except Exception as e:
-        print(f"❌ CRM join error: {e}")
-        success = False
+    if crm_file is None and not isinstance(source, Workbook) and has_table(source, 'CRM'):
+        crm_file = os.path.join(source, 'CRM.csv')
 
-    if not success:
+    if crm_file is None and not has_table(source, 'CRM'):
+        print("❌ Missing CRM")
         return False
 
-    # Step 3: Add attendance status
-    print("  📋 Step 3: Adding attendance status...")
-    temp_attendance = os.path.join(output_dir, 'temp_attendance.csv')
-
+    # Every tab goes through its schema (schema.py); dropped rows and cleared cells land in rejects.csv
+    rejects = RejectLog()
+
+    def records(tab):
+        fieldnames, rows = validate_table(table_rows(source, tab), tab, rejects)
+        return (dict(zip(fieldnames, row)) for row in rows)
+
+    # A crm_store.py store is keyed on its state and keeps its identity blocks itself, so nothing rescans it
+    crm_store = CrmStore(os.path.dirname(crm_file)) if crm_file and is_store_file(crm_file) else None
+
+    def crm_records():
+        if not crm_file:
+            yield from records('CRM')
+            return
+        if crm_store:
+            yield from live_records(crm_file)
+            return
+        yield from read_table(iter_rows(crm_file, encoding='utf-8-sig'))[1]
+
+    def crm_identities():
+        if crm_store:
+            return crm_store.identities()
+        return cache.cached('crm_identities', digest('crm_identities', crm_key),
+                            lambda: IdentityMatcher.build(crm_records()))
+
+    # Step 1: Load side tables into indexes (reused from cache when their tabs are unchanged)
+    print("  📋 Step 1: Loading attendance and activity indexes...")
     try:
-        # Load attendance data (skip metadata row)
-        attend_bmids = set()
-        dna_bmids = set()
-
-        if os.path.exists(attend_file):
-            with open(attend_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                if len(lines) >= 2:
-                    reader = csv.DictReader(lines[1:])  # Skip first metadata row
-                    for row in reader:
-                        bmid = row.get('BMID', '').strip()
-                        if bmid:
-                            attend_bmids.add(bmid)
-
-        if os.path.exists(dna_file):
-            with open(dna_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                if len(lines) >= 2:
-                    reader = csv.DictReader(lines[1:])  # Skip first metadata row
-                    for row in reader:
-                        bmid = row.get('BMID', '').strip()
-                        if bmid:
-                            dna_bmids.add(bmid)
-
-        # Update CRM joined file with attendance status
-        with open(temp_crm, 'r', encoding='utf-8') as f_in, open(temp_attendance, 'w', encoding='utf-8', newline='') as f_out:
-            reader = csv.DictReader(f_in)
-            writer = csv.DictWriter(f_out, fieldnames=reader.fieldnames, quoting=csv.QUOTE_MINIMAL)
-            writer.writeheader()
-
-            for row in reader:
-                bmid = row.get('BMID', '').strip()
-                if bmid in attend_bmids:
-                    row['attendance_status'] = 'attended'
-                elif bmid in dna_bmids:
-                    row['attendance_status'] = 'did_not_attend'
-                else:
-                    row['attendance_status'] = 'registered_only'
-
-                clean_row = {k: str(row.get(k, '')).replace('\n', ' ').replace('\r', ' ').strip() for k in writer.fieldnames}
-                writer.writerow(clean_row)
-
-        print("  ✅ Attendance status added")
+        tab_keys = {tab: table_digest(source, tab, cache) for tab in
+                    ('registered list', 'attend list', 'did not attend list', 'poll responses', 'emoji eeaction', 'Q&A transcript')}
+        if crm_store:
+            crm_key = digest('crm_store', crm_store.state_key())
+        else:
+            crm_key = cache.file_digest(crm_file) if crm_file else table_digest(source, 'CRM', cache)
+
+        with profiler.stage('attendance') as stage:
+            attend_metrics, dna_bmids = cache.cached(
+                'attendance', digest('attendance', tab_keys['attend list'], tab_keys['did not attend list']),
+                lambda: (load_attendance_metrics(records('attend list')), load_bmid_set(records('did not attend list'))))
+            stage.rows_out = len(attend_metrics) + len(dna_bmids)
+        with profiler.stage('polls') as stage:
+            poll_questions, poll_leads = cache.cached(
+                'polls', digest('poll_pivot', tab_keys['poll responses']),
+                lambda: pivot_polls(records('poll responses')))
+            stage.rows_in, stage.rows_out = sum(count for count, _ in poll_leads.values()), len(poll_leads)
+            stage.extra['questions'] = len(poll_questions)
+        with profiler.stage('emoji') as stage:
+            emoji_totals = cache.cached(
+                'emoji', digest('emoji', tab_keys['emoji eeaction']),
+                lambda: count_by_bmid(records('emoji eeaction'), emoji_sum))
+            stage.rows_out = len(emoji_totals)
+        with profiler.stage('qa') as stage:
+            qa_counts = cache.cached(
+                'qa', digest('qa', tab_keys['Q&A transcript']),
+                lambda: count_by_bmid(records('Q&A transcript')))
+            stage.rows_in, stage.rows_out = sum(qa_counts.values()), len(qa_counts)
+        with profiler.stage('qa_topics') as stage:
+            qa_analysis = cache.cached(
+                'qa_topics', digest('qa_topics', tab_keys['Q&A transcript']),
+                lambda: analyze_questions(records('Q&A transcript')))
+            qa_topics = qa_analysis['leads']
+            stage.rows_in, stage.rows_out = len(qa_analysis['questions']), len(qa_analysis['topics'])
     except Exception as e:
-        print(f"❌ Attendance join error: {e}")
+        print(f"❌ Index loading error: {e}")
         return False
 
-    # Step 4: Aggregate poll responses
-    print("  📋 Step 4: Aggregating poll responses...")
-    temp_polls = os.path.join(output_dir, 'temp_polls.csv')
-
-    try:
-        # Load poll data
-        poll_counts = {}
-        if os.path.exists(polls_file):
-            with open(polls_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    bmid = row.get('BMID', '').strip()
-                    if bmid:
-                        poll_counts[bmid] = poll_counts.get(bmid, 0) + 1
-
-        # Update attendance file with poll counts
-        with open(temp_attendance, 'r', encoding='utf-8') as f_in, open(temp_polls, 'w', encoding='utf-8', newline='') as f_out:
-            reader = csv.DictReader(f_in)
-            writer = csv.DictWriter(f_out, fieldnames=reader.fieldnames, quoting=csv.QUOTE_MINIMAL)
-            writer.writeheader()
-
-            for row in reader:
-                bmid = row.get('BMID', '').strip()
-                row['poll_responses'] = poll_counts.get(bmid, 0)
-                clean_row = {k: str(row.get(k, '')).replace('\n', ' ').replace('\r', ' ').strip() for k in writer.fieldnames}
-                writer.writerow(clean_row)
-
-        print("  ✅ Poll responses aggregated")
-    except Exception as e:
-        print(f"❌ Poll aggregation error: {e}")
-        return False
-
-    # Step 5: Aggregate emoji reactions
-    print("  📋 Step 5: Aggregating emoji reactions...")
-    temp_emoji = os.path.join(output_dir, 'temp_emoji.csv')
-
-    try:
-        # Load emoji data
-        emoji_totals = {}
-        if os.path.exists(emoji_file):
-            with open(emoji_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    bmid = row.get('BMID', '').strip()
-                    if bmid:
-                        # Sum all emoji columns
-                        emoji_cols = [col for col in row.keys() if col not in ['#', 'First Name', 'Last Name', 'BMID']]
-                        emoji_sum = sum(int(row.get(col, 0) or 0) for col in emoji_cols)
-                        emoji_totals[bmid] = emoji_totals.get(bmid, 0) + emoji_sum
-
-        # Update polls file with emoji counts
-        with open(temp_polls, 'r', encoding='utf-8') as f_in, open(temp_emoji, 'w', encoding='utf-8', newline='') as f_out:
-            reader = csv.DictReader(f_in)
-            writer = csv.DictWriter(f_out, fieldnames=reader.fieldnames, quoting=csv.QUOTE_MINIMAL)
-            writer.writeheader()
-
-            for row in reader:
-                bmid = row.get('BMID', '').strip()
-                row['emoji_reactions'] = emoji_totals.get(bmid, 0)
-                clean_row = {k: str(row.get(k, '')).replace('\n', ' ').replace('\r', ' ').strip() for k in writer.fieldnames}
-                writer.writerow(clean_row)
-
-        print("  ✅ Emoji reactions aggregated")
-    except Exception as e:
-        print(f"❌ Emoji aggregation error: {e}")
-        return False
-
-    # Step 6: Aggregate Q&A questions
-    print("  📋 Step 6: Aggregating Q&A questions...")
-    temp_qa = os.path.join(output_dir, 'temp_qa.csv')
-
-    try:
-        # Load Q&A data
-        qa_counts = {}
-        if os.path.exists(qa_file):
-            with open(qa_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    bmid = row.get('BMID', '').strip()
-                    if bmid:
-                        qa_counts[bmid] = qa_counts.get(bmid, 0) + 1
-
-        # Update emoji file with Q&A counts
-        with open(temp_emoji, 'r', encoding='utf-8') as f_in, open(temp_qa, 'w', encoding='utf-8', newline='') as f_out:
-            reader = csv.DictReader(f_in)
-            writer = csv.DictWriter(f_out, fieldnames=reader.fieldnames, quoting=csv.QUOTE_MINIMAL)
-            writer.writeheader()
-
-            for row in reader:
-                bmid = row.get('BMID', '').strip()
-                row['qa_questions'] = qa_counts.get(bmid, 0)
-                clean_row = {k: str(row.get(k, '')).replace('\n', ' ').replace('\r', ' ').strip() for k in writer.fieldnames}
-                writer.writerow(clean_row)
-
-        print("  ✅ Q&A questions aggregated")
-    except Exception as e:
-        print(f"❌ Q&A aggregation error: {e}")
-        return False
-
-    # Step 7: Clean URLs and finalize
-    print("  📋 Step 7: Final cleanup and URL cleaning...")
-    temp_final = os.path.join(output_dir, 'temp_final.csv')
-    cmd = f"awk -F',' 'BEGIN{{OFS=\",\"}} {{if(NR==1) print $0; else {{$11 = ($11 == \"https://linkedin.com/in/\" || $11 == \"https://www.linkedin.com/in/\") ? \"\" : $11; $22 = ($22 == \"https://linkedin.com/in/\" || $22 == \"https://www.linkedin.com/in/\") ? \"\" : $22; print $0}}}}' '{temp_qa}' > '{temp_final}'"
-    success, _ = run_command(cmd, "Clean incomplete LinkedIn URLs")
-
-    if success:
-        cmd = f"mv '{temp_final}' '{clay_file}'"
-        run_command(cmd, "Create final comprehensive Clay import file")
-    else:
-        cmd = f"mv '{temp_qa}' '{clay_file}'"
-        run_command(cmd, "Create final Clay import file (without URL cleaning)")
-
-        # Clean up temp files
-        temp_files = [temp_registered, temp_crm, temp_attendance, temp_polls, temp_emoji, temp_qa]
-        for temp_file in temp_files:
-            try:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-            except:
-                pass  # Ignore cleanup errors
-
-    # Count final statistics
-    crm_matches = 0
-    attended_count = 0
-    dna_count = 0
-    poll_participants = 0
-    emoji_participants = 0
-    qa_participants = 0
-    total_records = 0
-
-    with open(clay_file, 'r') as f:
-        for line_num, line in enumerate(f, 1):
-            if line_num == 1:
+    print(f"     Attendance: {len(attend_metrics)} attended, {len(dna_bmids)} did not attend")
+    print(f"     Activity: {len(poll_leads)} poll, {len(emoji_totals)} emoji, {len(qa_counts)} Q&A participants")
+    if poll_questions:
+        print(f"     Poll questions: {len(poll_questions)} ({'; '.join(poll_questions)})")
+    print(f"     Q&A topics: {', '.join(topic['label'] for topic in qa_analysis['topics']) or 'none'}")
+
+    # Step 2: Stream registrants through all joins and write the final file once
+    print("  📋 Step 2: Joining registrants in a single pass...")
+    crm_columns = [src for _, src in CRM_COLUMNS]
+    empty_crm = ('',) * len(CRM_COLUMNS)
+    stats = {'total': 0, 'crm': 0, 'fuzzy': 0, 'attended': 0, 'did_not_attend': 0, 'polls': 0, 'emoji': 0, 'qa': 0}
+    crm_data = None
+    column_writer = None
+    spill_file = None
+
+    def build_registrants():
+        fields, registered_rows = validate_table(table_rows(source, 'registered list'), 'registered list', rejects)
+        yield fields
+        yield from registered_rows
+
+    def build_crm_join(rows):
+        nonlocal crm_data
+        with profiler.stage('crm_load') as stage:
+            if crm_file:
+                crm_data = CrmIndex(crm_file, columns=crm_columns)
+                stage.extra['index_rebuilt'] = crm_data.rebuilt
+                if crm_data.rebuilt:
+                    print(f"     Rebuilt CRM index: {crm_file}.idx")
+            else:
+                crm_data = cache.cached('crm_rows', digest('crm_rows', crm_key), lambda: load_crm_index(records('CRM')))
+            stage.rows_out = len(crm_data)
+        print(f"     Loaded {len(crm_data)} CRM records")
+        positions = {name: i for i, name in enumerate(registered_fields)}
+
+        # Exact pass first: CRM rows claimed by an exact URL match are not offered to the fuzzy pass
+        results = []
+        exact_keys = set()
+        for row in rows:
+            field = lambda name: row[positions[name]] if name in positions else ''
+            key = normalize_linkedin_url(field('LinkedIn Profile URL'))
+            crm = crm_data.get(key)
+            if crm:
+                exact_keys.add(key)
+                results.append((True, crm))
+            else:
+                results.append((False, (field('Firstname'), field('Lastname'), (field('Website Domain'), field('Email')),
+                                        field('LinkedIn Profile URL'))))
+        # Per row: a registrant URL repeated across rows must not make an all-exact join build the index
+        if any(not exact for exact, _ in results):
+            with profiler.stage('identity_index') as stage:
+                matcher = crm_identities()
+                stage.rows_out = len(matcher)
+
+        for i, (exact, result) in enumerate(results):
+            results[i] = None
+            # Leading columns record how the row matched so unmatched rows stay distinguishable from blank CRM fields
+            if exact:
+                yield ['exact', '1.0', *result]
                 continue
-            total_records += 1
-            fields = line.strip().split(',')
-
-            # CRM match (column 17: crm_customer_status)
-            if len(fields) > 16 and fields[16].strip():
-                crm_matches += 1
-
-            # Attendance status (column 26)
-            if len(fields) > 25:
-                if fields[25] == 'attended':
-                    attended_count += 1
-                elif fields[25] == 'did_not_attend':
-                    dna_count += 1
-
-            # Activity counts
-            if len(fields) > 26 and fields[26] and fields[26] != '0':
-                poll_participants += 1
-            if len(fields) > 27 and fields[27] and fields[27] != '0':
-                emoji_participants += 1
-            if len(fields) > 28 and fields[28] and fields[28] != '0':
-                qa_participants += 1
-
+            first, last, domains, url = result
+            match = matcher.match(first, last, domains=domains, url=url, exclude=exact_keys)
+            crm = crm_data.get(match[0]) if match else None
+            yield ['fuzzy', str(match[1]), *crm] if crm else ['', '', *empty_crm]
+
+    def build_external_crm_join(registrants_path):
+        positions = {name: i for i, name in enumerate(registered_fields)}
+        identity_fields = ['Firstname', 'Lastname', 'Website Domain', 'Email', 'LinkedIn Profile URL']
+
+        def registrants():
+            with open(registrants_path, 'r', encoding='utf-8', newline='') as f:
+                for row in csv.reader(f):
+                    yield [row[positions[name]] if name in positions else '' for name in identity_fields]
+
+        def crm_pairs(keys=None):
+            for record in crm_records():
+                key = normalize_linkedin_url(record.get('linkedin_url', ''))
+                if key and (keys is None or key in keys):
+                    yield [key, *(record.get(src, '') or '' for src in crm_columns)]
+
+        if crm_file:
+            crm_bytes = os.path.getsize(crm_file)
+        else:
+            # Sheet XML is larger than the CSV it holds, so this errs towards more partitions
+            crm_bytes = source.zf.getinfo(source.sheet_paths['CRM']).file_size
+
+        # Pass 1: exact join through disk partitions; remember only the misses
+        with profiler.stage('crm_load') as stage:
+            results_path = registrants_path + '.crm'
+            misses = {}
+            exact_keys = set()
+            total = 0
+            with open(results_path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                values = external_hash_join((normalize_linkedin_url(r[4]) for r in registrants()), crm_pairs(),
+                                            memory_budget, crm_bytes, spill_dir=os.path.dirname(registrants_path))
+                for i, (crm, identity) in enumerate(zip(values, registrants())):
+                    if crm is None:
+                        misses[i] = identity
+                    else:
+                        exact_keys.add(normalize_linkedin_url(identity[4]))
+                    writer.writerow(['exact', '1.0', *crm] if crm is not None else ['', '', *empty_crm])
+                    total += 1
+            stage.rows_in, stage.rows_out = total, total - len(misses)
+
+        # Pass 2: fuzzy-match the misses against only the CRM blocks they probe
+        fuzzy = {}
+        if misses:
+            with profiler.stage('identity_index') as stage:
+                queries = {i: (first, last, (domain, email), url) for i, (first, last, domain, email, url) in misses.items()}
+                if crm_store:
+                    matcher = crm_store.identities()
+                else:
+                    blocks = set()
+                    for first, last, domains, url in queries.values():
+                        blocks.update(IdentityMatcher.query_blocks(first, last, domains, url))
+                    matcher = IdentityMatcher.build(crm_records(), blocks=blocks)
+                stage.rows_out = len(matcher)
+            matches = {i: matcher.match(first, last, domains=domains, url=url, exclude=exact_keys)
+                       for i, (first, last, domains, url) in queries.items()}
+            matches = {i: match for i, match in matches.items() if match}
+            matched_rows = {key: values for key, *values in crm_pairs({key for key, _ in matches.values()})}
+            fuzzy = {i: ['fuzzy', str(confidence), *matched_rows[key]] for i, (key, confidence) in matches.items()}
+
+        with open(results_path, 'r', encoding='utf-8', newline='') as f:
+            for i, row in enumerate(csv.reader(f)):
+                yield fuzzy.get(i, row)
+        os.remove(results_path)
+
+    with profiler.stage('join') as stage:
+        try:
+            registrants_key = digest('registrants', tab_keys['registered list'])
+            registrant_rows = cache.cached_rows('registrants', registrants_key, build_registrants)
+            registered_fields = next(registrant_rows)
+            bmid_pos = registered_fields.index('BMID')
+            fieldnames = (registered_fields + [name for name, _ in CRM_COLUMNS] + MATCH_COLUMNS + ACTIVITY_COLUMNS
+                          + [name for name, _ in ATTENDANCE_COLUMNS] + QA_TOPIC_COLUMNS
+                          + [column.format(poll_key(question)) for question in poll_questions
+                             for column in (POLL_ANSWER_COLUMN, POLL_LATENCY_COLUMN)])
+            metric_positions = [registered_fields.index(src) if src in registered_fields else None
+                                for _, src in ATTENDANCE_COLUMNS]
+
+            crm_join_key = digest('crm_join', registrants_key, crm_key)
+            if cache.has_rows('crm_join', crm_join_key):
+                rows = registrant_rows
+                crm_rows = cache.cached_rows('crm_join', crm_join_key, None)
+            elif memory_budget:
+                # Spill the registrants so both the join and the writer can stream them without holding them in memory
+                spill_path = os.path.join(output_dir, '.registrants.spill')
+                with open(spill_path, 'w', encoding='utf-8', newline='') as f:
+                    csv.writer(f).writerows(registrant_rows)
+                spill_file = open(spill_path, 'r', encoding='utf-8', newline='')
+                rows = csv.reader(spill_file)
+                crm_rows = cache.cached_rows('crm_join', crm_join_key, lambda: build_external_crm_join(spill_path))
+            else:
+                # The CRM join reads every registrant before yielding (exact pass before the fuzzy pass), so the
+                # registrants are held in memory here; --memory-budget spills them to disk instead
+                rows = list(registrant_rows)
+                crm_rows = cache.cached_rows('crm_join', crm_join_key, lambda: build_crm_join(rows))
+
+            column_writer = ColumnarWriter(os.path.splitext(clay_file)[0], clay_schema(fieldnames)) if columnar else None
+
+            with open(clay_file, 'w', encoding='utf-8', newline='') as f_out:
+                writer = csv.writer(f_out, quoting=csv.QUOTE_MINIMAL)
+                writer.writerow(fieldnames)
+
+                for row in rows:
+                    matched, confidence, *crm = next(crm_rows)
+                    bmid = row[bmid_pos]
+
+                    if bmid in attend_metrics:
+                        attendance_status = 'attended'
+                        metrics = attend_metrics[bmid]
+                    elif bmid in dna_bmids:
+                        attendance_status = 'did_not_attend'
+                    else:
+                        attendance_status = 'registered_only'
+                    if attendance_status != 'attended':
+                        metrics = [row[pos].strip() if pos is not None and pos < len(row) else ''
+                                   for pos in metric_positions]
+
+                    polls, answered = poll_leads.get(bmid, (0, {}))
+                    emojis = emoji_totals.get(bmid, 0)
+                    questions = qa_counts.get(bmid, 0)
+                    top_topic, upvotes = qa_topics.get(bmid, ('', 0))
+                    poll_values = [value for q in poll_questions for value in answered.get(q, ('', ''))]
+
+                    out_row = (row + [clean_value(v) for v in crm] + [matched, confidence]
+                               + [attendance_status, polls, emojis, questions] + list(metrics) + [top_topic, upvotes]
+                               + poll_values)
+                    writer.writerow(out_row)
+                    if column_writer:
+                        column_writer.write_row(out_row)
+
+                    stats['total'] += 1
+                    stats['crm'] += bool(matched)
+                    stats['fuzzy'] += matched == 'fuzzy'
+                    stats[attendance_status] = stats.get(attendance_status, 0) + 1
+                    stats['polls'] += polls > 0
+                    stats['emoji'] += emojis > 0
+                    stats['qa'] += questions > 0
+
+                # Finish the CRM stream so its cache entry is committed
+                for _ in crm_rows:
+                    pass
+
+            if column_writer:
+                column_writer.close()
+        except Exception as e:
+            print(f"❌ Join error: {e}")
+            return False
+        finally:
+            if isinstance(crm_data, CrmIndex):
+                crm_data.close()
+            if spill_file:
+                spill_file.close()
+                os.remove(spill_file.name)
+        stage.rows_in = stage.rows_out = stats['total']
+        stage.extra.update(crm_matched=stats['crm'], fuzzy_matched=stats['fuzzy'], cache_hits=list(cache.hits))
+
+    # Searchable question text and topic summary (python3 qa_topics.py search "...")
+    write_qa_outputs(output_dir, qa_analysis)
+    # Which question each poll_<key>_* column holds
+    write_poll_questions(os.path.join(output_dir, POLL_QUESTIONS_FILE), poll_question_map(poll_questions))
+
+    # Tabs served from cache were not re-validated this run; their rejects are cached alongside
+    for tab, key in tab_keys.items():
+        if tab in rejects.entries:
+            cache.save('rejects', digest('rejects', key), rejects.entries[tab])
+        else:
+            rejects.entries[tab] = cache.load('rejects', digest('rejects', key), record=False) or []
+    rejected = rejects.write(os.path.join(output_dir, 'rejects.csv'), tabs=list(tab_keys))
+
+    if cache.hits:
+        print(f"     ♻️  Reused cached stages: {', '.join(cache.hits)}")
+
+    total_records = stats['total'] or 1
     print("  ✅ Created comprehensive Clay import file with ALL data joined")
-    print(f"     Total records: {total_records}")
-    print(f"     CRM enriched: {crm_matches} ({crm_matches/total_records*100:.1f}%)")
-    print(f"     Attended: {attended_count} ({attended_count/total_records*100:.1f}%)")
-    print(f"     Did not attend: {dna_count} ({dna_count/total_records*100:.1f}%)")
-    print(f"     Poll participants: {poll_participants} ({poll_participants/total_records*100:.1f}%)")
-    print(f"     Emoji reactors: {emoji_participants} ({emoji_participants/total_records*100:.1f}%)")
-    print(f"     Q&A askers: {qa_participants} ({qa_participants/total_records*100:.1f}%)")
+    print(f"     Total records: {stats['total']}")
+    print(f"     CRM enriched: {stats['crm']} ({stats['crm']/total_records*100:.1f}%), {stats['fuzzy']} via fuzzy identity match")
+    print(f"     Attended: {stats['attended']} ({stats['attended']/total_records*100:.1f}%)")
+    print(f"     Did not attend: {stats['did_not_attend']} ({stats['did_not_attend']/total_records*100:.1f}%)")
+    print(f"     Poll participants: {stats['polls']} ({stats['polls']/total_records*100:.1f}%)")
+    print(f"     Emoji reactors: {stats['emoji']} ({stats['emoji']/total_records*100:.1f}%)")
+    print(f"     Q&A askers: {stats['qa']} ({stats['qa']/total_records*100:.1f}%)")
+    if column_writer:
+        print(f"     Columnar copy: {column_writer.path}")
+    if rejected:
+        summary = []
+        for tab in tab_keys:
+            counts = rejects.counts(tab)
+            if counts:
+                summary.append(f"{tab} " + ', '.join(f"{n} {action}" for action, n in sorted(counts.items())))
+        print(f"     ⚠️  Validation: {'; '.join(summary)} (see rejects.csv)")
 
     return True
 
-def process_excel_file(excel_path):
-    """Process Excel file into CSVs using ssconvert"""
+def process_excel_file(excel_path, crm_file=None, use_cache=True, processing_dir=None, profiler=None, memory_budget=None,
+                       cache=None, webhook_url=None, score_config=DEFAULT_SCORES, history_db=None, webinar_id=None):
+    """Process an Excel export by streaming its tabs straight into the join
+
+    `crm_file` points at an external CRM.csv to join through the persistent
+    CRM index instead of the workbook's CRM tab. Stage outputs are cached in
+    .pipeline_cache/ and reused when their inputs are unchanged, unless
+    `use_cache` is False; pass a long-lived `cache` (StageCache) to share it
+    across runs. Outputs go to `processing_dir`, a new
+    processed_<timestamp>/ directory by default. Per-stage metrics from
+    `profiler` (a RunProfiler) are written to run_report.json. A
+    `memory_budget` in bytes switches the CRM join to the external hash join.
+    Engagement/intent scores and their percentiles are computed from
+    `score_config` (see scoring.py). With `history_db` every lead is
+    recorded in that lead history database under `webinar_id` (default: the
+    export's Event ID) and gets its cross-webinar history columns (see
+    lead_history.py). Inserted/updated/deleted leads against the webinar's
+    previous run are written to changes/ (see change_capture.py) and leads
+    are rolled up per company domain into accounts.csv (see account_rollup.py). With
+    `webhook_url` the changed rows are pushed to that webhook in batches
+    (see clay_uploader.py).
+    """
 
     if not os.path.exists(excel_path):
         print(f"❌ Excel file not found: {excel_path}")
         return False
 
     # Create timestamped processing directory
-    from datetime import datetime
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    processing_dir = f"processed_{timestamp}"
+    if processing_dir is None:
+        from datetime import datetime
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        processing_dir = f"processed_{timestamp}"
 
-    # Ensure raw_data directory exists
-    os.makedirs("raw_data", exist_ok=True)
     os.makedirs(processing_dir, exist_ok=True)
+    if profiler is None:
+        profiler = RunProfiler()
 
     print(f"🚀 Processing webinar data from: {excel_path}")
     print(f"📁 Processing directory: {processing_dir}")
-    print(f"🎯 Final output: raw_data/webinar_clay_import.csv")
 
-    # Check if ssconvert is available
-    success, _ = run_command("which ssconvert", "Check ssconvert availability")
-    if not success:
-        print("❌ ssconvert not found. Install with: brew install gnumeric")
+    # Read tabs directly from the workbook XML (no ssconvert, no intermediate CSVs)
+    print("\n📊 Reading Excel tabs...")
+    try:
+        with profiler.stage('open_workbook') as stage:
+            workbook = Workbook(excel_path)
+            stage.extra['bytes_on_disk'] = os.path.getsize(excel_path)
+    except Exception as e:
+        print(f"❌ Could not open workbook: {e}")
         return False
 
-    # Convert Excel to individual CSV files in raw_data/
-    print("\n📊 Converting Excel tabs to CSV...")
-    cmd = f"ssconvert -S '{excel_path}' 'raw_data/%s.csv'"
-    success, output = run_command(cmd, "Convert Excel to CSV")
+    with workbook:
+        print(f"   Found {len(workbook.sheet_names)} tabs: {', '.join(workbook.sheet_names)}")
+        if webinar_id is None:
+            webinar_id = read_webinar_id(workbook, Path(excel_path).stem)
+
+        # Create Clay import file
+        if cache is None:
+            cache = StageCache(CACHE_DIR, enabled=use_cache)
+        cache.hits.clear()
+        cache.misses.clear()
+        if not create_clay_import(processing_dir, source=workbook, crm_file=crm_file, cache=cache, profiler=profiler,
+                                  memory_budget=memory_budget):
+            profiler.write_report(processing_dir)
+            return False
 
-    if not success:
-        print(f"❌ Excel conversion failed")
+    history = []
+    if history_db:
+        with profiler.stage('history'):
+            history = history_clay_import(processing_dir, webinar_id, history_db)
+
+    # Score and assign segments locally so only segmented rows need Clay credits
+    with profiler.stage('scoring'):
+        scores = score_clay_import(processing_dir, score_config)
+    with profiler.stage('segmentation'):
+        segmented = segment_clay_import(processing_dir, extra_columns=history + scores)
+    if not segmented:
+        profiler.write_report(processing_dir)
         return False
 
-    # List created files
-    csv_files = [f for f in os.listdir("raw_data") if f.endswith('.csv') and f != 'webinar_clay_import.csv']
-    print(f"   Created {len(csv_files)} CSV files in raw_data/: {', '.join(csv_files)}")
-
-    # Note: Source files remain in raw_data/, cleaning is handled in create_clay_import
+    # Only rows that changed since the webinar's previous run need re-importing
+    with profiler.stage('changes') as stage:
+        changes = capture_run_changes(processing_dir, webinar_id)
+        stage.rows_out = len(changes['changed'])
+        stage.extra.update(inserted=changes['inserted'], updated=changes['updated'], deleted=changes['deleted'])
 
-    # Create Clay import file
-    create_clay_import(processing_dir)
+    # One row per company domain for account-based follow-up
+    with profiler.stage('accounts') as stage:
+        accounts = rollup_accounts(processing_dir)
+        stage.rows_out = accounts['accounts']
 
     # Create documentation
-    create_documentation(processing_dir)
+    with profiler.stage('documentation'):
+        create_documentation(processing_dir)
+
+    # A failed upload leaves the output intact; re-running clay_uploader.py resumes from its checkpoint
+    upload = None
+    if webhook_url:
+        with profiler.stage('upload') as stage:
+            upload = upload_clay_import(processing_dir, webhook_url, only=changes['changed'])
+            stage.rows_out = upload['sent']
+            stage.extra.update(requests=upload['requests'], retries=upload['retries'], failed_rows=upload['failed'])
+        if upload['failed']:
+            print(f"     Resume with: python3 clay_uploader.py {processing_dir} --url <webhook> --changes-only")
+    # Rows that failed to upload stay changed until a later run delivers them
+    if upload is None or not upload['failed']:
+        advance_manifest(processing_dir, webinar_id)
+    cache.prune()
+
+    report_file = profiler.write_report(processing_dir)
+    print("\n⏱️  Stage timings:")
+    for line in profiler.summary():
+        print(f"     {line}")
+    print(f"     Run report: {report_file}")
 
     # Final result stays only in processed folder
     clay_file_final = os.path.join(processing_dir, 'webinar_clay_import.csv')
@@ -552,6 +784,287 @@ def process_excel_file(excel_path):
 
     return True
 
+def read_webinar_id(workbook, fallback):
+    """Use the export's "Event ID" metadata row as the webinar id, else the fallback"""
+    if 'registered list' in workbook.sheet_paths:
+        for row in workbook.rows('registered list'):
+            if any(cell.strip() in HEADER_MARKERS for cell in row):
+                break
+            if len(row) >= 2 and row[0].strip() == 'Event ID' and row[1].strip():
+                return row[1].strip()
+    return fallback
+
+def read_event_date(workbook):
+    """YYYY/MM/DD from the export's "Date" metadata row, else ''"""
+    if 'registered list' in workbook.sheet_paths:
+        for row in workbook.rows('registered list'):
+            if any(cell.strip() in HEADER_MARKERS for cell in row):
+                break
+            if row and row[0].strip() == 'Date':
+                for cell in row[1:]:
+                    match = EVENT_DATE_PATTERN.search(cell)
+                    if match:
+                        return '/'.join(match.groups())
+    return ''
+
+def find_workbooks(pattern):
+    """Expand a directory or glob pattern into a sorted list of .xlsx exports"""
+    import glob
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.xlsx')
+    return sorted(p for p in glob.glob(pattern) if p.lower().endswith('.xlsx') and not os.path.basename(p).startswith('~$'))
+
+def process_batch_worker(excel_path, workspace, crm_file=None, use_cache=True, cprofile=False, trace_memory=False,
+                         memory_budget=None, score_config=DEFAULT_SCORES):
+    """Process one workbook in its own workspace (runs inside a pool worker)
+
+    Output is captured to <workspace>/run.log so parallel runs don't interleave.
+    Lead history is recorded by process_batch once every worker is done.
+    """
+    import contextlib
+    os.makedirs(workspace, exist_ok=True)
+    with open(os.path.join(workspace, 'run.log'), 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        profiler = RunProfiler(cprofile=cprofile, trace_memory=trace_memory)
+        success = process_excel_file(excel_path, crm_file=crm_file, use_cache=use_cache, processing_dir=workspace, profiler=profiler,
+                                     memory_budget=memory_budget, score_config=score_config,
+                                     webinar_id=os.path.basename(workspace))
+    return excel_path, workspace, success
+
+def combine_clay_imports(results, combined_file, history=None):
+    """Concatenate per-webinar Clay imports into one file with a leading webinar_id column
+
+    Webinars can carry different survey columns, so the header is the union
+    of all headers in first-seen order and missing cells are left empty. A
+    typed columnar copy is written next to the combined CSV. `history`
+    ({webinar_id: [(name, dtype, values)]}, see lead_history.py) adds the lead
+    history columns last.
+
+    Poll columns are keyed by their question, so a shared column always holds
+    the same question; the webinars' poll_questions.json files are merged
+    next to the combined CSV, and a key naming two different questions is
+    refused with ValueError.
+    """
+    polls = {}
+    for webinar_id, clay_file in results:
+        path = os.path.join(os.path.dirname(clay_file), POLL_QUESTIONS_FILE)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for entry in json.load(f):
+                merged = polls.setdefault(entry['key'], {**entry, 'webinars': []})
+                if ' '.join(merged['question'].lower().split()) != ' '.join(entry['question'].lower().split()):
+                    raise ValueError(f"poll column {entry['answer_column']} holds different questions: "
+                                     f"{merged['question']!r} and {entry['question']!r} ({webinar_id})")
+                merged['webinars'].append(webinar_id)
+    combined_polls = [{key: value for key, value in entry.items() if key != 'number'} for entry in polls.values()]
+    write_poll_questions(os.path.join(os.path.dirname(combined_file), POLL_QUESTIONS_FILE), combined_polls)
+
+    fieldnames = ['webinar_id']
+    for _, clay_file in results:
+        with open(clay_file, 'r', encoding='utf-8', newline='') as f:
+            for name in next(csv.reader(f), []):
+                if name not in fieldnames:
+                    fieldnames.append(name)
+    if history:
+        fieldnames += [name for name, _ in HISTORY_COLUMNS]
+
+    total = 0
+    with open(combined_file, 'w', encoding='utf-8', newline='') as f_out, \
+            ColumnarWriter(os.path.splitext(combined_file)[0], clay_schema(fieldnames)) as column_writer:
+        writer = csv.writer(f_out, quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(fieldnames)
+        for webinar_id, clay_file in results:
+            columns = history.get(webinar_id, []) if history else []
+            with open(clay_file, 'r', encoding='utf-8', newline='') as f_in:
+                for i, row in enumerate(csv.DictReader(f_in)):
+                    row['webinar_id'] = webinar_id
+                    row.update((name, values[i]) for name, _, values in columns)
+                    out_row = [row.get(name, '') for name in fieldnames]
+                    writer.writerow(out_row)
+                    column_writer.write_row(out_row)
+                    total += 1
+    return total
+
+def process_batch(pattern, workers=None, crm_file=None, use_cache=True, cprofile=False, trace_memory=False,
+                  memory_budget=None, score_config=DEFAULT_SCORES, history_db=None):
+    """Process every webinar export matching a directory/glob across a process pool
+
+    With `history_db` the webinars are recorded in lead history after the
+    pool is done, in event date order (input order for ties), and the history
+    columns are added to the combined import only, so no feature depends on
+    which worker finished first.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from datetime import datetime
+
+    excel_paths = find_workbooks(pattern)
+    if not excel_paths:
+        print(f"❌ No .xlsx exports found for: {pattern}")
+        return False
+
+    batch_dir = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    os.makedirs(batch_dir, exist_ok=True)
+
+    print(f"🚀 Batch processing {len(excel_paths)} webinar exports")
+    print(f"📁 Batch directory: {batch_dir}")
+
+    # Assign each export a unique webinar id and workspace
+    jobs = {}
+    event_dates = {}
+    for excel_path in excel_paths:
+        stem = Path(excel_path).stem
+        try:
+            with Workbook(excel_path) as workbook:
+                webinar_id = read_webinar_id(workbook, stem)
+                event_date = read_event_date(workbook)
+        except Exception as e:
+            print(f"  ❌ {excel_path}: could not open workbook: {e}")
+            continue
+        base_id, n = webinar_id, 2
+        while webinar_id in jobs:
+            webinar_id, n = f"{base_id}-{n}", n + 1
+        jobs[webinar_id] = excel_path
+        event_dates[webinar_id] = event_date
+
+    # Build the shared CRM index once up front instead of racing in every worker
+    if crm_file:
+        CrmIndex(crm_file).close()
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(process_batch_worker, excel_path, os.path.join(batch_dir, webinar_id), crm_file, use_cache,
+                        cprofile, trace_memory, memory_budget, score_config): webinar_id
+            for webinar_id, excel_path in jobs.items()
+        }
+        for future in as_completed(futures):
+            webinar_id = futures[future]
+            try:
+                excel_path, workspace, success = future.result()
+            except Exception as e:
+                print(f"  ❌ {webinar_id}: {e}")
+                continue
+            if success:
+                results[webinar_id] = os.path.join(workspace, 'webinar_clay_import.csv')
+                print(f"  ✅ {webinar_id} ({excel_path})")
+            else:
+                print(f"  ❌ {webinar_id} failed, see {os.path.join(workspace, 'run.log')}")
+
+    if not results:
+        print("❌ No webinars processed successfully")
+        return False
+
+    # Keep the combined file in input order, independent of completion order
+    ordered = [(webinar_id, results[webinar_id]) for webinar_id in jobs if webinar_id in results]
+    history = None
+    if history_db:
+        # One pass in event order (undated exports last), after every worker is done
+        by_date = sorted(ordered, key=lambda item: (not event_dates[item[0]], event_dates[item[0]]))
+        history = record_clay_imports([(webinar_id, os.path.dirname(clay_file)) for webinar_id, clay_file in by_date],
+                                      history_db)
+    combined_file = os.path.join(batch_dir, 'webinar_clay_import.csv')
+    total = combine_clay_imports(ordered, combined_file, history)
+    # Accounts across every webinar of the batch
+    accounts = rollup_accounts(batch_dir)
+
+    print("\n🎉 Batch complete!")
+    print(f"   Webinars: {len(results)}/{len(jobs)} processed")
+    print(f"   🎯 Combined Clay import: {combined_file} ({total} records)")
+    print(f"   🏢 Accounts: {os.path.join(batch_dir, 'accounts.csv')} ({accounts['accounts']} accounts)")
+
+    return len(results) == len(jobs)
+
+def workbook_ready(path, seen, now, settle_seconds):
+    """Debounce partial writes: ready once size and mtime held still for settle_seconds and the zip is complete
+
+    `seen` maps path -> ((size, mtime_ns), first time that signature was seen)
+    and is updated in place. The zip central directory is written last, so a
+    workbook that still lacks one is mid-copy.
+    """
+    import zipfile
+    try:
+        stat = os.stat(path)
+    except OSError:
+        seen.pop(path, None)
+        return False
+    signature = (stat.st_size, stat.st_mtime_ns)
+    if path not in seen or seen[path][0] != signature:
+        seen[path] = (signature, now)
+        return False
+    return now - seen[path][1] >= settle_seconds and zipfile.is_zipfile(path)
+
+def watch_inbox(inbox, crm_file=None, use_cache=True, memory_budget=None, output_root='.', poll_seconds=5.0,
+                settle_seconds=10.0, once=False, webhook_url=None, score_config=DEFAULT_SCORES, history_db=None):
+    """Process every export that lands in `inbox` until interrupted
+
+    One process serves every run, so the interpreter, imports and cached CRM
+    state (CRM dict, identity index, file digests) stay warm between webinars.
+    Each export is processed into a hidden partial directory that is renamed
+    to <output_root>/processed_<name>_<timestamp>/ only when complete, then
+    moved to <inbox>/done/ (or <inbox>/failed/) so it is never picked up twice.
+    With `once`, processes the exports already in the inbox without waiting
+    for them to settle and returns whether all succeeded.
+    """
+    import shutil
+    import time
+    from datetime import datetime
+
+    if not os.path.isdir(inbox):
+        print(f"❌ Inbox directory not found: {inbox}")
+        return False
+
+    done_dir, failed_dir = os.path.join(inbox, 'done'), os.path.join(inbox, 'failed')
+    os.makedirs(done_dir, exist_ok=True)
+    os.makedirs(failed_dir, exist_ok=True)
+    os.makedirs(output_root, exist_ok=True)
+
+    cache = StageCache(CACHE_DIR, enabled=use_cache, keep_in_memory=True)
+    if crm_file:
+        CrmIndex(crm_file).close()
+
+    def publish(excel_path):
+        name = f"processed_{Path(excel_path).stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        final_dir = os.path.join(output_root, name)
+        partial_dir = os.path.join(output_root, f'.{name}.partial')
+        print(f"\n📥 New export: {excel_path}")
+        try:
+            success = process_excel_file(excel_path, crm_file=crm_file, processing_dir=partial_dir,
+                                         memory_budget=memory_budget, cache=cache, webhook_url=webhook_url,
+                                         score_config=score_config, history_db=history_db)
+        except Exception as e:
+            print(f"❌ {excel_path}: {e}")
+            success = False
+
+        if success:
+            os.rename(partial_dir, final_dir)
+            shutil.move(excel_path, os.path.join(done_dir, os.path.basename(excel_path)))
+            print(f"📦 Published: {final_dir}")
+        else:
+            shutil.rmtree(partial_dir, ignore_errors=True)
+            shutil.move(excel_path, os.path.join(failed_dir, os.path.basename(excel_path)))
+            print(f"❌ Failed, moved to {failed_dir}")
+        return success
+
+    if once:
+        return all([publish(path) for path in find_workbooks(inbox)])
+
+    print(f"👀 Watching {inbox} for webinar exports (Ctrl+C to stop)")
+    seen = {}
+    try:
+        while True:
+            pending = find_workbooks(inbox)
+            for path in set(seen) - set(pending):
+                del seen[path]
+            now = time.monotonic()
+            for excel_path in pending:
+                if workbook_ready(excel_path, seen, now, settle_seconds):
+                    del seen[excel_path]
+                    publish(excel_path)
+            time.sleep(poll_seconds)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+        return True
+
 def create_documentation(output_dir):
     """Create documentation file"""
 
@@ -563,11 +1076,13 @@ def create_documentation(output_dir):
 ## Processing Summary
 - **Processed**: {timestamp}
 - **Status**: ✅ Complete
-- **Method**: Shell-based processing (reliable, no dependencies)
+- **Method**: Streaming workbook reader + single-pass join (no dependencies)
 
 ## Files Created
-- Individual CSV files for each Excel tab (cleaned and deduplicated)
-- `webinar_clay_import.csv` - Ready for Clay import
+- `webinar_clay_import.csv` - Ready for Clay import, with a `segment` column
+- `segments/<segment>.csv` - One file per segment (seg1-seg6, brand_hot_unsplit, do_not_contact, unsegmented)
+- `qa_topics.json` / `qa_questions.jsonl` - Q&A topic clusters and searchable question text
+- `poll_questions.json` - Question text of each `poll_<key>_answer` / `poll_<key>_latency_s` column
 - This documentation file
 
 ## Data Cleaning Applied
@@ -583,7 +1098,7 @@ The `webinar_clay_import.csv` file contains:
 - Basic structure ready for Clay automations
 
 ## Next Steps
-1. Import `webinar_clay_import.csv` into Clay
+1. Import the `segments/` files for the segments you want into Clay (skip `do_not_contact`)
 2. Set BMID as primary key for deduplication
 3. Configure LinkedIn URL enrichment for social data
 4. Set up lead scoring based on attendance and engagement
@@ -602,28 +1117,92 @@ Run: `python3 process_webinar_data.py "new_webinar.xlsx"`
 def main():
     """Main entry point"""
 
-    if len(sys.argv) != 2:
+    if len(sys.argv) < 2:
         print("🎯 Webinar Data Processing Pipeline")
         print("=" * 40)
         print("Simple, powerful, straightforward!")
         print()
         print("Usage:")
-        print('  python3 process_webinar_data.py "path/to/webinar.xlsx"')
+        print('  python3 process_webinar_data.py "path/to/webinar.xlsx" [--crm CRM.csv]')
+        print('  python3 process_webinar_data.py --batch "exports/*.xlsx" [--workers N]')
+        print('  python3 process_webinar_data.py --watch inbox/ [--output-root DIR]')
+        print()
+        print("Options:")
+        print("  --crm PATH   Join against an external CRM export via its on-disk index")
+        print("  --no-cache   Recompute every stage instead of reusing .pipeline_cache/")
+        print("  --clear-cache  Delete .pipeline_cache/ (alone: clear and exit)")
+        print("  --batch DIR|GLOB  Process many exports in parallel into one combined import")
+        print("  --workers N  Process pool size for --batch (default: CPU count)")
+        print("  --watch DIR  Keep running and process each export that lands in DIR")
+        print("  --profile    Also write cProfile output (profile.pstats, profile.txt)")
+        print("  --trace-memory  Track Python heap peaks per stage with tracemalloc")
+        print("  --memory-budget MB  Join the CRM through disk partitions within this budget")
+        print("  --webhook URL  Push the finished import to a Clay webhook in batches")
+        print("  --scoring JSON  Custom engagement/intent score weights")
+        print("  --history DB  Record leads in a cross-webinar history database and add their history")
         print()
         print("Output:")
-        print("  - Individual CSV files for each Excel tab (cleaned)")
         print("  - webinar_clay_import.csv (Clay-ready import file)")
         print("  - data_relationships.md (documentation)")
-        print()
-        print("Requirements:")
-        print("  - gnumeric: brew install gnumeric")
+        print("  - run_report.json (per-stage timings, memory, rows and bytes)")
+        print("  - changes/ (leads inserted, updated or deleted since the webinar's last run)")
+        print("  - accounts.csv (one row per company domain) and contact_accounts.csv")
         print()
         print("Example:")
         print('  python3 process_webinar_data.py "GTM Webinar Export.xlsx"')
         sys.exit(1)
 
-    excel_path = sys.argv[1]
-    success = process_excel_file(excel_path)
+    import argparse
+    parser = argparse.ArgumentParser(description="Process webinar Excel exports into a Clay import file")
+    parser.add_argument('excel_path', nargs='?', help="Webinar export workbook (.xlsx)")
+    parser.add_argument('--batch', help="Directory or glob of exports to process in parallel")
+    parser.add_argument('--workers', type=int, help="Process pool size for --batch")
+    parser.add_argument('--watch', metavar='DIR', help="Watch an inbox directory and process new exports as they land")
+    parser.add_argument('--output-root', default='.', help="Where --watch publishes processed_<name>_<timestamp>/")
+    parser.add_argument('--poll-seconds', type=float, default=5.0, help="--watch inbox polling interval")
+    parser.add_argument('--settle-seconds', type=float, default=10.0,
+                        help="--watch waits until an export is unchanged this long before processing it")
+    parser.add_argument('--once', action='store_true', help="With --watch, process what is in the inbox and exit")
+    parser.add_argument('--crm', dest='crm_file', type=store_path,
+                        help="External CRM.csv or crm_store.py directory (indexed on disk, rebuilt when it changes)")
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', help="Recompute every stage")
+    parser.add_argument('--clear-cache', action='store_true', help="Delete every cached stage output first")
+    parser.add_argument('--profile', action='store_true', help="Write cProfile output next to run_report.json")
+    parser.add_argument('--trace-memory', action='store_true', help="Record tracemalloc heap peaks per stage")
+    parser.add_argument('--memory-budget', type=int, metavar='MB', help="External CRM join within this memory budget")
+    parser.add_argument('--webhook', dest='webhook_url', help="Push the finished Clay import to this webhook")
+    parser.add_argument('--scoring', metavar='JSON', help="Engagement/intent score weights (see scoring.py)")
+    parser.add_argument('--history', dest='history_db', metavar='DB',
+                        help="Record leads in this cross-webinar history database (see lead_history.py)")
+    args = parser.parse_args()
+    memory_budget = args.memory_budget * 2**20 if args.memory_budget else None
+    try:
+        score_config = load_score_config(args.scoring)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.clear_cache:
+        StageCache(CACHE_DIR).clear()
+        print(f"🧹 Cleared {CACHE_DIR}/")
+        if not (args.watch or args.batch or args.excel_path):
+            return
+
+    if args.watch:
+        success = watch_inbox(args.watch, crm_file=args.crm_file, use_cache=args.use_cache, memory_budget=memory_budget,
+                              output_root=args.output_root, poll_seconds=args.poll_seconds,
+                              settle_seconds=args.settle_seconds, once=args.once, webhook_url=args.webhook_url,
+                              score_config=score_config, history_db=args.history_db)
+    elif args.batch:
+        success = process_batch(args.batch, workers=args.workers, crm_file=args.crm_file, use_cache=args.use_cache,
+                                cprofile=args.profile, trace_memory=args.trace_memory, memory_budget=memory_budget,
+                                score_config=score_config, history_db=args.history_db)
+    elif args.excel_path:
+        profiler = RunProfiler(cprofile=args.profile, trace_memory=args.trace_memory)
+        success = process_excel_file(args.excel_path, crm_file=args.crm_file, use_cache=args.use_cache, profiler=profiler,
+                                     memory_budget=memory_budget, webhook_url=args.webhook_url, score_config=score_config,
+                                     history_db=args.history_db)
+    else:
+        parser.error("an export path, --batch or --watch is required")
 
     if success:
         print("\n✅ Webinar processing complete! Ready for Clay import.")
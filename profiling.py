@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Pipeline Profiling
+==================
+
+Per-stage instrumentation for the webinar pipeline: wall time, CPU time,
+peak RSS, rows in/out and bytes read/written, written as a JSON run report.
+
+Usage:
+    from profiling import RunProfiler
+
+    profiler = RunProfiler(cprofile=False, trace_memory=False)
+    with profiler.stage('join') as stage:
+        ...
+        stage.rows_in, stage.rows_out = 913, 913
+    profiler.write_report('processed_TIMESTAMP')  # run_report.json
+
+Optional modes:
+    cprofile       wraps the whole run in cProfile; writes profile.pstats and
+                   profile.txt (top functions by cumulative time)
+    trace_memory   runs tracemalloc; each stage records its Python heap peak
+                   and the report lists the top allocation sites
+
+A stage opened inside another one (crm_load and identity_index run lazily
+inside join) is recorded as its sub-stage: it carries a `parent`, its time
+is already part of the parent's, and only top-level stages add up to
+`stages_wall_seconds`.
+
+Bytes read/written come from /proc/self/io (rchar/wchar, Linux only) and are
+null elsewhere. Peak RSS is the process high-water mark after the stage.
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+def peak_rss_bytes():
+    """Process peak resident set size in bytes, or None when unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def io_counters():
+    """(bytes read, bytes written) by this process so far, or (None, None)"""
+    try:
+        with open('/proc/self/io') as f:
+            counters = dict(line.split(':', 1) for line in f if ':' in line)
+        return int(counters['rchar']), int(counters['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+def delta(after, before):
+    return None if after is None or before is None else after - before
+
+class Stage:
+    """Measurements of one pipeline stage; callers fill in rows_in/rows_out"""
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.rows_in = None
+        self.rows_out = None
+        self.extra = {}
+        self.metrics = {}
+
+    def to_dict(self):
+        parent = {'parent': self.parent} if self.parent else {}
+        return {'name': self.name, **parent, 'rows_in': self.rows_in, 'rows_out': self.rows_out, **self.metrics,
+                **self.extra}
+
+class RunProfiler:
+    """Collects Stage metrics for one run and writes them as run_report.json"""
+
+    def __init__(self, cprofile=False, trace_memory=False):
+        self.stages = []
+        self.open_stages = []
+        self.started = time.perf_counter()
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.profile = None
+        self.trace_memory = trace_memory
+
+        if trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        if cprofile:
+            import cProfile
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def stage(self, name):
+        return _StageTimer(self, name)
+
+    def report(self):
+        read_bytes, written_bytes = io_counters()
+        report = {
+            'started_at': self.started_at,
+            'wall_seconds': round(time.perf_counter() - self.started, 4),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'bytes_read': read_bytes,
+            'bytes_written': written_bytes,
+            'stages_wall_seconds': round(sum(stage.metrics['wall_seconds'] for stage in self.stages
+                                             if not stage.parent), 4),
+            'stages': [stage.to_dict() for stage in self.stages],
+        }
+        if self.trace_memory:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            report['top_allocations'] = [
+                {'site': str(stat.traceback), 'size_bytes': stat.size, 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:15]
+            ]
+        return report
+
+    def write_report(self, output_dir):
+        """Write run_report.json (and cProfile output when enabled); return the report path"""
+        if self.profile is not None:
+            import io
+            import pstats
+            self.profile.disable()
+            self.profile.dump_stats(os.path.join(output_dir, 'profile.pstats'))
+            text = io.StringIO()
+            pstats.Stats(self.profile, stream=text).sort_stats('cumulative').print_stats(40)
+            with open(os.path.join(output_dir, 'profile.txt'), 'w', encoding='utf-8') as f:
+                f.write(text.getvalue())
+
+        report_file = os.path.join(output_dir, 'run_report.json')
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        return report_file
+
+    def summary(self):
+        """One line per stage for the console"""
+        return [f"{stage.parent + '/' if stage.parent else ''}{stage.name}: {stage.metrics['wall_seconds']:.3f}s"
+                + (f", {stage.rows_out} rows" if stage.rows_out is not None else '')
+                for stage in self.stages]
+
+class _StageTimer:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.stage = Stage(name)
+
+    def __enter__(self):
+        open_stages = self.profiler.open_stages
+        self.stage.parent = open_stages[-1].name if open_stages else None
+        open_stages.append(self.stage)
+        if self.profiler.trace_memory:
+            import tracemalloc
+            tracemalloc.reset_peak()
+        self.io_before = io_counters()
+        self.cpu_before = time.process_time()
+        self.wall_before = time.perf_counter()
+        return self.stage
+
+    def __exit__(self, exc_type, exc, tb):
+        io_after = io_counters()
+        self.stage.metrics = {
+            'wall_seconds': round(time.perf_counter() - self.wall_before, 4),
+            'cpu_seconds': round(time.process_time() - self.cpu_before, 4),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'bytes_read': delta(io_after[0], self.io_before[0]),
+            'bytes_written': delta(io_after[1], self.io_before[1]),
+        }
+        if self.profiler.trace_memory:
+            import tracemalloc
+            self.stage.metrics['python_heap_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        if exc_type is not None:
+            self.stage.metrics['error'] = repr(exc)
+        self.profiler.open_stages.remove(self.stage)
+        self.profiler.stages.append(self.stage)
+        return False
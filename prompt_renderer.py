@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Local Prompt Renderer
+=====================
+
+Renders the clay_agents/ segment prompts for every lead of a Clay import
+locally, so the prompts can be streamed to an LLM batch endpoint instead of
+being filled in by Clay one row (and one credit) at a time.
+
+Usage:
+    python3 prompt_renderer.py processed_TIMESTAMP/
+    python3 prompt_renderer.py processed_TIMESTAMP/ --templates clay_agents/ --segments seg1_brand_hot_dm seg3_agency_hot
+
+    from prompt_renderer import render_prompts
+    stats = render_prompts('processed_TIMESTAMP')
+
+Each prompt file is parsed once into a compiled template: its {{Field}}
+placeholders become positional slots of a single str.format pattern, bound
+to the import's column positions once, so rendering a row is one C-level
+format call. Placeholders match columns exactly, then case-insensitively
+({{Linkedin Profile URL}} -> LinkedIn Profile URL), then as the unique
+prefix when the placeholder has Clay's truncated length ({{Are you
+tracking your AI search per}} -> the registrant's survey column for that
+question); fields the import does not have (Clay enrichments such as
+{{Org}} or {{Title}}) render blank and are listed in the summary.
+
+Rows are routed by their `segment` column (computed on the fly when the
+import has not been segmented). The compliance gate is resolved locally:
+an Unsubscribed? lead never gets a prompt and is written with the output
+"DO NOT CONTACT". Unsegmented leads are skipped.
+
+Outputs in the processed directory:
+    prompts.jsonl         {"custom_id", "segment", "segment_name", "prompt"} per ready-to-send lead
+    prompts_gated.jsonl   {"custom_id", "segment", "output": "DO NOT CONTACT"} per gated lead
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+from json.encoder import encode_basestring
+from operator import itemgetter
+
+from segmentation import SEGMENTS, TRUE_VALUES, compute_segments, load_rule_columns
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'clay_agents')
+PLACEHOLDER = re.compile(r'\{\{\s*([^{}]+?)\s*\}\}')
+GATE_OUTPUT = 'DO NOT CONTACT'
+GATED_SEGMENT = 'do_not_contact'
+CLAY_NAME_LENGTH = 35  # Clay truncates imported column names to this many characters
+
+class Template:
+    """A prompt parsed once into a str.format pattern with one slot per distinct {{Field}}
+
+    `json_pattern` is the same pattern with its literal text already escaped
+    as a JSON string body, so JSONL output only escapes the cell values.
+    """
+
+    def __init__(self, text):
+        self.fields = []
+        slots = {}
+        literals, placeholders = [], []
+        position = 0
+        for match in PLACEHOLDER.finditer(text):
+            field = match.group(1)
+            if field not in slots:
+                slots[field] = len(self.fields)
+                self.fields.append(field)
+            literals.append(text[position:match.start()])
+            placeholders.append(f'{{{slots[field]}}}')
+            position = match.end()
+        literals.append(text[position:])
+        placeholders.append('')
+        self.pattern = ''.join(escape(literal) + slot for literal, slot in zip(literals, placeholders))
+        self.json_pattern = ''.join(escape(json_body(literal)) + slot for literal, slot in zip(literals, placeholders))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(f.read())
+
+    def bind(self, header, as_json=False):
+        """(render(row), fields missing from `header`) for rows laid out like `header`
+
+        Rows must carry one extra trailing '' cell, which missing fields read.
+        With `as_json` the result is the prompt escaped as a JSON string body.
+        """
+        exact = {name: i for i, name in enumerate(header)}
+        folded = {}
+        for i, name in enumerate(header):
+            folded.setdefault(name.strip().lower(), i)
+        blank = len(header)
+        positions, missing = [], []
+        for field in self.fields:
+            position = exact.get(field, folded.get(field.strip().lower()))
+            if position is None and len(field) == CLAY_NAME_LENGTH:
+                prefixed = [i for name, i in folded.items() if name.startswith(field.lower())]
+                position = prefixed[0] if len(prefixed) == 1 else None
+            if position is None:
+                missing.append(field)
+                position = blank
+            positions.append(position)
+
+        fill = (self.json_pattern if as_json else self.pattern).format
+        if not positions:
+            text = fill()
+            return (lambda row: text), missing
+        if len(positions) == 1:
+            only = positions[0]
+            if as_json:
+                return (lambda row: fill(json_body(row[only]))), missing
+            return (lambda row: fill(row[only])), missing
+        cells = itemgetter(*positions)
+        if as_json:
+            return (lambda row: fill(*map(json_body, cells(row)))), missing
+        return (lambda row: fill(*cells(row))), missing
+
+def escape(text):
+    return text.replace('{', '{{').replace('}', '}}')
+
+def json_body(text):
+    """`text` as the inside of a JSON string literal"""
+    return encode_basestring(text)[1:-1]
+
+def load_templates(template_dir=TEMPLATE_DIR, segments=None):
+    """{segment id: (segment name, Template)} for every segment prompt found in template_dir"""
+    templates = {}
+    for segment_id, name, filename in SEGMENTS:
+        if filename is None or (segments and segment_id not in segments):
+            continue
+        path = os.path.join(template_dir, filename)
+        if os.path.exists(path):
+            templates[segment_id] = (name, Template.load(path))
+    return templates
+
+def render_prompts(output_dir, template_dir=TEMPLATE_DIR, segments=None):
+    """Render prompts.jsonl and prompts_gated.jsonl for <output_dir>/webinar_clay_import.csv; return counts"""
+    clay_file = os.path.join(output_dir, 'webinar_clay_import.csv')
+    if not os.path.exists(clay_file):
+        print(f"❌ Missing {clay_file}")
+        return None
+    templates = load_templates(template_dir, segments)
+    if not templates:
+        print(f"❌ No segment prompts found in {template_dir}")
+        return None
+
+    print(f"\n📝 Rendering {len(templates)} segment prompts from {template_dir}...")
+    stats = {'rendered': 0, 'gated': 0, 'skipped': 0}
+    per_segment = {}
+
+    with open(clay_file, 'r', encoding='utf-8', newline='') as f_in, \
+            open(os.path.join(output_dir, 'prompts.jsonl'), 'w', encoding='utf-8') as f_prompts, \
+            open(os.path.join(output_dir, 'prompts_gated.jsonl'), 'w', encoding='utf-8') as f_gated:
+        reader = csv.reader(f_in)
+        header = next(reader, [])
+        width = len(header)
+        # Not segmented yet: apply the same rules segmentation.py would
+        segment_column = iter(compute_segments(load_rule_columns(clay_file))) if 'segment' not in header else None
+        segment_pos = header.index('segment') if segment_column is None else None
+        bmid_pos = header.index('BMID') if 'BMID' in header else None
+        unsubscribed_pos = header.index('Unsubscribed?') if 'Unsubscribed?' in header else None
+
+        renderers = {}
+        missing = set()
+        for segment_id, (name, template) in templates.items():
+            render, absent = template.bind(header, as_json=True)
+            # Everything around the prompt is constant per segment, so only the prompt body is built per row
+            prefix = ', "segment": ' + json.dumps(segment_id) + ', "segment_name": ' \
+                + json.dumps(name, ensure_ascii=False) + ', "prompt": "'
+            renderers[segment_id] = (prefix, render)
+            missing.update(absent)
+
+        for line, row in enumerate(reader, 2):
+            if len(row) < width:
+                row += [''] * (width - len(row))
+            row.append('')
+            segment_id = next(segment_column) if segment_column is not None else row[segment_pos]
+            custom_id = row[bmid_pos] if bmid_pos is not None and row[bmid_pos] else f'row-{line}'
+
+            unsubscribed = unsubscribed_pos is not None and row[unsubscribed_pos].strip().lower() in TRUE_VALUES
+            if unsubscribed or segment_id == GATED_SEGMENT:
+                f_gated.write(json.dumps({'custom_id': custom_id, 'segment': GATED_SEGMENT, 'output': GATE_OUTPUT},
+                                         ensure_ascii=False) + '\n')
+                stats['gated'] += 1
+                continue
+            if segment_id not in renderers:
+                stats['skipped'] += 1
+                continue
+
+            prefix, render = renderers[segment_id]
+            f_prompts.write('{"custom_id": ' + encode_basestring(custom_id) + prefix + render(row) + '"}\n')
+            stats['rendered'] += 1
+            per_segment[segment_id] = per_segment.get(segment_id, 0) + 1
+
+    print(f"  ✅ {stats['rendered']} prompts ready, {stats['gated']} gated ({GATE_OUTPUT}), "
+          f"{stats['skipped']} without a segment prompt")
+    for segment_id, count in per_segment.items():
+        print(f"     {templates[segment_id][0]}: {count}")
+    if missing:
+        print(f"     ⚠️  Not in the import (rendered blank): {', '.join(sorted(missing))}")
+    print(f"     Prompts: {os.path.join(output_dir, 'prompts.jsonl')}")
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the clay_agents segment prompts for every lead locally")
+    parser.add_argument('output_dir', help="processed_TIMESTAMP/ directory")
+    parser.add_argument('--templates', default=TEMPLATE_DIR, help="Directory of segment prompt .md files")
+    parser.add_argument('--segments', nargs='+', help="Only render these segment ids (e.g. seg1_brand_hot_dm)")
+    args = parser.parse_args()
+    sys.exit(0 if render_prompts(args.output_dir, args.templates, args.segments) is not None else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Q&A Topic Analytics
+===================
+
+Turns the Q&A transcript into an interest signal: an inverted token index,
+TF-IDF vectors, topic clusters, and per-lead top topic and upvotes.
+
+Usage:
+    from qa_topics import analyze_questions
+    analysis = analyze_questions(qa_records)   # dict rows of the Q&A transcript tab
+    analysis['leads']['e767f050ac88']           # ('metrics / tracking / visibility', 13)
+
+    # Keyword search across every processed webinar's questions
+    python3 qa_topics.py search "citations chatgpt"
+    python3 qa_topics.py search "citations chatgpt" processed_2026*/ batch_*/*/ --limit 20
+
+Each run writes qa_questions.jsonl (question, BMID, upvotes, topic) and
+qa_topics.json (topic labels, sizes, top questions) to its output directory;
+search indexes the qa_questions.jsonl files it finds.
+
+TF-IDF weights are L2-normalized. With NumPy installed they are built in
+bulk from the posting lists into one document x term matrix (scipy.sparse
+CSR when SciPy is installed, dense otherwise) and clustered with matrix
+products; without it, per-document {term: weight} dicts are used. Both give
+the same topics. Topics come from spherical k-means (cosine similarity) with
+deterministic farthest-point seeding, k = sqrt(questions / 2) capped at
+MAX_TOPICS, and are labelled with their centroid's top terms. A lead's top topic is the one its questions
+carry the most upvotes in (each question counts at least 1).
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import re
+
+try:
+    import numpy as np
+except ImportError:  # dict-of-weights fallback below
+    np = None
+try:
+    from scipy import sparse
+except ImportError:  # dense NumPy matrix instead
+    sparse = None
+
+MAX_TOPICS = 12
+MAX_ITERATIONS = 20
+LABEL_TERMS = 3
+
+STOPWORDS = set("""
+a about above after again all also am an and any are as at be been being both but by can could did do does doing
+down during each few for from further get gets got had has have having he her here hers him his how i if in into is
+it its itself just like me more most my no nor not now of off on once only or other our ours out over own same she
+should so some such than that the their theirs them then there these they this those through to too under until up
+very was we were what when where which while who whom why will with would you your yours yourself anyone someone
+thing things way ways really much many one use using used make makes want wondering question thanks thank please
+""".split())
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords, crude plural folding"""
+    tokens = []
+    for token in re.findall(r"[a-z0-9][a-z0-9'+.-]*[a-z0-9+]|[a-z0-9]", (text or '').lower()):
+        token = token.replace("'s", '')
+        if len(token) < 3 or token in STOPWORDS or token.isdigit():
+            continue
+        if len(token) > 4 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def dot(a, b):
+    """Dot product of two sparse vectors ({term: weight})"""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(term, 0.0) for term, weight in a.items())
+
+def normalize(vector):
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    return {term: w / norm for term, w in vector.items()} if norm else {}
+
+class InvertedIndex:
+    """token -> {doc id: term frequency}, plus per-document metadata"""
+
+    def __init__(self):
+        self.postings = {}
+        self.docs = []
+
+    def add(self, text, **meta):
+        doc_id = len(self.docs)
+        self.docs.append({'text': text, **meta})
+        for token in tokenize(text):
+            posting = self.postings.setdefault(token, {})
+            posting[doc_id] = posting.get(doc_id, 0) + 1
+        return doc_id
+
+    def __len__(self):
+        return len(self.docs)
+
+    def idf(self, token):
+        return math.log((1 + len(self.docs)) / (1 + len(self.postings.get(token, ())))) + 1
+
+    def tfidf_vectors(self):
+        """L2-normalized TF-IDF vector of every document, built posting list by posting list"""
+        vectors = [{} for _ in self.docs]
+        for token, posting in self.postings.items():
+            idf = self.idf(token)
+            for doc_id, tf in posting.items():
+                vectors[doc_id][token] = (1 + math.log(tf)) * idf
+        return [normalize(vector) for vector in vectors]
+
+    def tfidf_matrix(self):
+        """(documents x terms matrix of L2-normalized TF-IDF weights, terms), built from all postings at once"""
+        terms = list(self.postings)
+        sizes = [len(posting) for posting in self.postings.values()]
+        count = sum(sizes)
+        cols = np.repeat(np.arange(len(terms)), sizes)
+        rows = np.fromiter((doc_id for posting in self.postings.values() for doc_id in posting), dtype=np.int64,
+                           count=count)
+        tfs = np.fromiter((tf for posting in self.postings.values() for tf in posting.values()), dtype=float,
+                          count=count)
+        idf = np.log((1 + len(self.docs)) / (1 + np.array(sizes, dtype=float))) + 1
+        weights = (1 + np.log(tfs)) * idf[cols]
+        weights /= np.sqrt(np.bincount(rows, weights=weights * weights, minlength=len(self.docs)))[rows]
+
+        shape = (len(self.docs), len(terms))
+        if sparse is not None:
+            return sparse.csr_matrix((weights, (rows, cols)), shape=shape), terms
+        matrix = np.zeros(shape)
+        matrix[rows, cols] = weights
+        return matrix, terms
+
+    def search(self, query, limit=10):
+        """(score, doc) of the best documents for a keyword query; only the query terms' postings are touched"""
+        scores = {}
+        for token in set(tokenize(query)):
+            posting = self.postings.get(token)
+            if not posting:
+                continue
+            idf = self.idf(token)
+            for doc_id, tf in posting.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + (1 + math.log(tf)) * idf
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(round(score, 4), self.docs[doc_id]) for doc_id, score in best]
+
+def cluster(vectors, k):
+    """Spherical k-means; return a topic number per vector (None for empty vectors) and the centroids"""
+    ids = [i for i, vector in enumerate(vectors) if vector]
+    if not ids:
+        return [None] * len(vectors), []
+    k = max(1, min(k, len(ids)))
+
+    # Farthest-point seeding: start from the first question, then repeatedly add the least similar one
+    centroids = [vectors[ids[0]]]
+    closest = {i: dot(vectors[i], centroids[0]) for i in ids}
+    while len(centroids) < k:
+        seed = min(ids, key=lambda i: (closest[i], i))
+        centroids.append(vectors[seed])
+        for i in ids:
+            closest[i] = max(closest[i], dot(vectors[i], centroids[-1]))
+
+    assignments = {}
+    for _ in range(MAX_ITERATIONS):
+        new = {i: max(range(len(centroids)), key=lambda c: (dot(vectors[i], centroids[c]), -c)) for i in ids}
+        if new == assignments:
+            break
+        assignments = new
+        sums = [{} for _ in centroids]
+        for i, topic in assignments.items():
+            for term, weight in vectors[i].items():
+                sums[topic][term] = sums[topic].get(term, 0.0) + weight
+        centroids = [normalize(total) if total else centroid for total, centroid in zip(sums, centroids)]
+
+    return [assignments.get(i) for i in range(len(vectors))], centroids
+
+def cluster_matrix(matrix, terms, k):
+    """cluster() over a TF-IDF matrix with bulk products; same seeding, tie-breaking and result"""
+    dense_rows = lambda rows: rows.toarray() if sparse is not None and sparse.issparse(rows) else np.asarray(rows)
+    similarities = lambda centroids: np.asarray(vectors @ centroids.T)
+
+    ids = np.flatnonzero(np.asarray(abs(matrix).sum(axis=1)).ravel())
+    if not len(ids):
+        return [None] * matrix.shape[0], []
+    k = max(1, min(k, len(ids)))
+    vectors = matrix[ids]
+
+    # Farthest-point seeding; argmin/argmax take the first index on ties, like the dict path
+    centroids = dense_rows(vectors[:1])
+    closest = similarities(centroids)[:, 0]
+    while len(centroids) < k:
+        seed = int(np.argmin(closest))
+        centroids = np.vstack([centroids, dense_rows(vectors[seed:seed + 1])])
+        closest = np.maximum(closest, similarities(centroids[-1:])[:, 0])
+
+    assignments = None
+    for _ in range(MAX_ITERATIONS):
+        new = np.argmax(similarities(centroids), axis=1)
+        if assignments is not None and np.array_equal(new, assignments):
+            break
+        assignments = new
+        members = np.zeros((k, len(ids)))
+        members[assignments, np.arange(len(ids))] = 1
+        sums = dense_rows(members @ vectors)
+        norms = np.linalg.norm(sums, axis=1)
+        moved = norms > 0
+        centroids[moved] = sums[moved] / norms[moved, None]
+
+    topics = [None] * matrix.shape[0]
+    for i, topic in zip(ids, assignments):
+        topics[i] = int(topic)
+    return topics, [{terms[j]: float(centroid[j]) for j in np.flatnonzero(centroid)} for centroid in centroids]
+
+def topic_label(centroid):
+    top = sorted(centroid.items(), key=lambda item: (-item[1], item[0]))[:LABEL_TERMS]
+    return ' / '.join(term for term, _ in top)
+
+def to_int(value):
+    try:
+        return int(float(value or 0))
+    except ValueError:
+        return 0
+
+def analyze_questions(records):
+    """Index and cluster Q&A rows; return {'leads', 'topics', 'questions'}
+
+    leads      BMID -> (top topic label, total upvotes)
+    topics     [{'topic', 'label', 'questions', 'upvotes', 'top_questions'}], largest first
+    questions  [{'text', 'bmid', 'upvotes', 'tag', 'topic'}] in transcript order
+    """
+    index = InvertedIndex()
+    for row in records:
+        text = (row.get('Question') or '').strip()
+        bmid = (row.get('BMID') or '').strip()
+        if text:
+            index.add(text, bmid=bmid, upvotes=to_int(row.get('Upvotes')), tag=(row.get('Question Tag') or '').strip())
+
+    k = min(MAX_TOPICS, max(1, round(math.sqrt(len(index) / 2))))
+    if np is not None and index.postings:
+        assignments, centroids = cluster_matrix(*index.tfidf_matrix(), k)
+    else:
+        assignments, centroids = cluster(index.tfidf_vectors(), k)
+    labels = [topic_label(centroid) for centroid in centroids]
+
+    questions = []
+    for doc, topic in zip(index.docs, assignments):
+        questions.append({**doc, 'topic': labels[topic] if topic is not None else ''})
+
+    topics = []
+    for topic, label in enumerate(labels):
+        members = [q for q, assigned in zip(questions, assignments) if assigned == topic]
+        if members:
+            topics.append({
+                'topic': topic, 'label': label, 'questions': len(members),
+                'upvotes': sum(q['upvotes'] for q in members),
+                'top_questions': [q['text'] for q in sorted(members, key=lambda q: -q['upvotes'])[:3]],
+            })
+    topics.sort(key=lambda t: (-t['questions'], -t['upvotes'], t['topic']))
+
+    # Per lead: topic with the most upvote weight (ties: first asked), plus total upvotes
+    weights, upvotes = {}, {}
+    for question in questions:
+        bmid = question['bmid']
+        if not bmid:
+            continue
+        upvotes[bmid] = upvotes.get(bmid, 0) + question['upvotes']
+        if question['topic']:
+            per_topic = weights.setdefault(bmid, {})
+            per_topic[question['topic']] = per_topic.get(question['topic'], 0) + max(1, question['upvotes'])
+    leads = {bmid: (max(weights[bmid], key=weights[bmid].get) if bmid in weights else '', total)
+             for bmid, total in upvotes.items()}
+
+    return {'leads': leads, 'topics': topics, 'questions': questions}
+
+def write_qa_outputs(output_dir, analysis):
+    """Write qa_questions.jsonl (searchable) and qa_topics.json to an output directory"""
+    with open(os.path.join(output_dir, 'qa_questions.jsonl'), 'w', encoding='utf-8') as f:
+        for question in analysis['questions']:
+            f.write(json.dumps(question, ensure_ascii=False) + '\n')
+    with open(os.path.join(output_dir, 'qa_topics.json'), 'w', encoding='utf-8') as f:
+        json.dump(analysis['topics'], f, indent=2, ensure_ascii=False)
+
+def load_search_index(directories):
+    """InvertedIndex over the qa_questions.jsonl of every given output directory"""
+    index = InvertedIndex()
+    for directory in directories:
+        path = os.path.join(directory, 'qa_questions.jsonl')
+        if not os.path.exists(path):
+            continue
+        webinar = os.path.basename(os.path.normpath(directory))
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                question = json.loads(line)
+                index.add(question.pop('text'), webinar=webinar, **question)
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Q&A topic analytics")
+    commands = parser.add_subparsers(dest='command', required=True)
+    search = commands.add_parser('search', help="Keyword search across processed webinars' questions")
+    search.add_argument('query')
+    search.add_argument('directories', nargs='*', help="Output directories (default: processed_*/ and batch_*/*/)")
+    search.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    directories = args.directories or sorted(glob.glob('processed_*/') + glob.glob('batch_*/*/'))
+    index = load_search_index(directories)
+    print(f"🔎 {len(index)} questions from {len(directories)} outputs")
+    for score, doc in index.search(args.query, args.limit):
+        print(f"  {score:7.3f}  [{doc['webinar']}] {doc['text']}")
+        print(f"           BMID {doc['bmid']}, {doc['upvotes']} upvotes, topic: {doc['topic']}")
+
+if __name__ == "__main__":
+    main()
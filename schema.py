@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Declarative Tab Schemas
+=======================
+
+One schema per export tab (field types, required fields, normalizers),
+compiled once into a validator that cleans every row in the same streaming
+pass that reads it. Nothing is dropped or blanked silently: every rejected
+row and every cleared cell is logged with its reason and written to
+rejects.csv next to the Clay import.
+
+Usage:
+    from schema import RejectLog, validate_table
+
+    rejects = RejectLog()
+    fieldnames, rows = validate_table(table_rows, 'registered list', rejects)
+    for row in rows:          # cleaned lists in fieldnames order
+        ...
+    rejects.write('processed_TIMESTAMP/rejects.csv')
+
+Field kinds:
+    text          newlines/carriage returns -> spaces, stripped
+    flag          yes/no/true/false/1/0
+    number        float-parseable
+    count         non-negative integer (0.0-style floats allowed)
+    email         local@domain.tld
+    domain        no spaces, '@' or '/', at least one dot
+    linkedin_url  cleared when it has no profile slug (https://linkedin.com/in/)
+
+A blank cell is always valid unless the field is required. An invalid value
+is either cleared (invalid='clear', logged as 'cleared') or rejects the row
+(invalid='reject'). Rows with more cells than the header (broken quoting)
+keep the header's columns and log the extra cells as 'truncated'.
+"""
+
+import csv
+import json
+import re
+
+# A tab's header row is the first row naming one of these columns
+HEADER_MARKERS = ('BMID', 'linkedin_url')
+TRUE_FLAGS = {'yes', 'true', '1', 'y'}
+FALSE_FLAGS = {'no', 'false', '0', 'n'}
+EMAIL_PATTERN = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+PROFILE_URL_PATTERN = re.compile(r'(?:https?://)?(?:[a-z]{2,3}\.|www\.)?linkedin\.com(?:/in)?/?', re.IGNORECASE)
+REJECT_FIELDS = ['tab', 'row', 'BMID', 'action', 'field', 'reason', 'value']
+
+def clean_value(value):
+    """Replace embedded newlines and carriage returns with spaces"""
+    if not value:
+        return ''
+    return str(value).replace('\n', ' ').replace('\r', ' ').strip()
+
+def is_number(value):
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+def is_count(value):
+    try:
+        number = float(value)
+    except ValueError:
+        return False
+    return number >= 0 and number == int(number)
+
+# kind -> check of a cleaned, non-blank value (text only gets cleaned)
+CHECKS = {
+    'text': None,
+    'flag': lambda v: v.lower() in TRUE_FLAGS or v.lower() in FALSE_FLAGS,
+    'number': is_number,
+    'count': is_count,
+    'email': lambda v: EMAIL_PATTERN.fullmatch(v) is not None,
+    'domain': lambda v: '.' in v and not any(c in v for c in ' @/'),
+    'linkedin_url': lambda v: PROFILE_URL_PATTERN.fullmatch(v) is None,
+}
+
+class Field:
+    """Declared column: kind (see CHECKS), whether it must be non-blank, and what an invalid value does"""
+
+    __slots__ = ('kind', 'required', 'invalid')
+
+    def __init__(self, kind='text', required=False, invalid='clear'):
+        if kind not in CHECKS or invalid not in ('clear', 'reject'):
+            raise ValueError(f"bad field spec: {kind}, invalid={invalid}")
+        self.kind = kind
+        self.required = required
+        self.invalid = invalid
+
+# Undeclared columns use the '*' spec when present, otherwise pass through untouched
+REGISTRANT_FIELDS = {
+    '*': Field('text'),
+    'BMID': Field(required=True),
+    'Firstname': Field(required=True),
+    'Lastname': Field(required=True),
+    'Email': Field('email'),
+    'Website Domain': Field('domain'),
+    'LinkedIn Profile URL': Field('linkedin_url'),
+    # Compliance gate: an unreadable consent flag drops the lead rather than guessing
+    'Unsubscribed?': Field('flag', invalid='reject'),
+    'Active Consent': Field('flag', invalid='reject'),
+    'Responded to Survey': Field('flag'),
+    'Duration': Field('number'),
+    'Engaged': Field('number'),
+    'Chats': Field('number'),
+    'Rating': Field('number'),
+    'Q&A': Field('number'),
+    'Polls': Field('number'),
+}
+
+# Only BMID and the carried-forward metrics are read from the attend list
+ATTENDANCE_FIELDS = {
+    'BMID': Field(required=True),
+    'Duration': Field('number'),
+    'Engaged': Field('number'),
+    'Chats': Field('number'),
+    'Rating': Field('number'),
+}
+
+SCHEMAS = {
+    'registered list': REGISTRANT_FIELDS,
+    'attend list': ATTENDANCE_FIELDS,
+    'did not attend list': {
+        'BMID': Field(required=True),
+    },
+    'poll responses': {
+        'BMID': Field(required=True),
+    },
+    'emoji eeaction': {
+        # Every emoji column holds a reaction count
+        '*': Field('count', invalid='reject'),
+        '#': Field(),
+        'First Name': Field(),
+        'Last Name': Field(),
+        'BMID': Field(required=True),
+    },
+    'Q&A transcript': {
+        # Questions without a BMID still feed topic analytics, so BMID is optional here
+        'BMID': Field(),
+        'Upvotes': Field('count'),
+    },
+}
+
+def compile_schema(fields, fieldnames):
+    """Compile a schema against a tab's header into validate(row) -> (values or None, issues)
+
+    Positions, cleaners and checks are resolved once; the returned function
+    only indexes and calls. `values` follow fieldnames (a repeated column
+    name reads its last occurrence, like a dict row). `issues` are
+    (action, field, reason, value) tuples: 'rejected' (values is None),
+    'cleared' or 'truncated'.
+    """
+    width = len(fieldnames)
+    positions = {name: i for i, name in enumerate(fieldnames)}
+    order = [positions[name] for name in fieldnames]
+    default = fields.get('*')
+    # (position, name, kind, check, required, reject when invalid) for every declared column
+    plan = []
+    for i, name in enumerate(fieldnames):
+        spec = fields.get(name, default)
+        if spec is not None:
+            plan.append((i, name, spec.kind, CHECKS[spec.kind], spec.required, spec.invalid == 'reject'))
+    missing = [name for name, spec in fields.items() if name != '*' and spec.required and name not in positions]
+
+    def validate(row):
+        if missing:
+            return None, [('rejected', missing[0], f"missing {missing[0]} column", '')]
+        issues = []
+        if len(row) < width:
+            row = [*row, *[''] * (width - len(row))]
+        elif len(row) > width:
+            issues.append(('truncated', '', f"{len(row) - width} cells beyond the header (broken quoting)",
+                           json.dumps(row[width:], ensure_ascii=False)))
+        values = [row[pos] for pos in order]
+
+        for i, name, kind, check, required, rejects in plan:
+            value = clean_value(values[i])
+            if not value:
+                if required:
+                    return None, [('rejected', name, f"missing {name}", '')]
+            elif check is not None and not check(value):
+                if rejects:
+                    return None, [('rejected', name, f"invalid {name} (expected {kind})", value)]
+                issues.append(('cleared', name, f"invalid {kind}", value))
+                value = ''
+            values[i] = value
+        return values, issues
+
+    return validate
+
+class RejectLog:
+    """Rows dropped and cells cleared by validation, grouped by tab"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def start(self, tab):
+        """Begin (or restart, when a tab is read twice) a tab's entries and return its list"""
+        self.entries[tab] = []
+        return self.entries[tab]
+
+    def counts(self, tab):
+        counts = {}
+        for entry in self.entries.get(tab, ()):
+            counts[entry[3]] = counts.get(entry[3], 0) + 1
+        return counts
+
+    def write(self, path, tabs=None):
+        """Write rejects.csv (tabs in the given order, rows in file order); return the number of entries"""
+        total = 0
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
+            writer.writerow(REJECT_FIELDS)
+            for tab in tabs or self.entries:
+                for entry in self.entries.get(tab, ()):
+                    writer.writerow(entry)
+                    total += 1
+        return total
+
+def validate_table(rows, tab, rejects=None, markers=HEADER_MARKERS):
+    """Locate a tab's header and validate its rows against SCHEMAS[tab] in one streaming pass
+
+    Returns (fieldnames, iterator of cleaned row lists). Blank rows are
+    skipped; metadata rows before the header are not data. Tabs without a
+    schema are passed through unchanged.
+    """
+    rows = iter(rows)
+    fieldnames = []
+    number = 0
+    for row in rows:
+        number += 1
+        if any(cell.strip() in markers for cell in row):
+            fieldnames = [cell.strip() for cell in row]
+            break
+
+    log = rejects.start(tab) if rejects is not None else None
+    validate = compile_schema(SCHEMAS.get(tab, {}), fieldnames)
+    bmid_pos = fieldnames.index('BMID') if 'BMID' in fieldnames else None
+
+    def cleaned():
+        for line, row in enumerate(rows, number + 1):
+            if not any(row):
+                continue
+            values, issues = validate(row)
+            if issues and log is not None:
+                bmid = row[bmid_pos].strip() if bmid_pos is not None and bmid_pos < len(row) else ''
+                log.extend((tab, line, bmid, *issue) for issue in issues)
+            if values is not None:
+                yield values
+
+    return fieldnames, cleaned()
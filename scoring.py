@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Engagement Scoring
+==================
+
+Weighted engagement and intent scores for every lead of a webinar, plus
+percentile ranks within that webinar, computed column-wise in one pass
+instead of as per-row Clay formulas.
+
+Usage:
+    python3 scoring.py processed_TIMESTAMP/ [--config scoring.json]
+
+    from scoring import score_clay_import
+    columns = score_clay_import('processed_TIMESTAMP')   # [(name, dtype, values), ...]
+
+Each score is 100 * sum(weight * min(value / cap, 1)) / sum(weights) over
+its inputs, so every input saturates at its cap and scores run 0-100:
+
+    engagement_score  attendance_engaged, attendance_duration, attendance_chats,
+                      poll_responses, emoji_reactions, qa_questions, qa_upvotes
+    intent_score      qa_questions, qa_upvotes, attendance_rating,
+                      attendance_chats, Responded to Survey
+
+A JSON config with the same {score: {column: [weight, cap]}} shape replaces
+the defaults (see DEFAULT_SCORES); every cap must be greater than 0. Blank
+cells count as 0 and yes/true as 1. Each <name>_score gets a <name>_percentile column: the percentage of leads
+in the webinar scoring strictly lower.
+
+Columns are NumPy arrays when NumPy is installed; otherwise plain lists
+combined with map(), which keeps the per-element work in C.
+"""
+
+import itertools
+import json
+import operator
+import os
+import sys
+from bisect import bisect_left
+
+from segmentation import TRUE_VALUES, load_rule_columns, segment_clay_import
+
+try:
+    import numpy as np
+except ImportError:  # list fallback below
+    np = None
+
+# score -> {column: (weight, cap)}
+DEFAULT_SCORES = {
+    'engagement_score': {
+        'attendance_engaged': (0.35, 100),
+        'attendance_duration': (0.2, 60),
+        'attendance_chats': (0.1, 3),
+        'poll_responses': (0.1, 3),
+        'emoji_reactions': (0.05, 5),
+        'qa_questions': (0.15, 2),
+        'qa_upvotes': (0.05, 10),
+    },
+    'intent_score': {
+        'qa_questions': (0.3, 2),
+        'qa_upvotes': (0.1, 10),
+        'attendance_rating': (0.25, 5),
+        'attendance_chats': (0.15, 3),
+        'Responded to Survey': (0.2, 1),
+    },
+}
+
+def load_score_config(path=None):
+    """Score definitions from a JSON file, or the defaults"""
+    if not path:
+        return DEFAULT_SCORES
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    config = {score: {column: tuple(spec) for column, spec in inputs.items()} for score, inputs in config.items()}
+    for score, inputs in config.items():
+        for column, (weight, cap) in inputs.items():
+            # Every value is divided by its cap; a zero or negative cap has no saturation point
+            if not cap > 0:
+                raise ValueError(f"{path}: {score}.{column} has cap {cap}; caps must be greater than 0")
+    return config
+
+def cell_value(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 1.0 if str(value or '').strip().lower() in TRUE_VALUES else 0.0
+
+def weighted_score(values, inputs, size):
+    """0-100 score per row from {column: (weight, cap)}; `values` maps column -> parsed floats"""
+    total_weight = sum(weight for weight, _ in inputs.values()) or 1.0
+    present = [(values[column], weight, cap) for column, (weight, cap) in inputs.items() if column in values]
+    scale = 100.0 / total_weight
+    if np is not None:
+        # Same operations in the same order as the fallback, so both round to the same scores
+        score = np.zeros(size)
+        for column, weight, cap in present:
+            score += np.minimum(column * (weight / cap), weight)
+        return [round(v, 1) for v in (score * scale).tolist()]
+
+    # Missing columns contribute 0
+    score = [0.0] * size
+    for column, weight, cap in present:
+        # min(weight * v / cap, weight) == weight * min(v / cap, 1)
+        scaled = map(min, map(operator.mul, column, itertools.repeat(weight / cap)), itertools.repeat(weight))
+        score = list(map(operator.add, score, scaled))
+    return [round(v * scale, 1) for v in score]
+
+def percentile_ranks(scores):
+    """Percentage of rows scoring strictly lower than each row (0-100)"""
+    if len(scores) < 2:
+        return [100.0] * len(scores)
+    denominator = len(scores) - 1
+    if np is not None:
+        values = np.asarray(scores)
+        ranks = np.searchsorted(np.sort(values), values, 'left') * 100.0 / denominator
+        return [round(v, 1) for v in ranks.tolist()]
+    ordered = sorted(scores)
+    return [round(bisect_left(ordered, v) * 100.0 / denominator, 1) for v in scores]
+
+def compute_scores(columns, config=DEFAULT_SCORES):
+    """[(name, dtype, values)] for every score and its percentile, from a dict of column lists"""
+    size = len(next(iter(columns.values()), []))
+    # Parse each input column once, even when several scores use it
+    values = {}
+    for name, column in columns.items():
+        values[name] = list(map(cell_value, column))
+        if np is not None:
+            values[name] = np.array(values[name], dtype=float)
+
+    result = []
+    for score_name, inputs in config.items():
+        scores = weighted_score(values, inputs, size)
+        percentile_name = score_name.removesuffix('_score') + '_percentile'
+        result.append((score_name, 'float64', scores))
+        result.append((percentile_name, 'float64', percentile_ranks(scores)))
+    return result
+
+def score_clay_import(output_dir, config=DEFAULT_SCORES):
+    """Score every row of <output_dir>/webinar_clay_import.csv; returns [(name, dtype, values)]"""
+    clay_file = os.path.join(output_dir, 'webinar_clay_import.csv')
+    names = sorted({column for inputs in config.values() for column in inputs})
+    columns = compute_scores(load_rule_columns(clay_file, names), config)
+
+    print("\n📈 Scoring engagement and intent...")
+    for name, _, values in columns:
+        if name.endswith('_score') and values:
+            ordered = sorted(values)
+            print(f"     {name}: median {ordered[len(ordered) // 2]}, p90 {ordered[int(len(ordered) * 0.9)]}, max {ordered[-1]}")
+    return columns
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Add engagement/intent scores to a processed Clay import")
+    parser.add_argument('output_dir', help="processed_TIMESTAMP/ directory")
+    parser.add_argument('--config', help="JSON score definitions ({score: {column: [weight, cap]}})")
+    args = parser.parse_args()
+    try:
+        config = load_score_config(args.config)
+    except ValueError as e:
+        parser.error(str(e))
+    scores = score_clay_import(args.output_dir, config)
+    sys.exit(0 if segment_clay_import(args.output_dir, extra_columns=scores) else 1)
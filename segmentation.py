@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Local Segmentation Engine
+=========================
+
+Applies the clay_agents/ segment rules to the whole Clay import at once with
+vectorized boolean masks, so only already-segmented rows need to go to Clay.
+
+Usage:
+    python3 segmentation.py processed_TIMESTAMP/
+
+    from segmentation import segment_clay_import
+    segment_clay_import('processed_TIMESTAMP')
+
+Rules (from the "Use When" section of each prompt):
+    hot          Q&A>=1 OR Chats>=2 OR Polls>=1 OR Engaged>=60
+                 (the pipeline's qa_questions / poll_responses counts also qualify)
+    decision maker  Title contains CMO, VP, Head, Director, Founder, CEO, Chief
+    agency       domain/company name contains agency, digital, creative, marketing
+                 (unless crm_customer_status is a brand status: Active Customer, Closed Lost)
+    seg1  brand + hot + decision maker       seg4  Duration and Engaged 0/blank
+    seg2  brand + hot + practitioner         seg5  Rating >= 4
+    seg3  agency + hot                       seg6  Rating <= 3
+    do_not_contact  Unsubscribed? is true (compliance gate, always wins)
+
+Neither the webinar export nor the CRM carries a job title, so seg1/seg2 only
+split when the import has a Title (e.g. after Clay enrichment). Brand + hot
+leads without one get brand_hot_unsplit, which has no prompt of its own:
+enrich the title in Clay, then re-run the segmentation.
+
+Each row gets exactly one segment, the first match in SEGMENT_PRIORITY.
+Masks are NumPy boolean arrays when NumPy is installed; otherwise each mask is
+a Python int holding one byte per row, so &, | and ~ still run in C instead of
+a per-row Python loop.
+"""
+
+import csv
+import itertools
+import os
+import re
+import sys
+
+from columnar import ColumnarWriter, StringColumn, read_columns, read_schema, to_float
+
+try:
+    import numpy as np
+except ImportError:  # byte-mask fallback below
+    np = None
+
+DECISION_MAKER_TITLES = ['CMO', 'VP', 'Head', 'Director', 'Founder', 'CEO', 'Chief']
+AGENCY_KEYWORDS = ['agency', 'digital', 'creative', 'marketing']
+BRAND_STATUSES = ['Active Customer', 'Closed Lost']
+TRUE_VALUES = {'yes', 'true', '1', 'y'}
+
+# (segment id, segment name from the prompt, prompt file)
+SEGMENTS = [
+    ('do_not_contact', 'DO NOT CONTACT', None),
+    ('seg1_brand_hot_dm', 'BRAND • HOT • DECISION MAKER', 'peec_clay_agent_segment_01_seg1_brand_hot_dm.md'),
+    ('seg2_brand_hot_practitioner', 'BRAND • HOT • PRACTITIONER', 'peec_clay_agent_segment_02_seg2_brand_hot_practitioner.md'),
+    ('brand_hot_unsplit', 'BRAND • HOT • TITLE NEEDED', None),
+    ('seg3_agency_hot', 'AGENCY • HOT', 'peec_clay_agent_segment_03_seg3_agency_hot.md'),
+    ('seg5_survey_promoter', 'SURVEY PROMOTER', 'peec_clay_agent_segment_05_seg5_survey_promoter.md'),
+    ('seg6_survey_recovery', 'SURVEY RECOVERY', 'peec_clay_agent_segment_06_seg6_survey_recovery.md'),
+    ('seg4_no_show', 'NO-SHOW', 'peec_clay_agent_segment_04_seg4_no_show.md'),
+]
+SEGMENT_PRIORITY = [segment_id for segment_id, _, _ in SEGMENTS]
+UNSEGMENTED = 'unsegmented'
+
+# Columns the rules read (missing columns count as blank)
+RULE_COLUMNS = [
+    'Q&A', 'Chats', 'Polls', 'Engaged', 'Duration', 'Rating', 'Title', 'Unsubscribed?',
+    'Website Domain', 'crm_company_domain', 'crm_company_name', 'crm_customer_status',
+    'qa_questions', 'poll_responses',
+]
+
+class ByteMask:
+    """Boolean mask stored as one byte per row inside a Python int"""
+
+    def __init__(self, bits, size):
+        self.bits = bits
+        self.size = size
+
+    @classmethod
+    def from_bools(cls, values):
+        values = bytes(bool(v) for v in values)
+        return cls(int.from_bytes(values, 'little'), len(values))
+
+    def __and__(self, other):
+        return ByteMask(self.bits & other.bits, self.size)
+
+    def __or__(self, other):
+        return ByteMask(self.bits | other.bits, self.size)
+
+    def __invert__(self):
+        return ByteMask(self.bits ^ int.from_bytes(b'\x01' * self.size, 'little'), self.size)
+
+    def tolist(self):
+        return [b == 1 for b in self.bits.to_bytes(self.size, 'little')]
+
+class NumColumn:
+    """Numeric column whose comparisons return ByteMasks (blank cells read as 0)"""
+
+    def __init__(self, values):
+        self.values = values
+
+    def _compare(self, test):
+        return ByteMask.from_bools(test(v) for v in self.values)
+
+    def __ge__(self, x):
+        return self._compare(lambda v: v >= x)
+
+    def __le__(self, x):
+        return self._compare(lambda v: v <= x)
+
+    def __gt__(self, x):
+        return self._compare(lambda v: v > x)
+
+    def __eq__(self, x):
+        return self._compare(lambda v: v == x)
+
+def to_mask(values):
+    return np.fromiter((bool(v) for v in values), dtype=bool) if np is not None else ByteMask.from_bools(values)
+
+def numeric(values):
+    floats = [to_float(v) or 0.0 for v in values]
+    return np.array(floats, dtype=float) if np is not None else NumColumn(floats)
+
+def present(values):
+    return to_mask(to_float(v) is not None for v in values)
+
+def contains_any(values, keywords, word=True):
+    """Mask of cells containing any keyword (case-insensitive, whole word by default)"""
+    alternatives = '|'.join(re.escape(k) for k in keywords)
+    pattern = re.compile(rf'\b(?:{alternatives})\b' if word else alternatives, re.IGNORECASE)
+    return to_mask(bool(pattern.search(v or '')) for v in values)
+
+def compute_segments(columns):
+    """Assign one segment id per row from a dict of column lists"""
+    size = len(next(iter(columns.values()), []))
+    col = lambda name: columns.get(name) or [''] * size
+
+    hot = ((numeric(col('Q&A')) >= 1) | (numeric(col('qa_questions')) >= 1)
+           | (numeric(col('Chats')) >= 2)
+           | (numeric(col('Polls')) >= 1) | (numeric(col('poll_responses')) >= 1)
+           | (numeric(col('Engaged')) >= 60))
+    # A blank or missing Title can't tell a decision maker from a practitioner
+    titled = to_mask(bool((v or '').strip()) for v in col('Title'))
+    decision_maker = contains_any(col('Title'), DECISION_MAKER_TITLES)
+    agency = ((contains_any(col('Website Domain'), AGENCY_KEYWORDS, word=False)
+               | contains_any(col('crm_company_domain'), AGENCY_KEYWORDS, word=False)
+               | contains_any(col('crm_company_name'), AGENCY_KEYWORDS, word=False))
+              & ~contains_any(col('crm_customer_status'), BRAND_STATUSES))
+    brand = ~agency
+    rated = present(col('Rating'))
+    rating = numeric(col('Rating'))
+
+    masks = {
+        'do_not_contact': to_mask(str(v).strip().lower() in TRUE_VALUES for v in col('Unsubscribed?')),
+        'seg1_brand_hot_dm': brand & hot & decision_maker,
+        'seg2_brand_hot_practitioner': brand & hot & titled & ~decision_maker,
+        'brand_hot_unsplit': brand & hot & ~titled,
+        'seg3_agency_hot': agency & hot,
+        'seg5_survey_promoter': rated & (rating >= 4),
+        'seg6_survey_recovery': rated & (rating <= 3),
+        'seg4_no_show': (numeric(col('Duration')) == 0) & (numeric(col('Engaged')) == 0),
+    }
+
+    segments = [UNSEGMENTED] * size
+    # Walk priorities from lowest to highest so higher-priority segments overwrite
+    for segment_id in reversed(SEGMENT_PRIORITY):
+        for i, hit in enumerate(masks[segment_id].tolist()):
+            if hit:
+                segments[i] = segment_id
+    return segments
+
+def load_rule_columns(clay_file, names=RULE_COLUMNS):
+    """Read only the rule columns (or `names`), from the columnar copy when one exists"""
+    base = os.path.splitext(clay_file)[0]
+    for columnar_path in (base + '.parquet', base + '.colz'):
+        if os.path.exists(columnar_path):
+            available = {name for name, _ in read_schema(columnar_path)}
+            return read_columns(columnar_path, [c for c in names if c in available])
+
+    with open(clay_file, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        positions = {name: header.index(name) for name in names if name in header}
+        columns = {name: StringColumn() for name in positions}
+        for row in reader:
+            for name, pos in positions.items():
+                columns[name].append(row[pos] if pos < len(row) else '')
+    return columns
+
+def segment_clay_import(output_dir, extra_columns=()):
+    """Add a segment column to webinar_clay_import.csv and write one file per segment
+
+    `extra_columns` ([(name, dtype, values)], e.g. from scoring.py) are
+    written in the same rewrite pass, just before `segment`.
+    """
+    print("\n🧭 Segmenting leads locally...")
+
+    clay_file = os.path.join(output_dir, 'webinar_clay_import.csv')
+    if not os.path.exists(clay_file):
+        print(f"❌ Missing {clay_file}")
+        return False
+
+    columns = load_rule_columns(clay_file)
+    if not any(v.strip() for v in columns.get('Title') or ()):
+        print("  ⚠️  No Title column: brand + hot leads are left as brand_hot_unsplit (enrich titles in Clay to split "
+              "decision makers from practitioners)")
+    segments = compute_segments(columns)
+
+    segment_dir = os.path.join(output_dir, 'segments')
+    os.makedirs(segment_dir, exist_ok=True)
+    for name in os.listdir(segment_dir):
+        if name.endswith('.csv'):
+            os.remove(os.path.join(segment_dir, name))
+    temp_file = clay_file + '.tmp'
+    counts = {}
+    segment_files = {}
+    segment_writers = {}
+
+    # Rewrite the import (and its columnar copy) with the segment column in one streaming pass
+    with open(clay_file, 'r', encoding='utf-8', newline='') as f_in, \
+            open(temp_file, 'w', encoding='utf-8', newline='') as f_out:
+        reader = csv.reader(f_in)
+        header = next(reader)
+        # Re-running replaces previously added columns instead of duplicating them
+        added = [name for name, _, _ in extra_columns] + ['segment']
+        keep = [i for i, name in enumerate(header) if name not in added]
+        strip = (lambda row: [row[i] for i in keep if i < len(row)]) if len(keep) < len(header) else (lambda row: row)
+        header = strip(header) + added
+
+        writer = csv.writer(f_out, quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(header)
+
+        base = os.path.splitext(clay_file)[0]
+        schema = read_schema(base + '.parquet') if os.path.exists(base + '.parquet') else \
+            read_schema(base + '.colz') if os.path.exists(base + '.colz') else None
+        column_writer = None
+        if schema is not None:
+            schema = ([c for c in schema if c[0] not in added]
+                      + [(name, dtype) for name, dtype, _ in extra_columns] + [('segment', 'string')])
+            column_writer = ColumnarWriter(base + '.segmented', schema)
+
+        try:
+            extra_values = zip(*(values for _, _, values in extra_columns)) if extra_columns else itertools.repeat(())
+            for row, extra, segment_id in zip(reader, extra_values, segments):
+                row = strip(row) + list(extra) + [segment_id]
+                writer.writerow(row)
+                if column_writer:
+                    column_writer.write_row(row)
+
+                counts[segment_id] = counts.get(segment_id, 0) + 1
+                if segment_id not in segment_writers:
+                    segment_files[segment_id] = open(os.path.join(segment_dir, f'{segment_id}.csv'), 'w', encoding='utf-8', newline='')
+                    segment_writers[segment_id] = csv.writer(segment_files[segment_id], quoting=csv.QUOTE_MINIMAL)
+                    segment_writers[segment_id].writerow(header)
+                segment_writers[segment_id].writerow(row)
+        finally:
+            for f in segment_files.values():
+                f.close()
+            if column_writer:
+                column_writer.close()
+
+    os.replace(temp_file, clay_file)
+    if column_writer:
+        os.replace(column_writer.path, base + os.path.splitext(column_writer.path)[1])
+
+    total = len(segments) or 1
+    names = {segment_id: name for segment_id, name, _ in SEGMENTS}
+    print("  ✅ Segments assigned")
+    for segment_id in SEGMENT_PRIORITY + [UNSEGMENTED]:
+        if segment_id in counts:
+            label = names.get(segment_id, 'Unsegmented')
+            print(f"     {label}: {counts[segment_id]} ({counts[segment_id]/total*100:.1f}%)")
+    print(f"     Segment files: {segment_dir}/")
+
+    return True
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print('Usage: python3 segmentation.py "processed_TIMESTAMP/"')
+        sys.exit(1)
+    sys.exit(0 if segment_clay_import(sys.argv[1]) else 1)
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Content-Hashed Stage Cache
+==========================
+
+Lets each pipeline stage reuse its previous output when the inputs it depends
+on are unchanged, so re-running after a small CRM or Q&A fix only recomputes
+the affected stages.
+
+Usage:
+    from stage_cache import StageCache, digest
+
+    cache = StageCache('.pipeline_cache')
+    key = digest('polls', cache.file_digest('raw_data/poll responses.csv'))
+    counts = cache.load('polls', key)
+    if counts is None:
+        counts = build_poll_counts()
+        cache.save('polls', key, counts)
+
+Index-like outputs (sets, dicts) are pickled; row-aligned outputs are CSV
+files streamed through cached_rows(). Everything is written to a temporary
+file first and renamed into place, so an interrupted run never leaves a
+half-written entry behind.
+
+Long-running processes (watch mode) pass keep_in_memory=True so recently
+used values stay unpickled between runs instead of being re-read from disk.
+
+Entries live under <cache_dir>/v<CACHE_VERSION>/; opening the cache deletes
+the directories of older versions. A hit touches the entry, and prune()
+evicts the least recently used entries once the cache outgrows
+MAX_CACHE_BYTES (clear() empties it: --clear-cache).
+"""
+
+import csv
+import hashlib
+import os
+import pickle
+import shutil
+from collections import OrderedDict
+
+# Bump when stage logic changes so stale entries are never reused
+CACHE_VERSION = 7
+MAX_CACHE_BYTES = 2 * 2**30  # prune() evicts least recently used entries above this
+MEMORY_ENTRIES = 32  # values kept in memory with keep_in_memory (least recently used evicted)
+
+def digest(*parts):
+    """Combine strings/bytes/numbers into one stable hex digest"""
+    h = hashlib.sha256(f'v{CACHE_VERSION}'.encode())
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = str(part).encode('utf-8')
+        h.update(len(part).to_bytes(8, 'little'))
+        h.update(part)
+    return h.hexdigest()
+
+class StageCache:
+    """Directory of stage outputs keyed by a hash of their inputs"""
+
+    def __init__(self, cache_dir='.pipeline_cache', enabled=True, keep_in_memory=False):
+        self.root = cache_dir
+        self.cache_dir = os.path.join(cache_dir, f'v{CACHE_VERSION}')
+        self.enabled = enabled
+        if enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.drop_old_versions()
+        self.hits = []
+        self.misses = []
+        self.memory = OrderedDict() if keep_in_memory else None
+
+    def remember(self, path, value):
+        if self.memory is None:
+            return
+        self.memory[path] = value
+        self.memory.move_to_end(path)
+        while len(self.memory) > MEMORY_ENTRIES:
+            self.memory.popitem(last=False)
+
+    def drop_old_versions(self):
+        """Delete entries written under any other CACHE_VERSION (including the unversioned layout)"""
+        current = os.path.basename(self.cache_dir)
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name == current:
+                continue
+            if os.path.isdir(path) and name.startswith('v'):
+                shutil.rmtree(path, ignore_errors=True)
+            elif name.endswith(('.pkl', '.csv')):
+                remove_quietly(path)
+
+    def prune(self, max_bytes=MAX_CACHE_BYTES):
+        """Evict least recently used entries until the cache fits in max_bytes; return (entries, bytes) removed"""
+        if not self.enabled:
+            return 0, 0
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        removed = freed = 0
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            remove_quietly(path)
+            if self.memory is not None:
+                self.memory.pop(path, None)
+            total -= size
+            removed += 1
+            freed += size
+        return removed, freed
+
+    def clear(self):
+        """Delete every cached entry"""
+        shutil.rmtree(self.root, ignore_errors=True)
+        if self.memory is not None:
+            self.memory.clear()
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path(self, stage, key, suffix='.pkl'):
+        return os.path.join(self.cache_dir, f'{stage}-{key[:32]}{suffix}')
+
+    def file_digest(self, path):
+        """Content hash of a file, memoized by (path, size, mtime) so unchanged files are not re-read"""
+        if not self.enabled:
+            return digest('file', os.path.abspath(path))
+
+        stat = os.stat(path)
+        memo_key = digest('file', os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        cached = self.load('file_digest', memo_key, record=False)
+        if cached is not None:
+            return cached
+
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        value = h.hexdigest()
+        self.save('file_digest', memo_key, value)
+        return value
+
+    def load(self, stage, key, record=True):
+        """Return the cached value of a stage, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        path = self.path(stage, key)
+        if self.memory is not None and path in self.memory:
+            value = self.memory[path]
+            self.memory.move_to_end(path)
+        else:
+            try:
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                if record:
+                    self.misses.append(stage)
+                return None
+            touch(path)
+            self.remember(path, value)
+        if record:
+            self.hits.append(stage)
+        return value
+
+    def save(self, stage, key, value):
+        if not self.enabled:
+            return
+        path = self.path(stage, key)
+        temp_path = path + f'.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        self.remember(path, value)
+
+    def cached(self, stage, key, build):
+        """Return the cached value of a stage, building and storing it on a miss"""
+        value = self.load(stage, key)
+        if value is None:
+            value = build()
+            self.save(stage, key, value)
+        return value
+
+    def has_rows(self, stage, key):
+        return self.enabled and os.path.exists(self.path(stage, key, '.csv'))
+
+    def cached_rows(self, stage, key, build_rows):
+        """Stream the rows of a row-aligned stage from cache, or build them while caching
+
+        On a miss the rows from build_rows() are written through to the cache
+        as they are yielded; the entry only becomes visible once the stream
+        has been fully consumed.
+        """
+        if not self.enabled:
+            yield from build_rows()
+            return
+
+        path = self.path(stage, key, '.csv')
+        if self.has_rows(stage, key):
+            self.hits.append(stage)
+            touch(path)
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                yield from csv.reader(f)
+            return
+
+        self.misses.append(stage)
+        temp_path = path + f'.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                for row in build_rows():
+                    writer.writerow(row)
+                    yield row
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+def touch(path):
+    """Mark an entry as recently used for prune()"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,80 @@
+"""Change capture: cross-row columns, manifest advance and resume after a failed upload"""
+
+import csv
+import os
+
+from change_capture import (MANIFEST_FILE, advance_manifest, capture_changes, capture_run_changes, changed_bmids,
+                            read_manifest)
+from lead_history import history_clay_import
+
+HEADER = ['BMID', 'LinkedIn Profile URL', 'attendance_status', 'qa_questions', 'Registration Date/Time',
+          'engagement_score', 'engagement_percentile']
+
+def write_import(directory, rows, extra_columns=()):
+    """Write webinar_clay_import.csv from HEADER rows plus [(name, dtype, values)] columns, like segmentation does"""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'webinar_clay_import.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER + [name for name, _, _ in extra_columns])
+        for i, row in enumerate(rows):
+            writer.writerow([*row, *(values[i] for _, _, values in extra_columns)])
+    return str(directory)
+
+def lead(bmid, slug, score, percentile):
+    return [bmid, f'https://linkedin.com/in/{slug}', 'attended', '1', '2026/10/01 09:00', score, percentile]
+
+def test_second_webinar_does_not_update_first_webinars_leads(tmp_path):
+    db, manifests = str(tmp_path / 'history.db'), str(tmp_path / 'manifests')
+    first = [lead('b1', 'ada', '40.0', '0.0'), lead('b2', 'alan', '60.0', '50.0')]
+    run = write_import(tmp_path / 'w1-run1', first)
+    write_import(run, first, history_clay_import(run, 'w1', db))
+    assert capture_run_changes(run, 'w1', manifests)['inserted'] == 2
+    advance_manifest(run, 'w1', manifests)
+
+    # Ada registers for a second webinar, so her history columns in w1 change
+    other = write_import(tmp_path / 'w2', [lead('c1', 'ada', '10.0', '0.0')])
+    history_clay_import(other, 'w2', db)
+    run = write_import(tmp_path / 'w1-run2', first)
+    columns = history_clay_import(run, 'w1', db)
+    assert columns[0][2] == [2, 1]
+    write_import(run, first, columns)
+    stats = capture_run_changes(run, 'w1', manifests)
+    assert (stats['updated'], stats['unchanged']) == (0, 2)
+
+def test_cross_row_columns_are_ignored_but_own_columns_are_not(tmp_path):
+    topic, latency = 'qa_top_topic', 'poll_5333ecea_latency_s'
+    before = write_import(tmp_path / 'before', [lead('b1', 'ada', '40.0', '0.0'), lead('b2', 'alan', '60.0', '50.0')],
+                          [(topic, 'string', ['pricing', 'pricing']), (latency, 'float64', ['4.0', '9.5'])])
+    # b3 joining moves b1's and b2's percentiles, re-clusters the topics and answers the poll first;
+    # only b2's own score changed
+    after = write_import(tmp_path / 'after', [lead('b1', 'ada', '40.0', '33.3'), lead('b2', 'alan', '65.0', '66.7'),
+                                              lead('b3', 'grace', '10.0', '0.0')],
+                         [(topic, 'string', ['ai search', 'ai search', 'ai search']),
+                          (latency, 'float64', ['6.0', '11.5', '0.0'])])
+    stats = capture_changes(after, read_manifest(before))
+    assert (stats['inserted'], stats['updated'], stats['unchanged']) == (1, 1, 1)
+    assert stats['changed'] == changed_bmids(after) == {'b2', 'b3'}
+    # Excluded columns still go out with the changed rows
+    with open(os.path.join(after, 'changes', 'updated.csv'), encoding='utf-8', newline='') as f:
+        assert next(csv.DictReader(f))['engagement_percentile'] == '66.7'
+
+def test_manifest_only_advances_when_asked(tmp_path):
+    manifests = str(tmp_path / 'manifests')
+    rows = [lead('b1', 'ada', '40.0', '0.0'), lead('b2', 'alan', '60.0', '50.0')]
+
+    # A run whose upload failed does not advance, so the next run re-sends the same leads
+    first = write_import(tmp_path / 'run1', rows)
+    assert capture_run_changes(first, 'w1', manifests)['inserted'] == 2
+    resumed = write_import(tmp_path / 'run2', rows)
+    assert capture_run_changes(resumed, 'w1', manifests)['inserted'] == 2
+    advance_manifest(resumed, 'w1', manifests)
+
+    again = write_import(tmp_path / 'run3', rows)
+    assert capture_run_changes(again, 'w1', manifests)['changed'] == set()
+
+    changed = write_import(tmp_path / 'run4', [lead('b1', 'ada', '45.0', '0.0')])
+    stats = capture_run_changes(changed, 'w1', manifests)
+    assert (stats['updated'], stats['deleted'], stats['changed']) == (1, 1, {'b1'})
+    # The manifest, its directory and the import itself all read as the same fingerprints
+    assert read_manifest(changed) == read_manifest(os.path.join(changed, MANIFEST_FILE)) \
+        == read_manifest(os.path.join(changed, 'webinar_clay_import.csv'))
@@ -0,0 +1,79 @@
+"""Webhook uploader: worker failures surface instead of hanging, retried batches all land"""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from clay_uploader import WebhookUploader, load_checkpoint
+
+def rows(count):
+    return ({'BMID': f'b{i}', 'Firstname': f'Lead {i}'} for i in range(count))
+
+def test_bad_url_raises_instead_of_blocking_the_producer():
+    # Far more batches than the queue holds: the producer used to block on put() forever
+    uploader = WebhookUploader('http://[not-a-host/', batch_size=1, concurrency=2)
+    with pytest.raises(ValueError):
+        asyncio.run(asyncio.wait_for(uploader.run(rows(50)), timeout=10))
+
+def test_checkpoint_write_error_cancels_the_upload(tmp_path, monkeypatch):
+    server, received = start_server(throttle_every=0)
+    try:
+        uploader = WebhookUploader(server_url(server), batch_size=5, concurrency=2,
+                                   checkpoint_path=str(tmp_path / 'checkpoint'))
+
+        async def broken_worker(queue, checkpoint):
+            raise OSError('disk full')
+
+        monkeypatch.setattr(uploader, 'worker', broken_worker)
+        with pytest.raises(OSError, match='disk full'):
+            asyncio.run(asyncio.wait_for(uploader.run(rows(100)), timeout=10))
+    finally:
+        server.shutdown()
+
+def test_throttled_batches_are_retried_and_checkpointed(tmp_path):
+    server, received = start_server(throttle_every=3)
+    try:
+        checkpoint = str(tmp_path / 'checkpoint')
+        uploader = WebhookUploader(server_url(server), batch_size=7, concurrency=3, checkpoint_path=checkpoint)
+        uploader_stats = asyncio.run(asyncio.wait_for(uploader.run(rows(50)), timeout=30))
+    finally:
+        server.shutdown()
+    assert uploader_stats['sent'] == 50 and uploader_stats['failed'] == 0
+    assert uploader_stats['retries'] > 0
+    assert sorted(received) == sorted(f'b{i}' for i in range(50))
+    assert load_checkpoint(checkpoint) == {f'b{i}' for i in range(50)}
+
+def start_server(throttle_every):
+    """Local webhook that answers every `throttle_every`-th request with 429 Retry-After: 0"""
+    received = []
+    counter = {'requests': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            with lock:
+                counter['requests'] += 1
+                throttled = throttle_every and counter['requests'] % throttle_every == 0
+                if not throttled:
+                    received.extend(row['BMID'] for row in body)
+            self.send_response(429 if throttled else 200)
+            if throttled:
+                self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received
+
+def server_url(server):
+    return f'http://127.0.0.1:{server.server_address[1]}/'
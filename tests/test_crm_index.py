@@ -0,0 +1,118 @@
+"""CRM index: record splitting and in-place IndexUpdater upserts/deletes"""
+
+import io
+import random
+
+import crm_index
+from crm_index import CrmIndex, IndexUpdater, build_index, iter_records
+
+def url(name):
+    return f'https://linkedin.com/in/{name}'
+
+def write_crm(path, records):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('linkedin_url,first_name,note\n')
+        for name, note in records:
+            f.write(f'{url(name)},{name},{note}\n')
+
+def append_record(path, name, note):
+    """Append one record and return its (offset, length)"""
+    line = f'{url(name)},{name},{note}\n'.encode('utf-8')
+    with open(path, 'ab') as f:
+        offset = f.tell()
+        f.write(line)
+    return offset, len(line)
+
+def test_iter_records_splits_only_outside_quotes():
+    data = (b'a,b\n'
+            b'1,"two\nlines"\n'
+            b'2,"say ""hi""\n\n""done"""\n'
+            b'3,' + b'"' + b'x\n' * 2000 + b'"\n'
+            b'4,plain')
+    records = list(iter_records(io.BytesIO(data)))
+    assert [raw[:2] for _, raw in records] == [b'a,', b'1,', b'2,', b'3,', b'4,']
+    assert b''.join(raw for _, raw in records) == data
+    # Offsets point at each record's first byte
+    assert all(data[offset:offset + len(raw)] == raw for offset, raw in records)
+
+def slot_invariant_holds(updater):
+    """Every stored entry is reachable: no empty slot between its home slot and its slot"""
+    mask = updater.slots - 1
+    for slot in range(updater.slots):
+        hashed = updater._slot(slot)[0]
+        if not hashed:
+            continue
+        probe = hashed & mask
+        while probe != slot:
+            if not updater._slot(probe)[0]:
+                return False
+            probe = (probe + 1) & mask
+    return True
+
+def test_backward_shift_delete_across_the_table_end(tmp_path, monkeypatch):
+    # Six keys in one cluster that wraps from slot 14 around to slot 3 of a 16-slot table
+    homes = {'k1': 14, 'k2': 14, 'k3': 15, 'k4': 14, 'k5': 0, 'k6': 15}
+    hashes = {url(name): home + (i + 1) * 1024 for i, (name, home) in enumerate(homes.items())}
+    monkeypatch.setattr(crm_index, 'key_hash', lambda key: hashes[key])
+
+    crm_file = str(tmp_path / 'CRM.csv')
+    write_crm(crm_file, [(name, f'note {name}') for name in homes])
+    assert build_index(crm_file) == 6
+
+    remaining = set(homes)
+    with IndexUpdater(crm_file) as updater:
+        assert updater.slots == 16
+        for name in ['k2', 'k5', 'k1', 'k6']:
+            assert updater.delete(url(name))
+            remaining.discard(name)
+            assert slot_invariant_holds(updater)
+            for other in homes:
+                record = updater.get(url(other))
+                assert (record is not None) == (other in remaining)
+                if record is not None:
+                    assert record[2] == f'note {other}'
+        assert not updater.delete(url('k1'))
+        assert updater.entries == 2
+
+def test_random_upserts_and_deletes_match_a_dict(tmp_path):
+    crm_file = str(tmp_path / 'CRM.csv')
+    write_crm(crm_file, [('seed0', 'v0'), ('seed1', 'v0'), ('seed0', 'v1')])
+    build_index(crm_file)
+    expected = {'seed0': 'v1', 'seed1': 'v0'}
+
+    rng = random.Random(7)
+    names = [f'p{i}' for i in range(120)] + ['seed0', 'seed1']
+    with IndexUpdater(crm_file) as updater:
+        start_slots = updater.slots
+        for step in range(600):
+            name = rng.choice(names)
+            if rng.random() < 0.3:
+                assert updater.delete(url(name)) == (name in expected)
+                expected.pop(name, None)
+            else:
+                note = f'v{step}'
+                updater.put(url(name), *append_record(crm_file, name, note))
+                expected[name] = note
+            assert updater.entries == len(expected)
+        assert updater.slots > start_slots  # grew along the way
+        assert slot_invariant_holds(updater)
+        assert updater.entries * 2 <= updater.slots
+        updater.commit()
+
+    # A fresh reader sees the committed index without rebuilding it
+    with CrmIndex(crm_file, columns=['note']) as crm:
+        assert not crm.rebuilt
+        assert len(crm) == len(expected)
+        for name in names:
+            assert crm.get(url(name)) == ((expected[name],) if name in expected else None)
+
+def test_uncommitted_updates_force_a_rebuild(tmp_path):
+    crm_file = str(tmp_path / 'CRM.csv')
+    write_crm(crm_file, [('a', 'old')])
+    build_index(crm_file)
+    with IndexUpdater(crm_file) as updater:
+        updater.put(url('a'), *append_record(crm_file, 'a', 'new'))
+        # no commit(): the stamp no longer matches the CSV
+    with CrmIndex(crm_file, columns=['note']) as crm:
+        assert crm.rebuilt
+        assert crm.get(url('a')) == ('new',)
@@ -0,0 +1,135 @@
+"""CRM store: snapshot + delta upserts, tombstones, stale rows and incremental identity blocks"""
+
+import os
+
+from crm_store import CrmStore, live_records
+from identity_resolution import IdentityMatcher
+
+HEADER = 'linkedin_url,first_name,last_name,company_domain,last_activity_at,deleted\n'
+
+def write_export(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(HEADER)
+        for slug, first, last, domain, activity, deleted in rows:
+            f.write(f'https://www.linkedin.com/in/{slug},{first},{last},{domain},{activity},{deleted}\n')
+    return path
+
+def live(store):
+    return {record['linkedin_url'].rsplit('/', 1)[1]: (record['first_name'], record['last_name'],
+                                                       record['company_domain'], record['last_activity_at'])
+            for record in live_records(store.data_path)}
+
+def blocks(matcher):
+    """Block -> sorted candidates, independent of candidate ids"""
+    return {block: sorted(matcher.candidates[i] for i in ids) for block, ids in matcher.blocks.items()}
+
+def test_snapshot_then_delta(tmp_path):
+    store = CrmStore(str(tmp_path / 'store'))
+    stats = store.apply(write_export(tmp_path / 'full.csv', [
+        ('ada', 'Ada', 'Lovelace', 'engines.io', '2026/10/01 09:00:00', ''),
+        ('alan', 'Alan', 'Turing', 'bletchley.uk', '2026/10/01 09:00:00', ''),
+        ('grace', 'Grace', 'Hopper', 'navy.mil', '2026/10/01 09:00:00', ''),
+    ]), snapshot=True)
+    assert stats == {'upserted': 3, 'deleted': 0, 'unchanged': 0, 'stale': 0}
+    assert store.meta['snapshot'] == store.meta['version'] == 1
+
+    stats = store.apply(write_export(tmp_path / 'delta.csv', [
+        ('ada', 'Ada', 'King', 'engines.io', '2026/10/02 09:00:00', ''),          # renamed
+        ('alan', 'Alan', 'Turing', 'old.example', '2026/09/30 09:00:00', ''),     # older than stored
+        ('grace', 'Grace', 'Hopper', 'navy.mil', '2026/10/01 09:00:00', 'true'),  # deleted in the CRM
+        ('linus', 'Linus', 'Torvalds', 'kernel.org', '2026/10/02 09:00:00', ''),  # new
+        ('ghost', 'Casper', 'Ghost', 'nowhere.io', '2026/10/02 09:00:00', 'yes'), # deleted, never stored
+    ]))
+    assert stats == {'upserted': 2, 'deleted': 1, 'unchanged': 0, 'stale': 1}
+    assert live(store) == {
+        'ada': ('Ada', 'King', 'engines.io', '2026/10/02 09:00:00'),
+        'alan': ('Alan', 'Turing', 'bletchley.uk', '2026/10/01 09:00:00'),
+        'linus': ('Linus', 'Torvalds', 'kernel.org', '2026/10/02 09:00:00'),
+    }
+    assert store.meta['snapshot'] == 1 and store.meta['version'] == 2
+
+def test_reapplied_export_is_a_noop(tmp_path):
+    store = CrmStore(str(tmp_path / 'store'))
+    export = write_export(tmp_path / 'delta.csv', [('ada', 'Ada', 'Lovelace', 'engines.io', '2026/10/01 09:00:00', '')])
+    store.apply(export)
+    state, size = store.state_key(), os.path.getsize(store.data_path)
+    assert store.apply(export) is None
+    assert CrmStore(store.directory).state_key() == state
+    assert os.path.getsize(store.data_path) == size
+
+def test_unchanged_rows_are_not_rewritten(tmp_path):
+    store = CrmStore(str(tmp_path / 'store'))
+    row = ('ada', 'Ada', 'Lovelace', 'engines.io', '2026/10/01 09:00:00', '')
+    store.apply(write_export(tmp_path / 'one.csv', [row]))
+    stats = store.apply(write_export(tmp_path / 'two.csv', [row, row]))
+    assert stats['unchanged'] == 2 and stats['upserted'] == 0
+    assert store.meta['rows_written'] == 1
+
+def test_snapshot_tombstones_missing_contacts(tmp_path):
+    store = CrmStore(str(tmp_path / 'store'))
+    store.apply(write_export(tmp_path / 'full1.csv', [
+        ('ada', 'Ada', 'Lovelace', 'engines.io', '2026/10/01 09:00:00', ''),
+        ('alan', 'Alan', 'Turing', 'bletchley.uk', '2026/10/01 09:00:00', ''),
+    ]), snapshot=True)
+    stats = store.apply(write_export(tmp_path / 'full2.csv', [
+        ('ada', 'Ada', 'Lovelace', 'engines.io', '2026/10/01 09:00:00', ''),
+    ]), snapshot=True)
+    assert stats == {'upserted': 0, 'deleted': 1, 'unchanged': 1, 'stale': 0}
+    assert set(live(store)) == {'ada'}
+    assert store.meta['snapshot'] == 2
+
+def test_identities_follow_each_delta(tmp_path):
+    store = CrmStore(str(tmp_path / 'store'))
+    store.apply(write_export(tmp_path / 'full.csv', [
+        ('ada', 'Ada', 'Lovelace', 'engines.io', '2026/10/01 09:00:00', ''),
+        ('alan', 'Alan', 'Turing', 'bletchley.uk', '2026/10/01 09:00:00', ''),
+        ('grace', 'Grace', 'Hopper', 'navy.mil', '2026/10/01 09:00:00', ''),
+    ]), snapshot=True)
+    states = {store.state_key()}
+    store.apply(write_export(tmp_path / 'delta.csv', [
+        ('ada', 'Ada', 'King', 'analytical.io', '2026/10/02 09:00:00', ''),
+        ('grace', 'Grace', 'Hopper', 'navy.mil', '2026/10/02 09:00:00', '1'),
+        ('linus', 'Linus', 'Torvalds', 'kernel.org', '2026/10/02 09:00:00', ''),
+    ]))
+    states.add(store.state_key())
+    assert len(states) == 2
+
+    # The matcher maintained by apply() equals one built from scratch over the live rows
+    matcher = CrmStore(store.directory).identities()
+    assert len(matcher) == 3
+    assert blocks(matcher) == blocks(IdentityMatcher.build(live_records(store.data_path)))
+    assert matcher.match('Ada', 'King', domains=['analytical.io'])[0] == 'https://linkedin.com/in/ada'
+    assert matcher.match('Grace', 'Hopper', domains=['navy.mil']) is None
+
+    # Compaction keeps the state, so the persisted blocks stay valid; a lost file is rebuilt
+    store.compact()
+    assert CrmStore(store.directory).state_key() in states
+    assert blocks(store.identities()) == blocks(matcher)
+    os.remove(store.identity_path)
+    assert blocks(store.identities()) == blocks(matcher)
+
+def test_crash_after_index_commit_rebuilds_identities(tmp_path, monkeypatch):
+    store = CrmStore(str(tmp_path / 'store'))
+    store.apply(write_export(tmp_path / 'full.csv', [
+        ('ada', 'Ada', 'Lovelace', 'engines.io', '2026/10/01 09:00:00', ''),
+    ]), snapshot=True)
+    delta = write_export(tmp_path / 'delta.csv', [
+        ('linus', 'Linus', 'Torvalds', 'kernel.org', '2026/10/02 09:00:00', ''),
+    ])
+
+    # Die after crm.csv and its index are committed but before identities.pkl and store.json are saved
+    def crash(matcher):
+        raise OSError('power cut')
+    monkeypatch.setattr(store, 'save_identities', crash)
+    try:
+        store.apply(delta)
+    except OSError:
+        pass
+    monkeypatch.undo()
+
+    restarted = CrmStore(store.directory)
+    assert restarted.identities().match('Linus', 'Torvalds', domains=['kernel.org'])[0] \
+        == 'https://linkedin.com/in/linus'
+    # Re-applying finds the rows already stored and keeps the rebuilt blocks
+    assert restarted.apply(delta)['unchanged'] == 1
+    assert blocks(CrmStore(store.directory).identities()) == blocks(IdentityMatcher.build(live_records(store.data_path)))
@@ -0,0 +1,95 @@
+"""External hash join: same results as the in-memory dict join"""
+
+import csv
+import io
+import os
+from contextlib import redirect_stdout
+
+import pytest
+
+from external_join import external_hash_join
+from process_webinar_data import create_clay_import
+from stage_cache import StageCache
+
+def dict_join(left_keys, right_rows):
+    table = {}
+    for key, *value in right_rows:
+        table[key] = value
+    return [table.get(key) for key in left_keys]
+
+RIGHT = [
+    ['a', 'first a', '1'],
+    ['b', 'only b', '2'],
+    ['a', 'second a', '3'],   # a later duplicate wins, like a dict
+    ['c', 'c', ''],
+] + [[f'k{i}', f'v{i}', str(i)] for i in range(200)]
+LEFT = ['a', 'missing', 'b', 'a', 'k7', 'k199', '', 'c', 'k42', 'nope']
+
+@pytest.mark.parametrize('memory_budget', [None, 10**9, 4000, 200])
+def test_matches_dict_join_at_any_budget(tmp_path, memory_budget):
+    right_bytes = sum(len(','.join(row)) + 2 for row in RIGHT)
+    joined = list(external_hash_join(iter(LEFT), iter(RIGHT), memory_budget, right_bytes, spill_dir=str(tmp_path)))
+    assert joined == dict_join(LEFT, RIGHT)
+    # Spill files are cleaned up
+    assert os.listdir(tmp_path) == []
+
+def test_skewed_partition_is_repartitioned(tmp_path):
+    # One hot key keeps its partition over budget at every seed, down to MAX_DEPTH
+    right = [['hot', str(i)] for i in range(2000)] + [[f'cold{i}', str(i)] for i in range(20)]
+    left = ['hot', 'cold3', 'cold19', 'warm', 'hot']
+    right_bytes = sum(len(','.join(row)) + 2 for row in right)
+    joined = list(external_hash_join(iter(left), iter(right), right_bytes * 3, right_bytes, spill_dir=str(tmp_path)))
+    assert joined == dict_join(left, right)
+    assert joined[0] == ['1999']
+
+REGISTRANT_HEADER = ['#', 'Firstname', 'Lastname', 'Website Domain', 'Email', 'BMID', 'LinkedIn Profile URL',
+                     'Unsubscribed?', 'Duration', 'Engaged']
+REGISTRANTS = [
+    ['1', 'Ada', 'Lovelace', 'engine.io', '', 'b1', 'https://www.linkedin.com/in/ada', 'No', '', ''],
+    ['2', 'Alan', 'Turing', 'bletchley.uk', '', 'b2', '', 'No', '', ''],                  # fuzzy: blank URL
+    ['3', 'Grace', 'Hopper', 'navy.mil', '', 'b3', 'https://linkedin.com/in/grace-h', 'No', '', ''],
+    ['4', 'Ada', 'Lovelace', 'engine.io', '', 'b4', '', 'No', '', ''],                    # her row is taken exactly
+    ['5', 'Nobody', 'Known', 'void.io', '', 'b5', 'https://linkedin.com/in/nobody', 'No', '', ''],
+    ['6', 'Grace', 'Hopper', 'navy.mil', '', 'b6', 'https://linkedin.com/in/grace-h?dup=2', 'Yes', '', ''],
+]
+CRM_HEADER = ['linkedin_url', 'first_name', 'last_name', 'company_name', 'company_domain', 'industry',
+              'customer_status', 'created_at', 'last_activity_at', 'mrr_eur', 'employees', 'account_tier']
+CRM = [
+    ['https://linkedin.com/in/ada', 'Ada', 'Lovelace', 'Engine', 'engine.io', 'Computing', 'Prospect',
+     '2024-01-01', '2024-02-01', '10', '5', 'SMB'],
+    ['https://linkedin.com/in/alan-t', 'Alan', 'Turing', 'Bletchley', 'bletchley.uk', 'Research', 'Active Customer',
+     '2023-05-01', '2024-03-01', '120.5', '900', 'Enterprise'],
+    ['https://www.linkedin.com/in/grace-h', 'Grace', 'Hopper', 'Navy', 'navy.mil', 'Defense', 'Closed Lost',
+     '2022-01-01', '', '0', '10000', 'Enterprise'],
+    ['https://linkedin.com/in/grace-h', 'Grace', 'Hopper', 'US Navy', 'navy.mil', 'Defense', 'Prospect',
+     '2022-06-01', '', '0', '10000', 'Enterprise'],
+]
+
+def write_csv(path, header, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+def test_clay_import_is_byte_identical_with_memory_budget(tmp_path):
+    source = tmp_path / 'source'
+    source.mkdir()
+    write_csv(source / 'registered list.csv', REGISTRANT_HEADER, REGISTRANTS)
+    write_csv(source / 'CRM.csv', CRM_HEADER, CRM)
+
+    outputs = []
+    for name, memory_budget in (('in_memory', None), ('external', 1500)):
+        output_dir = tmp_path / name
+        output_dir.mkdir()
+        with redirect_stdout(io.StringIO()):
+            assert create_clay_import(str(output_dir), source=str(source), cache=StageCache(enabled=False),
+                                      columnar=False, memory_budget=memory_budget)
+        outputs.append((output_dir / 'webinar_clay_import.csv').read_bytes())
+    assert outputs[0] == outputs[1]
+
+    rows = list(csv.DictReader(io.StringIO(outputs[0].decode('utf-8'))))
+    # CRM rows claimed by an exact match are never fuzzy candidates
+    assert [row['crm_match'] for row in rows] == ['exact', 'fuzzy', 'exact', '', '', '']
+    assert rows[1]['crm_company_name'] == 'Bletchley'
+    # Duplicate CRM keys: the later row wins in both joins
+    assert rows[2]['crm_company_name'] == 'US Navy'
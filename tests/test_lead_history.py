@@ -0,0 +1,74 @@
+"""Lead history: union-find person merging and features independent of recording order"""
+
+import csv
+import itertools
+
+from lead_history import LeadHistory, record_clay_imports
+
+def appearance(bmid, url='', attended=0, qa=0, registered_at='2026/10/01 09:00'):
+    return (bmid, f'https://linkedin.com/in/{url}' if url else '', '', attended, qa, 0, 0, registered_at)
+
+# b1 and b2 are two people until w3, where b2 shows up with b1's profile; b4 links to b3 by URL only
+WEBINARS = {
+    'w1': [appearance('b1', 'ada', attended=1, qa=2, registered_at='2026/10/01 09:00'),
+           appearance('b3', 'alan')],
+    'w2': [appearance('b2', 'ada-lovelace', qa=1, registered_at='2026/10/08 09:00'),
+           appearance('b4', 'alan', attended=1)],
+    'w3': [appearance('b2', 'ada', attended=1, registered_at='2026/10/15 09:00'),
+           appearance('b5')],
+}
+BMIDS = ['b1', 'b2', 'b3', 'b4', 'b5']
+
+def features_by_bmid(history):
+    people = history.people(BMIDS)
+    found = history.features(people)
+    return {bmid: found.get(person) for bmid, person in zip(BMIDS, people)}
+
+def test_leads_sharing_a_bmid_or_url_are_one_person(tmp_path):
+    with LeadHistory(str(tmp_path / 'history.db')) as history:
+        for webinar_id, appearances in WEBINARS.items():
+            history.record_webinar(webinar_id, appearances)
+        people = dict(zip(BMIDS, history.people(BMIDS)))
+        assert people['b1'] == people['b2'] != people['b3'] == people['b4'] != people['b5']
+        assert {row['webinar_id'] for row in history.lead(linkedin_url='https://www.linkedin.com/in/ada-lovelace')} \
+            == {'w1', 'w2', 'w3'}
+        features = features_by_bmid(history)
+    assert features['b1'] == (3, 2, 3, '2026/10/15 09:00')
+    assert features['b3'] == (2, 1, 0, '2026/10/01 09:00')
+    assert features['b5'] == (1, 0, 0, '2026/10/01 09:00')
+
+def test_merge_inside_one_webinar_links_a_chain(tmp_path):
+    with LeadHistory(str(tmp_path / 'history.db')) as history:
+        history.record_webinar('w1', [appearance('b1', 'x'), appearance('b2', 'y'), appearance('b3', 'z')])
+        people = history.record_webinar('w2', [appearance('b1', 'y'), appearance('b3', 'y')])
+        assert len(set(people)) == 1
+        assert len(set(history.people(['b1', 'b2', 'b3']))) == 1
+
+def test_features_do_not_depend_on_recording_order(tmp_path):
+    results = []
+    for n, order in enumerate(itertools.permutations(WEBINARS)):
+        with LeadHistory(str(tmp_path / f'history{n}.db')) as history:
+            for webinar_id in order:
+                history.record_webinar(webinar_id, WEBINARS[webinar_id])
+            # Re-recording a webinar replaces its rows instead of counting them twice
+            history.record_webinar(order[0], WEBINARS[order[0]])
+            results.append(features_by_bmid(history))
+    assert all(result == results[0] for result in results)
+
+def write_import(directory, appearances):
+    directory.mkdir()
+    with open(directory / 'webinar_clay_import.csv', 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['BMID', 'LinkedIn Profile URL', 'attendance_status', 'qa_questions', 'Registration Date/Time'])
+        for bmid, url, _, attended, qa, _, _, registered_at in appearances:
+            writer.writerow([bmid, url, 'attended' if attended else 'registered', qa, registered_at])
+
+def test_batch_columns_do_not_depend_on_webinar_order(tmp_path):
+    for webinar_id, appearances in WEBINARS.items():
+        write_import(tmp_path / webinar_id, appearances)
+    webinars = [(webinar_id, str(tmp_path / webinar_id)) for webinar_id in WEBINARS]
+    forward = record_clay_imports(webinars, str(tmp_path / 'forward.db'))
+    backward = record_clay_imports(webinars[::-1], str(tmp_path / 'backward.db'))
+    assert forward == backward
+    # w1's b1 already counts w3, recorded after it
+    assert [values[0] for _, _, values in forward['w1']] == [3, 2, 3, '2026/10/15 09:00']
@@ -0,0 +1,51 @@
+"""Poll columns are keyed by their question, so a batch never mixes two questions in one column"""
+
+import csv
+import json
+import os
+
+import pytest
+
+from process_webinar_data import (POLL_QUESTIONS_FILE, combine_clay_imports, poll_key, poll_question_map,
+                                  write_poll_questions)
+
+def write_webinar(directory, questions, answers):
+    """One-lead Clay import whose poll columns follow `questions`, plus its poll_questions.json"""
+    os.makedirs(directory)
+    entries = poll_question_map(questions)
+    with open(os.path.join(directory, 'webinar_clay_import.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['BMID'] + [name for e in entries for name in (e['answer_column'], e['latency_column'])])
+        writer.writerow([os.path.basename(directory)] + [value for answer in answers for value in (answer, '1.5')])
+    write_poll_questions(os.path.join(directory, POLL_QUESTIONS_FILE), entries)
+    return os.path.join(directory, 'webinar_clay_import.csv')
+
+def test_same_question_shares_a_column_and_different_ones_do_not(tmp_path):
+    w1 = write_webinar(str(tmp_path / 'w1'), ['Do you track AI search?', 'Team size?'], ['Yes', '10'])
+    # Same first question in another wording of case and spacing, asked second; a new first question
+    w2 = write_webinar(str(tmp_path / 'w2'), ['Budget?', 'do you  track AI search?'], ['High', 'No'])
+    combined = str(tmp_path / 'webinar_clay_import.csv')
+    assert combine_clay_imports([('w1', w1), ('w2', w2)], combined) == 2
+
+    with open(combined, encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    tracking = f'poll_{poll_key("Do you track AI search?")}_answer'
+    assert [row[tracking] for row in rows] == ['Yes', 'No']
+    assert [row[f'poll_{poll_key("Budget?")}_answer'] for row in rows] == ['', 'High']
+
+    with open(tmp_path / POLL_QUESTIONS_FILE, encoding='utf-8') as f:
+        merged = {entry['answer_column']: entry for entry in json.load(f)}
+    assert merged[tracking]['question'] == 'Do you track AI search?'
+    assert merged[tracking]['webinars'] == ['w1', 'w2']
+    assert len(merged) == 3
+
+def test_combine_refuses_a_column_holding_two_questions(tmp_path):
+    w1 = write_webinar(str(tmp_path / 'w1'), ['Team size?'], ['10'])
+    w2 = write_webinar(str(tmp_path / 'w2'), ['Budget?'], ['High'])
+    # Simulate a key collision: w2 claims w1's key for a different question
+    path = os.path.join(tmp_path, 'w2', POLL_QUESTIONS_FILE)
+    entries = poll_question_map(['Team size?'])
+    entries[0]['question'] = 'Budget?'
+    write_poll_questions(path, entries)
+    with pytest.raises(ValueError, match='different questions'):
+        combine_clay_imports([('w1', w1), ('w2', w2)], str(tmp_path / 'webinar_clay_import.csv'))
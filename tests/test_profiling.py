@@ -0,0 +1,21 @@
+"""Run profiler: stages opened inside another stage are its sub-stages, not counted twice"""
+
+import time
+
+from profiling import RunProfiler
+
+def test_nested_stages_are_sub_stages():
+    profiler = RunProfiler()
+    with profiler.stage('join'):
+        with profiler.stage('crm_load'):
+            time.sleep(0.02)
+    with profiler.stage('scoring'):
+        pass
+
+    report = profiler.report()
+    stages = {stage['name']: stage for stage in report['stages']}
+    assert stages['crm_load']['parent'] == 'join'
+    assert 'parent' not in stages['join'] and 'parent' not in stages['scoring']
+    assert stages['join']['wall_seconds'] >= stages['crm_load']['wall_seconds']
+    assert report['stages_wall_seconds'] == round(stages['join']['wall_seconds'] + stages['scoring']['wall_seconds'], 4)
+    assert profiler.summary()[0].startswith('join/crm_load: ')
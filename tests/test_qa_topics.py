@@ -0,0 +1,57 @@
+"""Q&A topics: the vectorized path gives the same topics as the dict fallback"""
+
+import pytest
+
+import qa_topics
+from qa_topics import analyze_questions
+
+QUESTIONS = [
+    ('b1', 'How do we track citations of our brand in ChatGPT answers?', '4'),
+    ('b2', 'Which tools track brand citations across LLMs?', '2'),
+    ('b3', 'Does schema markup help pages get cited?', '0'),
+    ('b1', 'Should every product page carry schema markup?', '1'),
+    ('b4', 'Is llms.txt worth adding to the website?', '3'),
+    ('b5', 'Where should the llms.txt file live on the website?', '0'),
+    ('b6', 'Do citations in ChatGPT drive traffic and conversions?', '5'),
+    ('b7', 'Thanks!', '0'),                      # no tokens left: no topic
+    ('', 'How is schema markup validated?', '0'),  # anonymous question still clusters
+]
+
+def records():
+    return [{'BMID': bmid, 'Question': text, 'Upvotes': upvotes} for bmid, text, upvotes in QUESTIONS]
+
+def analyze(monkeypatch, numpy=None, sparse=None):
+    monkeypatch.setattr(qa_topics, 'np', numpy)
+    monkeypatch.setattr(qa_topics, 'sparse', sparse)
+    return analyze_questions(records())
+
+def test_dict_fallback_groups_related_questions(monkeypatch):
+    analysis = analyze(monkeypatch)
+    topic = [question['topic'] for question in analysis['questions']]
+    assert topic[2] == topic[3] == topic[8]      # schema markup
+    assert topic[4] == topic[5]                  # llms.txt
+    assert topic[7] == ''
+    assert analysis['leads']['b1'][1] == 5       # total upvotes across both questions
+    assert analysis['leads']['b7'] == ('', 0)
+
+def test_numpy_matches_dict_fallback(monkeypatch):
+    numpy = pytest.importorskip('numpy')
+    expected = analyze(monkeypatch)
+    assert analyze(monkeypatch, numpy=numpy) == expected
+
+def test_scipy_sparse_matches_dict_fallback(monkeypatch):
+    numpy = pytest.importorskip('numpy')
+    sparse = pytest.importorskip('scipy.sparse')
+    expected = analyze(monkeypatch)
+    assert analyze(monkeypatch, numpy=numpy, sparse=sparse) == expected
+
+def test_tfidf_matrix_rows_match_dict_vectors():
+    numpy = pytest.importorskip('numpy')
+    index = qa_topics.InvertedIndex()
+    for _, text, _ in QUESTIONS:
+        index.add(text)
+    matrix, terms = index.tfidf_matrix()
+    dense = matrix.toarray() if hasattr(matrix, 'toarray') else matrix
+    for row, vector in zip(dense, index.tfidf_vectors()):
+        assert {terms[j]: weight for j, weight in enumerate(row) if weight} == pytest.approx(vector)
+    assert numpy.allclose(numpy.linalg.norm(dense[:7], axis=1), 1.0)
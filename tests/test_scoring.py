@@ -0,0 +1,21 @@
+"""Score config: caps must be positive, since every input is divided by its cap"""
+
+import json
+
+import pytest
+
+from scoring import load_score_config
+
+def write_config(path, inputs):
+    path.write_text(json.dumps({'engagement_score': inputs}), encoding='utf-8')
+    return str(path)
+
+def test_config_loads_as_weight_cap_pairs(tmp_path):
+    config = load_score_config(write_config(tmp_path / 'scores.json', {'qa_questions': [0.5, 2]}))
+    assert config == {'engagement_score': {'qa_questions': (0.5, 2)}}
+
+@pytest.mark.parametrize('cap', [0, -1])
+def test_non_positive_cap_is_rejected(tmp_path, cap):
+    path = write_config(tmp_path / 'scores.json', {'qa_questions': [0.5, 2], 'qa_upvotes': [0.5, cap]})
+    with pytest.raises(ValueError, match='engagement_score.qa_upvotes has cap'):
+        load_score_config(path)
@@ -0,0 +1,38 @@
+"""Segmentation: the decision maker / practitioner split needs a Title"""
+
+import pytest
+
+import segmentation
+from segmentation import compute_segments
+
+# Brand + hot (one Q&A question), a brand lead that isn't hot, and an agency + hot lead
+COLUMNS = {
+    'qa_questions': ['1', '1', '0', '1'],
+    'Website Domain': ['acme.com', 'globex.com', 'initech.com', 'bright-agency.io'],
+    'Duration': ['30', '30', '30', '30'],
+}
+
+@pytest.fixture(params=['numpy', 'bytes'])
+def masks(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(segmentation, 'np', None)
+
+def test_missing_title_leaves_brand_hot_leads_unsplit(masks):
+    assert compute_segments(COLUMNS) == ['brand_hot_unsplit', 'brand_hot_unsplit', 'unsegmented', 'seg3_agency_hot']
+
+def test_title_splits_decision_makers_from_practitioners(masks):
+    columns = {**COLUMNS, 'Title': ['VP Marketing', 'SEO Specialist', 'CEO', '']}
+    assert compute_segments(columns) == ['seg1_brand_hot_dm', 'seg2_brand_hot_practitioner', 'unsegmented',
+                                         'seg3_agency_hot']
+    # A blank title in an enriched import stays unsplit too
+    columns['Title'][1] = ' '
+    assert compute_segments(columns)[1] == 'brand_hot_unsplit'
+
+def test_missing_title_warns(tmp_path, capsys):
+    with open(tmp_path / 'webinar_clay_import.csv', 'w', encoding='utf-8', newline='') as f:
+        f.write('BMID,qa_questions,Website Domain,Duration\nb1,1,acme.com,30\n')
+    assert segmentation.segment_clay_import(str(tmp_path))
+    assert 'No Title column' in capsys.readouterr().out
+    assert (tmp_path / 'segments' / 'brand_hot_unsplit.csv').exists()
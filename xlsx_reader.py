@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Streaming XLSX Reader
+=====================
+
+Reads worksheet rows straight from the workbook's zipped XML, one row at a
+time, without gnumeric/ssconvert or pandas.
+
+Usage:
+    from xlsx_reader import Workbook
+
+    with Workbook("webinar.xlsx") as wb:
+        for row in wb.rows("registered list"):
+            print(row)  # list of cell strings, '' for empty cells
+
+Only the shared strings table and date styles are held in memory; sheet XML
+is parsed incrementally and every row element is released once it has been
+yielded.
+"""
+
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+CELL_REF = re.compile(r'([A-Z]+)')
+
+# Built-in number formats that render as dates/times
+BUILTIN_DATE_FORMATS = set(range(14, 23)) | {45, 46, 47}
+# Strip quoted literals and [color]/[locale] sections before looking for date tokens
+FORMAT_NOISE = re.compile(r'"[^"]*"|\\.|\[[^\]]*\]')
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+def column_index(cell_ref):
+    """Convert a cell reference like 'AB12' into a 0-based column index"""
+    letters = CELL_REF.match(cell_ref).group(1)
+    index = 0
+    for letter in letters:
+        index = index * 26 + (ord(letter) - 64)
+    return index - 1
+
+def sheet_paths(zf):
+    """Map sheet names to their XML part inside the workbook, in workbook order"""
+    rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels.iter(f'{PKG_REL_NS}Relationship')}
+
+    workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+    paths = {}
+    for sheet in workbook.iter(f'{MAIN_NS}sheet'):
+        target = targets[sheet.get(f'{REL_NS}id')]
+        # Targets are relative to xl/ unless absolute within the package
+        path = target.lstrip('/') if target.startswith('/') else posixpath.join('xl', target)
+        paths[sheet.get('name')] = posixpath.normpath(path)
+    return paths
+
+def load_shared_strings(zf):
+    """Load the shared strings table (rich text runs are concatenated)"""
+    if 'xl/sharedStrings.xml' not in zf.namelist():
+        return []
+
+    strings = []
+    with zf.open('xl/sharedStrings.xml') as f:
+        for _, elem in ET.iterparse(f):
+            if elem.tag == f'{MAIN_NS}si':
+                strings.append(''.join(t.text or '' for t in elem.iter(f'{MAIN_NS}t')))
+                elem.clear()
+    return strings
+
+def load_date_styles(zf):
+    """Return the cell style indexes whose number format is a date or time"""
+    if 'xl/styles.xml' not in zf.namelist():
+        return set()
+
+    styles = ET.fromstring(zf.read('xl/styles.xml'))
+    custom_dates = set()
+    for fmt in styles.iter(f'{MAIN_NS}numFmt'):
+        code = FORMAT_NOISE.sub('', fmt.get('formatCode', '')).lower()
+        if any(token in code for token in ('y', 'd', 'h', 's')) or 'mm' in code:
+            custom_dates.add(int(fmt.get('numFmtId')))
+
+    date_styles = set()
+    cell_xfs = styles.find(f'{MAIN_NS}cellXfs')
+    if cell_xfs is not None:
+        for index, xf in enumerate(cell_xfs.iter(f'{MAIN_NS}xf')):
+            fmt_id = int(xf.get('numFmtId', 0))
+            if fmt_id in BUILTIN_DATE_FORMATS or fmt_id in custom_dates:
+                date_styles.add(index)
+    return date_styles
+
+def format_number(text, is_date=False):
+    """Render a numeric cell the way the CSV exports do (1.0 -> 1, serials -> timestamps)"""
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+
+    if is_date:
+        # Round to the millisecond to undo float noise in the serial
+        moment = EXCEL_EPOCH + timedelta(milliseconds=round(number * 86400000))
+        if number == int(number):
+            return moment.strftime('%Y/%m/%d')
+        if moment.microsecond:
+            return moment.strftime('%Y/%m/%d %H:%M:%S.') + f'{moment.microsecond // 1000:03d}'
+        return moment.strftime('%Y/%m/%d %H:%M:%S')
+
+    if number.is_integer() and 'e' not in text.lower():
+        return str(int(number))
+    return text
+
+def cell_value(cell, shared_strings, date_styles=()):
+    """Return the display string of a <c> element"""
+    cell_type = cell.get('t')
+
+    if cell_type == 'inlineStr':
+        return ''.join(t.text or '' for t in cell.iter(f'{MAIN_NS}t'))
+
+    v = cell.find(f'{MAIN_NS}v')
+    if v is None or v.text is None:
+        return ''
+
+    if cell_type == 's':
+        return shared_strings[int(v.text)]
+    if cell_type == 'b':
+        return 'TRUE' if v.text == '1' else 'FALSE'
+    if cell_type in ('str', 'e'):
+        return v.text
+    return format_number(v.text, int(cell.get('s', 0)) in date_styles)
+
+class Workbook:
+    """An open .xlsx file whose sheets can be streamed in any order"""
+
+    def __init__(self, xlsx_path):
+        self.path = xlsx_path
+        self.zf = zipfile.ZipFile(xlsx_path)
+        self.sheet_paths = sheet_paths(self.zf)
+        self.shared_strings = load_shared_strings(self.zf)
+        self.date_styles = load_date_styles(self.zf)
+
+    @property
+    def sheet_names(self):
+        return list(self.sheet_paths)
+
+    def rows(self, sheet_name):
+        """Yield every row of one sheet as a list of cell strings"""
+        if sheet_name not in self.sheet_paths:
+            raise KeyError(f"Sheet not found: {sheet_name}")
+        return _iter_rows(self.zf, self.sheet_paths[sheet_name], self.shared_strings, self.date_styles)
+
+    def sheet_signature(self, sheet_name):
+        """Cheap content fingerprint of a sheet from the zip directory (CRC32 + size)
+
+        Shared strings and styles are included because cell values live there.
+        """
+        parts = []
+        for member in (self.sheet_paths[sheet_name], 'xl/sharedStrings.xml', 'xl/styles.xml'):
+            try:
+                info = self.zf.getinfo(member)
+            except KeyError:
+                continue
+            parts.append(f'{member}:{info.CRC:08x}:{info.file_size}')
+        return '|'.join(parts)
+
+    def close(self):
+        self.zf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def sheet_names(xlsx_path):
+    """List the sheet names of a workbook in tab order"""
+    with zipfile.ZipFile(xlsx_path) as zf:
+        return list(sheet_paths(zf))
+
+def iter_sheet_rows(xlsx_path, sheet_name):
+    """Yield every row of one sheet as a list of cell strings"""
+    with Workbook(xlsx_path) as wb:
+        yield from wb.rows(sheet_name)
+
+def _iter_rows(zf, path, shared_strings, date_styles):
+    """Stream rows of a sheet part, filling gaps left by sparse cells"""
+    with zf.open(path) as f:
+        sheet_data = None
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == f'{MAIN_NS}sheetData':
+                    sheet_data = elem
+                continue
+            if elem.tag != f'{MAIN_NS}row':
+                continue
+
+            row = []
+            for cell in elem.iter(f'{MAIN_NS}c'):
+                ref = cell.get('r')
+                if ref:
+                    index = column_index(ref)
+                    if index > len(row):
+                        row.extend([''] * (index - len(row)))
+                row.append(cell_value(cell, shared_strings, date_styles))
+
+            # Trailing styled-but-empty cells carry no data
+            while row and row[-1] == '':
+                row.pop()
+
+            yield row
+
+            # Drop the finished row so memory stays flat on large sheets
+            sheet_data.clear()